@@ -3,8 +3,10 @@ import logging
 
 from chalice import Chalice, Response
 
+from chalicelib.setting import MONGODB_WARMUP
 from chalicelib.src.routers.users import UserAPI
 from chalicelib.src.routers.wines import WineAPI
+from chalicelib.src.tools.database import mongodb_obj
 
 app = Chalice(app_name="wine-api")
 app.api.binary_types = ["application/json", "multipart/form-data"]
@@ -12,6 +14,13 @@ app.api.cors = True
 
 logging.basicConfig(level=logging.INFO)
 
+# Lambda init 단계에서 DB 연결을 미리 맺어둠 (provisioned concurrency 등)
+if MONGODB_WARMUP:
+    try:
+        mongodb_obj.warmup()
+    except Exception as e:
+        logging.error(f"MongoDB warmup failed: {e}")
+
 
 @app.route("/", methods=["GET"])
 def index():
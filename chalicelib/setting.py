@@ -19,6 +19,70 @@ MONGODB_USERNAME = os.getenv("MONGODB_USERNAME")
 MONGODB_PASSWORD = os.getenv("MONGODB_PASSWORD")
 MONGODB_DATABASE = os.getenv("MONGODB_DATABASE")
 
+# MONGODB BACKEND
+# memory: Atlas 대신 in-process stand-in 사용 (MONGODB_FIXTURES의 JSON을 로드)
+MONGODB_BACKEND = os.getenv("MONGODB_BACKEND", "atlas")
+MONGODB_FIXTURES = os.getenv("MONGODB_FIXTURES")
+
+# MONGODB POOL
+# Lambda 컨테이너는 한 번에 하나의 요청만 처리하므로 작은 pool로 충분함
+IS_LAMBDA = bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", 0))
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", 10 if IS_LAMBDA else 100))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", 60000 if IS_LAMBDA else 0)) or None
+MONGODB_WARMUP = os.getenv("MONGODB_WARMUP", "false").lower() == "true"
+# 한 요청 안에서 동시에 실행할 독립적인 DB 호출 수 (1이면 순서대로 실행, pool 크기보다 작게)
+MONGODB_CONCURRENCY = int(os.getenv("MONGODB_CONCURRENCY", 4))
+
+# MONGODB QUERY METRICS
+MONGODB_SLOW_QUERY_MS = float(os.getenv("MONGODB_SLOW_QUERY_MS", 200))
+MONGODB_EXPLAIN_SAMPLE_RATE = float(os.getenv("MONGODB_EXPLAIN_SAMPLE_RATE", 0))
+
+# WINE DETAIL READ MODEL
+# true: 와인 상세를 projector가 만든 wine_detail_view에서 먼저 조회
+WINE_DETAIL_VIEW = os.getenv("WINE_DETAIL_VIEW", "false").lower() == "true"
+
+# WINE RESOLUTION
+# true: slug / _id / redirection을 wine_resolutions로 찾음 (regex 조회 대신, projector가 유지)
+WINE_RESOLUTION = os.getenv("WINE_RESOLUTION", "false").lower() == "true"
+WINE_RESOLUTION_CACHE_SIZE = int(os.getenv("WINE_RESOLUTION_CACHE_SIZE", 10000))
+WINE_RESOLUTION_TTL_SECONDS = float(os.getenv("WINE_RESOLUTION_TTL_SECONDS", 300))
+
+# WINE NEGATIVE CACHE
+# true: 없는 와인 id의 404 / 301 결정을 잠깐 기억 (새 와인 / redirection이 생기면 projector가 version을 올려서 비움)
+# 비우는 쪽이 projector뿐이므로 기본값은 projector를 전제로 하는 WINE_RESOLUTION을 따름
+WINE_NEGATIVE_CACHE = os.getenv("WINE_NEGATIVE_CACHE", str(WINE_RESOLUTION)).lower() == "true"
+WINE_NEGATIVE_CACHE_SIZE = int(os.getenv("WINE_NEGATIVE_CACHE_SIZE", 10000))
+WINE_NEGATIVE_CACHE_TTL_SECONDS = float(os.getenv("WINE_NEGATIVE_CACHE_TTL_SECONDS", 300))
+
+# CRITIC REVIEW STATS
+# true: 와인별 critic review 집계를 critic_review_stats에서 읽음 (projector가 유지, 없으면 요청에서 계산)
+CRITIC_REVIEW_STATS = os.getenv("CRITIC_REVIEW_STATS", "false").lower() == "true"
+
+# REFERENCE CACHE
+# true: glass / country / region / grape / aroma / critic 등 작은 collection과 slug별 빈티지 목록을
+#       컨테이너에 올려두고 $lookup 대신 사용
+REFERENCE_CACHE = os.getenv("REFERENCE_CACHE", "true").lower() == "true"
+REFERENCE_CACHE_TTL_SECONDS = float(os.getenv("REFERENCE_CACHE_TTL_SECONDS", 300))
+WINE_VINTAGE_CACHE_SIZE = int(os.getenv("WINE_VINTAGE_CACHE_SIZE", 10000))
+
+# RESPONSE CACHE
+# true: 렌더링된 와인 상세 response를 (_id, updated_at, language, location) 단위로 컨테이너에 cache
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "true").lower() == "true"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 512))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 60))
+
+# PRICE REFERENCE
+# currency / country 기준 데이터를 TTL마다 background로 다시 읽어서 교체 (읽기 경로는 refresh를 기다리지 않음)
+# PRICE_REFERENCE_SNAPSHOT: cold start 시 DB 대신 먼저 올릴 snapshot 파일
+#                           (python -m chalicelib.src.tools.processor snapshot PATH로 생성)
+PRICE_REFERENCE_TTL_SECONDS = float(os.getenv("PRICE_REFERENCE_TTL_SECONDS", 3600))
+PRICE_REFERENCE_SNAPSHOT = os.getenv("PRICE_REFERENCE_SNAPSHOT")
+
+# CloudWatch Embedded Metric Format
+METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "WineAPI")
+
 # GOOGLE
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
@@ -35,3 +99,6 @@ DEFAULT_HEADERS = {
     "Content-Type": "application/json",
 }
 
+# ETag: response 형태가 바뀌는 배포 시 변경해서 이전 ETag가 304로 응답되지 않도록 함
+ETAG_SALT = os.getenv("ETAG_SALT", "")
+
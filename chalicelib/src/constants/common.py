@@ -4,6 +4,27 @@ from enum import Enum
 class COLLECTION(Enum):
     WINE = "wines"
     USER = "users"
+    TOKEN = "tokens"
+    INTERACTION = "interactions"
+    ARTICLE = "articles"
+    COMMENT = "comments"
+    CURRENCY = "currencies"
+    COUNTRY = "countries"
+    REGION = "regions"
+    GLASS = "glasses"
+    PAIRING = "pairings"
+    AROMA = "aromas"
+    TYPE = "types"
+    GRAPE = "grapes"
+    CRITIC = "critics"
+    CRITIC_REVIEW = "critic_reviews"
+    COUNTER = "counters"
+    WINE_DETAIL_VIEW = "wine_detail_view"
+    PROJECTOR_STATE = "projector_states"
+    WINE_RESOLUTION = "wine_resolutions"
+    WINE_VINTAGE = "wine_vintages"
+    CRITIC_REVIEW_STATS = "critic_review_stats"
+    CRITIC_REVIEW_CONTRIBUTION = "critic_review_contributions"
     
     @staticmethod
     def __member_values__():
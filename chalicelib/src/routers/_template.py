@@ -1,19 +1,22 @@
 import cgi
+import hashlib
 import io
 import logging
 import traceback
 from enum import Enum
 from http import HTTPStatus
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional, Union
 
 from chalice import BadRequestError, Response, UnauthorizedError, app
 from dacite import exceptions
 from pydantic import BaseModel
 
-from chalicelib.setting import DEFAULT_HEADERS, JWT_ALGORITHM, JWT_SECRET
+from chalicelib.setting import (DEFAULT_HEADERS, ETAG_SALT, JWT_ALGORITHM,
+                                JWT_SECRET)
 from chalicelib.src.tools.authorizer import Authorizer
 from chalicelib.src.tools.aws import send_slack
-from chalicelib.src.utils import compress_item
+from chalicelib.src.tools.database import request_scope
+from chalicelib.src.utils import EncodedResponse, compress_item
 from chalicelib.src.validators.response import MessageResponse
 
 logging.basicConfig(level=logging.INFO)
@@ -33,6 +36,16 @@ class AuthResponseOption(Enum):
     NONE = "none"         # 반환하는 헤더의 Authorization에 토큰을 추가하지 않음
 
 
+class CacheOption(Enum):
+    PUBLIC = "public, max-age=60, s-maxage=60, stale-while-revalidate=60" # CloudFront / 브라우저에서 cache, 만료 후에는 ETag로 재검증
+    PRIVATE = "private, no-cache"                                        # 브라우저에서만 cache, 매번 ETag로 재검증 (사용자마다 다른 response)
+    NONE = "none"                                                        # Cache-Control 헤더를 추가하지 않음
+
+
+# response가 달라지는 요청 헤더
+VARY_HEADERS = ["Accept-Encoding", "Accept-Language", "CloudFront-Viewer-Country"]
+
+
 class APIHandler:
     
     def run(
@@ -40,7 +53,31 @@ class APIHandler:
         business_function: Any,
         request_validator: BaseModel = None, 
         authorize_option: AuthorizeOption = AuthorizeOption.NONE,
-        auth_response_option: AuthResponseOption = AuthResponseOption.NONE
+        auth_response_option: AuthResponseOption = AuthResponseOption.NONE,
+        cache_option: CacheOption = CacheOption.NONE,
+        version_function: Optional[Callable[[BaseModel], Optional[str]]] = None
+    ):
+        # 요청 단위 DB identity map / query metrics
+        with request_scope(route=current_request.context.get("resourcePath")):
+            return APIHandler._run(
+                current_request=current_request,
+                business_function=business_function,
+                request_validator=request_validator,
+                authorize_option=authorize_option,
+                auth_response_option=auth_response_option,
+                cache_option=cache_option,
+                version_function=version_function
+            )
+
+    @staticmethod
+    def _run(
+        current_request: app.Request,
+        business_function: Any,
+        request_validator: BaseModel = None, 
+        authorize_option: AuthorizeOption = AuthorizeOption.NONE,
+        auth_response_option: AuthResponseOption = AuthResponseOption.NONE,
+        cache_option: CacheOption = CacheOption.NONE,
+        version_function: Optional[Callable[[BaseModel], Optional[str]]] = None
     ):
         headers = {}
         
@@ -87,6 +124,23 @@ class APIHandler:
                 return APIHandler._process_bad_request_error(e, current_request, headers=headers)
         else:
             input = None
+        
+        # Conditional GET: document version으로 ETag를 만들고, 바뀌지 않았으면 business logic 없이 304
+        etag = None
+        if version_function and input:
+            try:
+                version = version_function(input)
+            except Exception as e:
+                logging.error(f"Unexpected error: {e}")
+                version = None
+            if version is not None:
+                etag = APIHandler._make_etag(version=version, input=input, headers=current_request.headers)
+                if APIHandler._check_if_not_modified(headers=current_request.headers, etag=etag):
+                    return Response(
+                        body="",
+                        status_code=HTTPStatus.NOT_MODIFIED,
+                        headers={**headers, **APIHandler._make_cache_headers(cache_option, etag)}
+                    )
                 
         # Business Logic
         try:
@@ -99,11 +153,13 @@ class APIHandler:
 
         if status == HTTPStatus.OK and auth_response_option == AuthResponseOption.DELETE:
             headers["Authorization"] = "Bearer "
+        if status == HTTPStatus.OK:
+            headers.update(APIHandler._make_cache_headers(cache_option, etag))
         
         # Response
         return APIHandler.handle_response(
             current_request=current_request,
-            response_data=data.model_dump(),
+            response_data=data if isinstance(data, EncodedResponse) else data.model_dump(),
             response_status=status,
             response_headers=headers
         )
@@ -111,13 +167,21 @@ class APIHandler:
     @staticmethod
     def handle_response(
         current_request: app.Request, 
-        response_data: Dict[str, Any], 
+        response_data: Union[Dict[str, Any], EncodedResponse], 
         response_status: HTTPStatus, 
         response_headers: Dict[str, Any] = {}
     ):
         # Gzip compression
         try:
-            if APIHandler._check_if_gzip_compress(
+            if isinstance(response_data, EncodedResponse):
+                # 이미 직렬화 / 압축된 body (response cache)
+                if APIHandler._check_if_gzip_compress(headers=current_request.headers):
+                    body = response_data.gzip
+                    headers = {**DEFAULT_HEADERS, "Content-Encoding": "gzip"}
+                else:
+                    body = response_data.identity
+                    headers = DEFAULT_HEADERS
+            elif APIHandler._check_if_gzip_compress(
                 headers=current_request.headers):
                 body = compress_item(response_data)
                 headers = {**DEFAULT_HEADERS, "Content-Encoding": "gzip"}
@@ -150,6 +214,38 @@ class APIHandler:
             }
         )
     
+    @staticmethod
+    def _make_etag(version: str, input: BaseModel, headers) -> str:
+        """
+            strong ETag: document version + language + location + content encoding
+        """
+        encoding = "gzip" if APIHandler._check_if_gzip_compress(headers=headers) else "identity"
+        key = "|".join([ETAG_SALT, str(version), str(input.language), str(input.location), encoding])
+        return f'"{hashlib.sha1(key.encode("utf-8")).hexdigest()}"'
+
+    @staticmethod
+    def _check_if_not_modified(headers, etag: str) -> bool:
+        if not (if_none_match := headers.get("If-None-Match")):
+            return False
+        # If-None-Match는 weak comparison (W/ prefix 무시)
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        tags = [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+        return "*" in tags or etag in tags
+
+    @staticmethod
+    def _make_cache_headers(cache_option: CacheOption, etag: Optional[str]) -> Dict[str, str]:
+        if cache_option == CacheOption.NONE:
+            return {"ETag": etag} if etag else {}
+
+        vary = VARY_HEADERS + (["Authorization"] if cache_option == CacheOption.PRIVATE else [])
+        headers = {
+            "Cache-Control": cache_option.value,
+            "Vary": ", ".join(vary),
+        }
+        if etag:
+            headers["ETag"] = etag
+        return headers
+
     @staticmethod
     def _check_language(headers):
         language = headers.get("Accept-Language") or headers.get("accept-language")
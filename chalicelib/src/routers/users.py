@@ -9,7 +9,8 @@ from chalicelib.src.v1_3.users.request import (DeleteUserRequest,
                                                UpdateUserRequest)
 from chalicelib.src.v1_3.users.service import UserService
 
-from ._template import APIHandler, AuthorizeOption, AuthResponseOption
+from ._template import (APIHandler, AuthorizeOption, AuthResponseOption,
+                        CacheOption)
 
 
 class UserAPI:
@@ -72,7 +73,9 @@ class UserAPI:
             request_validator=GetUserRequest,
             business_function=UserAPI.service.get_user,
             authorize_option=AuthorizeOption.OPTIONAL,
-            auth_response_option=AuthResponseOption.OPTIONAL
+            auth_response_option=AuthResponseOption.OPTIONAL,
+            cache_option=CacheOption.PRIVATE,
+            version_function=UserAPI.service.get_version
         )
         
     @staticmethod
@@ -5,7 +5,8 @@ from chalicelib.src.v1_3.wines.request import (GetWineDetailRequest,
                                                WineReactionRequest)
 from chalicelib.src.v1_3.wines.service import WineService
 
-from ._template import APIHandler, AuthorizeOption, AuthResponseOption
+from ._template import (APIHandler, AuthorizeOption, AuthResponseOption,
+                        CacheOption)
 
 
 class WineAPI:
@@ -19,7 +20,9 @@ class WineAPI:
             current_request=WineAPI.api.current_request,
             request_validator=GetWineDetailRequest,
             business_function=WineAPI.service.get_item,
-            authorize_option=AuthorizeOption.OPTIONAL
+            authorize_option=AuthorizeOption.OPTIONAL,
+            cache_option=CacheOption.PUBLIC,
+            version_function=WineAPI.service.get_version
         )
         
     @staticmethod
@@ -0,0 +1,184 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from chalicelib.src.constants.common import COLLECTION
+from chalicelib.src.tools.database import RequestScope, mongodb_obj
+from chalicelib.src.tools.metrics import put_metrics
+from chalicelib.src.utils import EncodedResponse
+
+
+def estimate_size(value: Any) -> int:
+    """
+        cache entry의 대략적인 메모리 크기 (직렬화한 byte 수 기준)
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, EncodedResponse):
+        return value.size
+    if hasattr(value, "model_dump_json"):
+        return len(value.model_dump_json())
+    return len(json.dumps(value, default=str))
+
+
+class ResponseCache:
+    """
+        렌더링된 response의 LRU / TTL cache
+        - key에 document version(updated_at)을 넣어서 document가 바뀌면 자연스럽게 miss가 나도록 함
+        - 참조 데이터(환율, critic 등) 변경은 TTL만큼 늦게 반영됨
+        - max_entries / max_bytes를 넘으면 가장 오래 사용하지 않은 entry부터 제거
+        - hit / miss / eviction 수와 entry 수 / byte 수는 요청 종료 시(RequestScope close) EMF로 기록
+        - cache된 값은 여러 요청이 공유하므로 수정하면 안 됨
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 512,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 60,
+        sizeof: Callable[[Any], int] = estimate_size
+    ):
+        self.name = name
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl_seconds = ttl_seconds
+        self._sizeof = sizeof
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._stats = {"hit": 0, "miss": 0, "eviction": 0}
+
+        RequestScope.close_hooks.append(lambda scope: self.flush_metrics(scope))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[2] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if not entry:
+                self._stats["miss"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hit"] += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None):
+        size = self._sizeof(value) if size is None else size
+        if size > self._max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + self._ttl_seconds)
+            self._bytes += size
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats["eviction"] += 1
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        if (value := self.get(key)) is None:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def flush_metrics(self, scope: Optional[RequestScope] = None):
+        with self._lock:
+            stats, self._stats = self._stats, {"hit": 0, "miss": 0, "eviction": 0}
+            entries, size = len(self._entries), self._bytes
+        if not any(stats.values()):
+            return
+
+        put_metrics(
+            metrics={
+                "CacheHit": (stats["hit"], "Count"),
+                "CacheMiss": (stats["miss"], "Count"),
+                "CacheEviction": (stats["eviction"], "Count"),
+                "CacheEntries": (entries, "Count"),
+                "CacheSize": (size, "Bytes"),
+            },
+            dimensions={
+                "cache": self.name,
+                "route": scope.route if scope and scope.route else "-",
+            }
+        )
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+class VersionedCache(ResponseCache):
+    """
+        여러 컨테이너가 각자 들고 있는 cache를 같이 비우기 위한 version
+        - 값이 바뀌는 쓰기가 있으면 bump_version으로 counters의 {version_prefix}:{name} version을 올림
+        - check_interval_seconds마다 version을 확인해서 바뀌었으면 전체를 비움
+          (다른 컨테이너에는 최대 check_interval_seconds만큼 늦게 반영됨)
+    """
+    version_prefix = "version"
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 10000,
+        ttl_seconds: float = 300,
+        check_interval_seconds: float = 30
+    ):
+        super().__init__(name=name, max_entries=max_entries, ttl_seconds=ttl_seconds, sizeof=lambda value: 1)
+        self._check_interval_seconds = check_interval_seconds
+        self._checked_at = 0.0
+        self._version: Optional[int] = None
+
+    @classmethod
+    def make_version_id(cls, name: str) -> str:
+        return f"{cls.version_prefix}:{name}"
+
+    @classmethod
+    def bump_version(cls, name: str):
+        mongodb_obj.upsert_document(
+            collection=COLLECTION.COUNTER.value,
+            query={"_id": cls.make_version_id(name)},
+            update_query={"$inc": {"count": 1}}
+        )
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        self._check_version()
+        return super().get(key)
+
+    def _check_version(self):
+        if time.monotonic() - self._checked_at < self._check_interval_seconds:
+            return
+        document = mongodb_obj.get_document(
+            collection=COLLECTION.COUNTER.value,
+            query={"_id": self.make_version_id(self.name)},
+            projection={"_id": 0, "count": 1}
+        )
+        version = document.get("count")
+        if version != self._version:
+            self.clear()
+            self._version = version
+        self._checked_at = time.monotonic()
+
+
+class NegativeCache(VersionedCache):
+    """
+        없는 key에 대한 결정(404 / redirect 등)을 TTL 동안 기억해서 같은 요청이 반복되면 DB 조회를 생략
+        - key가 새로 생길 수 있는 쓰기가 있으면 bump_version으로 counters의 negative:{name} version을 올림
+    """
+    version_prefix = "negative"
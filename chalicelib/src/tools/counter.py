@@ -0,0 +1,178 @@
+"""
+    interaction counter
+
+    - user:{user}:{item_type}:{action}: user가 남긴 리액션 수 (목록 API의 totalSize)
+    - {item_type}:{item}:{action}: item이 받은 리액션 수
+    - 리액션 시 interaction update와 같은 transaction에서 증감하고, 회원 탈퇴 시에도 증감하며, 누락이나 불일치는 rebuild로 다시 계산
+    - counter는 COUNTED_ITEM_TYPES(wine)만 유지 (article 리액션은 counter를 갱신하는 쓰기 경로가 없음)
+
+    python -m chalicelib.src.tools.counter rebuild
+"""
+import logging
+from collections import Counter
+from typing import Any, Dict, Optional, Set
+
+from pymongo import UpdateOne
+from pymongo.client_session import ClientSession
+
+from chalicelib.src.constants.common import (COLLECTION, ITEM_TYPE, REACTION,
+                                             STATUS)
+from chalicelib.src.tools.database import mongodb_obj
+
+REACTION_PROJECTION = {"_id": 0, "like": 1, "bookmark": 1}
+COUNTED_ITEM_TYPES = [ITEM_TYPE.WINE.value]
+
+
+class InteractionCounter:
+
+    @staticmethod
+    def make_user_counter_id(user: str, item_type: str, action: str) -> str:
+        return f"user:{user}:{item_type}:{action}"
+
+    @staticmethod
+    def make_item_counter_id(item_type: str, item: Any, action: str) -> str:
+        return f"{item_type}:{item}:{action}"
+
+    @staticmethod
+    def get_actions(document: Optional[Dict[str, Any]]) -> Set[str]:
+        """
+            interaction document에서 활성화된 리액션 목록
+        """
+        document = document or {}
+        actions = set()
+        if document.get("like") == 1:
+            actions.add(REACTION.LIKE.value)
+        elif document.get("like") == -1:
+            actions.add(REACTION.DISLIKE.value)
+        if document.get("bookmark") == 1:
+            actions.add(REACTION.BOOKMARK.value)
+        return actions
+
+    @staticmethod
+    def make_deltas(
+        user: str,
+        item_type: str,
+        item: Any,
+        before: Optional[Dict[str, Any]],
+        after: Optional[Dict[str, Any]]
+    ) -> Dict[str, int]:
+        """
+            리액션 변경 전후 상태로 counter 별 증감값 계산
+        """
+        before_actions = InteractionCounter.get_actions(before)
+        after_actions = InteractionCounter.get_actions(after)
+
+        deltas = {}
+        for action in before_actions ^ after_actions:
+            delta = 1 if action in after_actions else -1
+            deltas[InteractionCounter.make_user_counter_id(user, item_type, action)] = delta
+            deltas[InteractionCounter.make_item_counter_id(item_type, item, action)] = delta
+        return deltas
+
+    @staticmethod
+    def apply_deltas(deltas: Dict[str, int], session: Optional[ClientSession] = None):
+        if not deltas:
+            return
+        mongodb_obj.bulk_update_documents(
+            collection=COLLECTION.COUNTER.value,
+            bulk_operations=[
+                UpdateOne(
+                    {"_id": counter_id},
+                    {"$inc": {"count": delta}},
+                    upsert=True
+                )
+                for counter_id, delta in deltas.items()
+            ],
+            ordered=False,
+            session=session
+        )
+
+    @staticmethod
+    def get_count(counter_id: str) -> Optional[int]:
+        """
+            counter 값 (counter document가 없으면 None: 호출한 쪽에서 직접 count)
+        """
+        document = mongodb_obj.get_document(
+            collection=COLLECTION.COUNTER.value,
+            query={"_id": counter_id},
+            projection={"_id": 0, "count": 1}
+        )
+        return max(document["count"], 0) if "count" in document else None
+
+    @staticmethod
+    def remove_user(user: str):
+        """
+            탈퇴한 user의 리액션을 item counter에서 제외
+        """
+        deltas = Counter()
+        for document in mongodb_obj.iter_documents(
+            collection=COLLECTION.INTERACTION.value,
+            query={"user": user, "item_type": {"$in": COUNTED_ITEM_TYPES}},
+            projection={"_id": 0, "item": 1, "item_type": 1, "like": 1, "bookmark": 1},
+            batch_size=1000
+        ):
+            for action in InteractionCounter.get_actions(document):
+                deltas[InteractionCounter.make_item_counter_id(document["item_type"], document["item"], action)] -= 1
+        InteractionCounter.apply_deltas(dict(deltas))
+
+    @staticmethod
+    def rebuild() -> int:
+        """
+            interactions 전체를 다시 세어서 counter를 덮어씀 (counter 도입 시 backfill / 불일치 복구용)
+        """
+        counts = Counter()
+        deleted_users = {
+            document["_id"]
+            for document in mongodb_obj.iter_documents(
+                collection=COLLECTION.USER.value,
+                query={"status": STATUS.DELETED.value},
+                projection={"_id": 1}
+            )
+        }
+        for document in mongodb_obj.iter_documents(
+            collection=COLLECTION.INTERACTION.value,
+            query={
+                "item_type": {"$in": COUNTED_ITEM_TYPES},
+                "$or": [{"like": {"$in": [1, -1]}}, {"bookmark": 1}]
+            },
+            projection={"_id": 0, "user": 1, "item": 1, "item_type": 1, "like": 1, "bookmark": 1},
+            batch_size=1000
+        ):
+            for action in InteractionCounter.get_actions(document):
+                counts[InteractionCounter.make_user_counter_id(document["user"], document["item_type"], action)] += 1
+                if document["user"] not in deleted_users:
+                    counts[InteractionCounter.make_item_counter_id(document["item_type"], document["item"], action)] += 1
+
+        # 더 이상 리액션이 없는 counter는 0으로 맞춤
+        for document in mongodb_obj.iter_documents(
+            collection=COLLECTION.COUNTER.value,
+            query={},
+            projection={"_id": 1}
+        ):
+            # {item_type}:{item}:{action} / user:{user}:{item_type}:{action}
+            if document["_id"].split(":", 1)[0] in COUNTED_ITEM_TYPES or \
+                    document["_id"].rsplit(":", 2)[-2] in COUNTED_ITEM_TYPES:
+                counts.setdefault(document["_id"], 0)
+
+        operations = [
+            UpdateOne({"_id": counter_id}, {"$set": {"count": count}}, upsert=True)
+            for counter_id, count in counts.items()
+        ]
+        for idx in range(0, len(operations), 1000):
+            mongodb_obj.bulk_update_documents(
+                collection=COLLECTION.COUNTER.value,
+                bulk_operations=operations[idx:idx + 1000],
+                ordered=False
+            )
+        return len(operations)
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "rebuild"
+    if command == "rebuild":
+        logging.info(f"rebuilt {InteractionCounter.rebuild()} counters")
+    else:
+        sys.exit(f"unknown command: {command}")
@@ -1,11 +1,31 @@
-from chalicelib.setting import (MONGODB_DATABASE, MONGODB_HOSTNAME,
+from chalicelib.setting import (MONGODB_BACKEND, MONGODB_DATABASE,
+                                MONGODB_FIXTURES, MONGODB_HOSTNAME,
+                                MONGODB_MAX_IDLE_TIME_MS,
+                                MONGODB_MAX_POOL_SIZE, MONGODB_MIN_POOL_SIZE,
                                 MONGODB_PASSWORD, MONGODB_USERNAME)
 
 from ._client import MongoDB
+from ._concurrent import gather
+from ._identity import RequestScope, current_scope, request_scope
+from ._lazy import LazyMongoDB
+from ._memory import InMemoryMongoDB, resolve_path, set_path
+from ._pipeline import Param, PipelineTemplate
 
-mongodb_obj = MongoDB(
-    host=MONGODB_HOSTNAME,
-    username=MONGODB_USERNAME,
-    password=MONGODB_PASSWORD,
-    database=MONGODB_DATABASE
-)
+
+def _create_mongodb() -> MongoDB:
+    if MONGODB_BACKEND == "memory":
+        if MONGODB_FIXTURES:
+            return InMemoryMongoDB.from_fixtures(MONGODB_FIXTURES)
+        return InMemoryMongoDB()
+    return MongoDB(
+        host=MONGODB_HOSTNAME,
+        username=MONGODB_USERNAME,
+        password=MONGODB_PASSWORD,
+        database=MONGODB_DATABASE,
+        min_pool_size=MONGODB_MIN_POOL_SIZE,
+        max_pool_size=MONGODB_MAX_POOL_SIZE,
+        max_idle_time_ms=MONGODB_MAX_IDLE_TIME_MS
+    )
+
+
+mongodb_obj = LazyMongoDB(factory=_create_mongodb)
@@ -1,22 +1,55 @@
-from typing import Any, Dict, List, Tuple, Union
+import copy
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple,
+                    Union)
 
+import bson
 import certifi
-from pymongo import MongoClient, ReadPreference
+from pymongo import IndexModel, MongoClient, ReadPreference, ReturnDocument
+from pymongo.client_session import ClientSession
 from pymongo.errors import PyMongoError
 
+from chalicelib.src.utils import decode_cursor
+
+from ._identity import current_scope
+from ._metrics import instrumented
+
 
 class MongoDB:
-    def __init__(self, host: str, username: str, password: str, database: str):
-        self._client = self._open_client(host, username, password)
+    def __init__(
+        self,
+        host: str,
+        username: str,
+        password: str,
+        database: str,
+        min_pool_size: int = 0,
+        max_pool_size: int = 100,
+        max_idle_time_ms: Optional[int] = None
+    ):
+        self._client = self._open_client(
+            host, username, password,
+            min_pool_size=min_pool_size,
+            max_pool_size=max_pool_size,
+            max_idle_time_ms=max_idle_time_ms
+        )
         self._read_db = self._get_secondary_database(database)
         self._write_db = self._get_primary_database(database)
 
-    def _open_client(self, host: str, username: str, password: str):
+    def _open_client(
+        self,
+        host: str,
+        username: str,
+        password: str,
+        min_pool_size: int = 0,
+        max_pool_size: int = 100,
+        max_idle_time_ms: Optional[int] = None
+    ):
         return MongoClient(
             f"mongodb+srv://{username}:{password}@{host}",
             w="majority",
             compressors="zstd",
-            maxPoolSize=100,
+            minPoolSize=min_pool_size,
+            maxPoolSize=max_pool_size,
+            maxIdleTimeMS=max_idle_time_ms,
             tlsCAFile=certifi.where(),
             retryWrites=True,
             read_preference=ReadPreference.NEAREST
@@ -31,14 +64,53 @@ class MongoDB:
             read_preference=ReadPreference.SECONDARY_PREFERRED
         )
 
+    def primary(self) -> "MongoDB":
+        """
+            읽기도 primary에서 하는 같은 client
+            - 변경 직후의 document를 읽어야 하는 projector / 집계 갱신용 (secondary는 변경 전 document를 반환할 수 있음)
+        """
+        if getattr(self, "_primary", None) is None:
+            self._primary = copy.copy(self)
+            self._primary._read_db = self._write_db
+        return self._primary
+
     def _close_client(self):
         self._client.close()
 
+    def ping(self):
+        return self._client.admin.command("ping")
+
+    def run_transaction(self, callback: Callable[[Optional[ClientSession]], Any]) -> Any:
+        """
+            callback(session)을 하나의 transaction으로 실행
+            - TransientTransactionError / UnknownTransactionCommitResult는 pymongo가 callback부터 다시 실행함
+        """
+        with self._client.start_session() as session:
+            return session.with_transaction(callback, read_preference=ReadPreference.PRIMARY)
+
     def get_document(
         self,
         collection: str,
         query: Dict[str, Union[str, int, Any]],
         projection: Dict[str, Union[str, int, Any]]
+    ) -> Dict[str, Union[str, int, Any]]:
+        # _id 단건 조회는 요청 단위 identity map을 먼저 확인 (hit은 query 지표에 포함하지 않음)
+        scope = current_scope()
+        _id = self._get_point_id(query) if scope else None
+        if _id is not None and (cached := scope.get(collection, _id, projection)) is not None:
+            return dict(cached)
+
+        doc = self._find_one(collection, query, projection)
+        if _id is not None:
+            scope.put(collection, _id, projection, doc)
+        return dict(doc)
+
+    @instrumented("get_document")
+    def _find_one(
+        self,
+        collection: str,
+        query: Dict[str, Union[str, int, Any]],
+        projection: Dict[str, Union[str, int, Any]]
     ) -> Dict[str, Union[str, int, Any]]:
         doc = self._read_db.get_collection(collection).find_one(
             filter=query, 
@@ -46,6 +118,50 @@ class MongoDB:
         )
         return dict(doc) if (doc is not None) else dict()
 
+    def get_documents_by_ids(
+        self,
+        collection: str,
+        ids: List[Any],
+        projection: Dict[str, Union[str, int, Any]]
+    ) -> List[Dict[str, Union[str, int, Any]]]:
+        """
+            여러 _id를 $in 한 번으로 조회
+            - 입력 순서대로 반환하며, 없는 document는 빈 dict로 채움
+        """
+        scope = current_scope()
+        found = {}
+        missing = []
+        for _id in dict.fromkeys(ids):
+            if scope and (cached := scope.get(collection, _id, projection)) is not None:
+                found[_id] = cached
+            else:
+                missing.append(_id)
+
+        if missing:
+            found.update(self._find_by_ids(collection, missing, projection))
+            for _id in missing:
+                doc = found.setdefault(_id, dict())
+                if projection and not projection.get("_id", 1):
+                    doc.pop("_id", None)
+                if scope:
+                    scope.put(collection, _id, projection, doc)
+
+        return [dict(found[_id]) for _id in ids]
+
+    @instrumented("get_documents_by_ids")
+    def _find_by_ids(
+        self,
+        collection: str,
+        ids: List[Any],
+        projection: Dict[str, Union[str, int, Any]]
+    ) -> Dict[Any, Dict[str, Union[str, int, Any]]]:
+        docs = self._read_db.get_collection(collection).find(
+            {"_id": {"$in": ids}},
+            {**projection, "_id": 1} if projection else None
+        )
+        return {doc["_id"]: dict(doc) for doc in docs}
+
+    @instrumented("aggregate_documents")
     def aggregate_documents(
         self,
         collection: str,
@@ -54,6 +170,7 @@ class MongoDB:
         docs = self._read_db.get_collection(collection).aggregate(pipelines)
         return list(docs) if (docs is not None) else list()
 
+    @instrumented("get_documents")
     def get_documents(
         self,
         collection: str,
@@ -87,59 +204,243 @@ class MongoDB:
             )
         return list(docs) if (docs is not None) else list()
 
+    @instrumented("count_documents")
+    def count_documents(
+        self,
+        collection: str,
+        query: Dict[str, Union[str, int, Any]]
+    ) -> int:
+        return self._read_db.get_collection(collection).count_documents(query)
+
+    def iter_documents(
+        self,
+        collection: str,
+        query: Dict[str, Union[str, int, Any]],
+        projection: Dict[str, Union[str, int, Any]],
+        sort: List[Tuple[str, int]] = None,
+        limit: int = None,
+        batch_size: int = 500,
+        max_time_ms: Optional[int] = None,
+        max_memory_bytes: Optional[int] = None
+    ) -> Iterator[Dict[str, Union[str, int, Any]]]:
+        """
+            get_documents의 streaming 버전
+            - cursor를 list로 만들지 않고 batch 단위로 읽어서 하나씩 반환
+            - max_memory_bytes: 한 batch에 쌓이는 document 크기의 상한
+        """
+        cursor = (
+            self._read_db.get_collection(collection)
+            .find(query, projection)
+            .batch_size(batch_size)
+        )
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        if max_time_ms:
+            cursor = cursor.max_time_ms(max_time_ms)
+
+        with cursor:
+            yield from self._stream_cursor(cursor, batch_size, max_memory_bytes)
+
+    def iter_aggregate_documents(
+        self,
+        collection: str,
+        pipelines: List[Dict[str, Union[str, int, Any]]],
+        batch_size: int = 500,
+        max_time_ms: Optional[int] = None,
+        max_memory_bytes: Optional[int] = None
+    ) -> Iterator[Dict[str, Union[str, int, Any]]]:
+        """
+            aggregate_documents의 streaming 버전
+        """
+        options = {"batchSize": batch_size}
+        if max_time_ms:
+            options["maxTimeMS"] = max_time_ms
+
+        cursor = self._read_db.get_collection(collection).aggregate(pipelines, **options)
+        with cursor:
+            yield from self._stream_cursor(cursor, batch_size, max_memory_bytes)
+
+    @staticmethod
+    def _stream_cursor(
+        cursor: Iterable[Dict[str, Any]],
+        batch_size: int,
+        max_memory_bytes: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        batch_bytes = 0
+        for idx, doc in enumerate(cursor):
+            if max_memory_bytes:
+                if idx % batch_size == 0:
+                    batch_bytes = 0
+                batch_bytes += len(bson.encode(doc))
+                if batch_bytes > max_memory_bytes:
+                    raise PyMongoError(f"DB Memory Ceiling Exceeded: {batch_bytes} bytes")
+            yield doc
+
+    @instrumented("upsert_document")
     def upsert_document(
         self,
         collection: str,
         query: Dict[str, Union[str, int, Any]],
         update_query: Dict[str, Union[str, int, Any]]
     ):
+        self._invalidate_scope(collection)
         doc = self._write_db[collection].update_one(query, update_query, upsert=True)
         if not doc.acknowledged:
             raise PyMongoError("DB Upsert Error")
         return doc.upserted_id
 
+    @instrumented("find_and_upsert_document")
+    def find_and_upsert_document(
+        self,
+        collection: str,
+        query: Dict[str, Union[str, int, Any]],
+        update_query: Union[Dict[str, Any], List[Dict[str, Any]]],
+        projection: Dict[str, Union[str, int, Any]] = None,
+        session: Optional[ClientSession] = None
+    ) -> Dict[str, Union[str, int, Any]]:
+        """
+            upsert 후 update 이전 document를 반환 (새로 생성된 경우 빈 dict)
+        """
+        self._invalidate_scope(collection)
+        doc = self._write_db[collection].find_one_and_update(
+            query, update_query,
+            projection=projection,
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+            session=session
+        )
+        return dict(doc) if (doc is not None) else dict()
+
+    @instrumented("update_document")
     def update_document(
         self,
         collection: str,
         query: Dict[str, Union[str, int, Any]],
         update_query: Dict[str, Union[str, int, Any]]
     ):
+        self._invalidate_scope(collection)
         doc = self._write_db[collection].update_one(query, update_query, upsert=False)
         if not doc.acknowledged:
             raise PyMongoError("DB Update Error")
         return doc
 
+    @instrumented("update_documents")
     def update_documents(
         self,
         collection: str,
         query: Dict[str, Union[str, int, Any]],
         update_query: Dict[str, Union[str, int, Any]]
     ):
+        self._invalidate_scope(collection)
         doc = self._write_db[collection].update_many(query, update_query, upsert=False)
         if not doc.acknowledged:
             raise PyMongoError("DB Update Error")
         return doc
 
+    @instrumented("create_document")
     def create_document(
         self,
         collection: str,
         document: Dict[str, Union[str, int, Any]]
     ):
+        self._invalidate_scope(collection)
         doc = self._write_db[collection].insert_one(document=document)
         if not doc.acknowledged:
             raise PyMongoError("DB Insert Error")
         return doc.inserted_id
 
+    @instrumented("replace_document")
+    def replace_document(
+        self,
+        collection: str,
+        query: Dict[str, Union[str, int, Any]],
+        document: Dict[str, Union[str, int, Any]],
+        upsert: bool = True
+    ):
+        self._invalidate_scope(collection)
+        doc = self._write_db[collection].replace_one(query, document, upsert=upsert)
+        if not doc.acknowledged:
+            raise PyMongoError("DB Replace Error")
+        return doc
+
+    @instrumented("delete_document")
+    def delete_document(
+        self,
+        collection: str,
+        query: Dict[str, Union[str, int, Any]]
+    ):
+        self._invalidate_scope(collection)
+        doc = self._write_db[collection].delete_one(query)
+        if not doc.acknowledged:
+            raise PyMongoError("DB Delete Error")
+        return doc
+
+    @instrumented("bulk_update_documents")
     def bulk_update_documents(
         self,
         collection: str,
-        bulk_operations: list
+        bulk_operations: list,
+        ordered: bool = True,
+        session: Optional[ClientSession] = None
     ):
-        doc = self._write_db[collection].bulk_write(bulk_operations)
+        self._invalidate_scope(collection)
+        doc = self._write_db[collection].bulk_write(bulk_operations, ordered=ordered, session=session)
         if not doc.acknowledged:
             raise PyMongoError("DB Update Error")
         return doc
 
+    def watch(
+        self,
+        collections: List[str],
+        resume_after: Optional[Dict[str, Any]] = None,
+        full_document: str = "updateLookup"
+    ):
+        """
+            database change stream (collections에 해당하는 변경만)
+        """
+        return self._write_db.watch(
+            pipeline=[{"$match": {"ns.coll": {"$in": collections}}}],
+            full_document=full_document,
+            resume_after=resume_after
+        )
+
+    def create_indexes(self, collection: str, indexes: List[IndexModel]) -> List[str]:
+        return self._write_db[collection].create_indexes(indexes)
+
+    def explain_query(
+        self,
+        collection: str,
+        query: Dict[str, Union[str, int, Any]],
+        sort: List[Tuple[str, int]] = None,
+        verbosity: str = "queryPlanner"
+    ) -> Dict[str, Any]:
+        command = {"find": collection, "filter": query}
+        if sort:
+            command["sort"] = dict(sort)
+        return self._read_db.command("explain", command, verbosity=verbosity)
+
+    def explain_aggregate(
+        self,
+        collection: str,
+        pipelines: List[Dict[str, Union[str, int, Any]]],
+        verbosity: str = "queryPlanner"
+    ) -> Dict[str, Any]:
+        command = {"aggregate": collection, "pipeline": pipelines, "cursor": {}}
+        return self._read_db.command("explain", command, verbosity=verbosity)
+
+    @staticmethod
+    def _get_point_id(query: Dict[str, Any]) -> Optional[Any]:
+        if len(query) != 1 or isinstance(query.get("_id"), (dict, list)):
+            return None
+        return query.get("_id")
+
+    @staticmethod
+    def _invalidate_scope(collection: str):
+        if scope := current_scope():
+            scope.invalidate(collection)
+
     @staticmethod
     def make_lookup_query(
         as_field: str,
@@ -166,6 +467,11 @@ class MongoDB:
             ]
         }
         
+    @staticmethod
+    def make_cursor_query(cursor: str, field: str = "_id", direction: int = -1) -> Dict[str, Any]:
+        operator = "$lt" if direction < 0 else "$gt"
+        return {field: {operator: decode_cursor(cursor)}}
+
     @staticmethod
     def make_pagination_facet_query(page: int, size: int) -> Dict[str, Any]:
         return {
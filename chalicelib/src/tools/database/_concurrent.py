@@ -0,0 +1,36 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, List
+
+from chalicelib.setting import MONGODB_CONCURRENCY
+
+_THREAD_NAME_PREFIX = "mongodb-gather"
+
+# 첫 번째 호출은 요청 thread에서 실행하므로 worker는 하나 적게 둠
+_executor = ThreadPoolExecutor(
+    max_workers=MONGODB_CONCURRENCY - 1,
+    thread_name_prefix=_THREAD_NAME_PREFIX
+) if MONGODB_CONCURRENCY > 1 else None
+
+
+def gather(*calls: Callable[[], Any]) -> List[Any]:
+    """
+        같은 요청 안의 독립적인 DB 호출을 sync client의 connection pool 위에서 동시에 실행
+        - 결과는 입력 순서대로 반환하고, 실패한 호출이 있으면 모든 호출이 끝난 뒤 첫 번째 예외를 올림
+        - 각 호출은 요청의 contextvars(RequestScope, price reference 등)를 복사해서 실행
+        - worker 안에서 다시 gather하면 (pool이 모두 대기 중일 수 있으므로) 순서대로 실행
+    """
+    if (
+        len(calls) <= 1
+        or _executor is None
+        or threading.current_thread().name.startswith(_THREAD_NAME_PREFIX)
+    ):
+        return [call() for call in calls]
+
+    futures = [_executor.submit(contextvars.copy_context().run, call) for call in calls[1:]]
+    try:
+        first = calls[0]()
+    finally:
+        wait(futures)
+    return [first] + [future.result() for future in futures]
@@ -0,0 +1,74 @@
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+_REQUEST_SCOPE: ContextVar[Optional["RequestScope"]] = ContextVar("mongodb_request_scope", default=None)
+
+
+class RequestScope:
+    """
+        요청 단위 identity map
+        - 같은 요청 안에서 같은 _id의 document를 여러 번 읽으면 DB를 한 번만 조회함
+        - 쓰기가 발생한 collection은 비워서 이후 읽기가 DB를 다시 조회하도록 함
+        - operation / collection 별 실행 시간과 collection 별 identity map hit 수를 모아두었다가 요청 종료 시 close_hooks에서 기록
+    """
+    close_hooks: List[Callable[["RequestScope"], None]] = []
+
+    def __init__(self, route: Optional[str] = None):
+        self.route = route
+        self.timings: Dict[Tuple[str, str], List[float]] = {}
+        self.identity_hits: Dict[str, int] = {}
+        # gather로 여러 thread에서 같은 scope에 기록할 수 있음
+        self._lock = threading.Lock()
+        self._documents: Dict[Tuple[str, Any, str], Dict[str, Any]] = {}
+
+    def record_timing(self, operation: str, collection: str, elapsed_ms: float):
+        with self._lock:
+            timing = self.timings.setdefault((operation, collection), [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += elapsed_ms
+            timing[2] = max(timing[2], elapsed_ms)
+
+    def close(self):
+        for hook in self.close_hooks:
+            try:
+                hook(self)
+            except Exception as e:
+                logging.error(f"request scope hook failed: {e}")
+
+    def get(self, collection: str, _id: Any, projection: Optional[dict]) -> Optional[Dict[str, Any]]:
+        document = self._documents.get(self._make_key(collection, _id, projection))
+        if document is not None:
+            with self._lock:
+                self.identity_hits[collection] = self.identity_hits.get(collection, 0) + 1
+        return document
+
+    def put(self, collection: str, _id: Any, projection: Optional[dict], document: Dict[str, Any]):
+        self._documents[self._make_key(collection, _id, projection)] = document
+
+    def invalidate(self, collection: str):
+        self._documents = {
+            key: value for key, value in self._documents.items()
+            if key[0] != collection
+        }
+
+    @staticmethod
+    def _make_key(collection: str, _id: Any, projection: Optional[dict]) -> Tuple[str, Any, str]:
+        return collection, _id, repr(sorted(projection.items())) if projection else ""
+
+
+def current_scope() -> Optional[RequestScope]:
+    return _REQUEST_SCOPE.get()
+
+
+@contextmanager
+def request_scope(route: Optional[str] = None) -> Iterator[RequestScope]:
+    scope = RequestScope(route=route)
+    token = _REQUEST_SCOPE.set(scope)
+    try:
+        yield scope
+    finally:
+        _REQUEST_SCOPE.reset(token)
+        scope.close()
@@ -0,0 +1,73 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from chalicelib.src.tools.metrics import put_metrics
+
+
+class LazyMongoDB:
+    """
+        MongoDB client proxy
+        - 첫 DB 접근 시점에 client 생성 (SRV DNS 조회, TLS handshake, pool 생성)
+        - DB를 사용하지 않는 요청은 cold start 비용을 지불하지 않음
+        - warmup()으로 Lambda init 단계에서 미리 연결할 수 있음
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+        self._metrics = {
+            "initialized": False,
+            "init_ms": None,
+            "ping_ms": None,
+            "initialized_at": None,
+        }
+
+    def __getattr__(self, name: str):
+        # __getattr__ is only called when normal lookup fails,
+        # so every MongoDB method goes through the lazily built instance
+        return getattr(self._get_instance(), name)
+
+    @property
+    def metrics(self) -> Dict[str, Optional[float]]:
+        return dict(self._metrics)
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._instance is not None
+
+    def warmup(self) -> Dict[str, Optional[float]]:
+        """
+            client 생성 후 ping으로 첫 연결까지 맺어둠
+        """
+        instance = self._get_instance()
+        if self._metrics["ping_ms"] is None:
+            started = time.perf_counter()
+            instance.ping()
+            self._metrics["ping_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            logging.info(f"MongoDB warmup: {self._metrics}")
+            put_metrics(
+                metrics={"ConnectionPingTime": (self._metrics["ping_ms"], "Milliseconds")},
+                dimensions={"operation": "warmup"}
+            )
+        return self.metrics
+
+    def _get_instance(self):
+        if self._instance is not None:
+            return self._instance
+
+        with self._lock:
+            if self._instance is None:
+                started = time.perf_counter()
+                self._instance = self._factory()
+                self._metrics["init_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                self._metrics["initialized"] = True
+                self._metrics["initialized_at"] = int(time.time())
+                logging.info(f"MongoDB client initialized: {self._metrics}")
+                put_metrics(
+                    metrics={"ClientInitTime": (self._metrics["init_ms"], "Milliseconds")},
+                    dimensions={"operation": "connect"}
+                )
+        return self._instance
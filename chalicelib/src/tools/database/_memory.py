@@ -0,0 +1,781 @@
+import copy
+import functools
+import os
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from bson import ObjectId, json_util
+from pymongo import (DeleteMany, DeleteOne, IndexModel, InsertOne,
+                     ReplaceOne, ReturnDocument, UpdateMany, UpdateOne)
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo.results import (BulkWriteResult, DeleteResult, InsertOneResult,
+                             UpdateResult)
+
+from ._client import MongoDB
+
+_MISSING = object()
+
+
+class InMemoryMongoDB(MongoDB):
+    """
+        MongoDB와 같은 interface를 가진 in-process stand-in
+        - Atlas 없이 APIHandler.run 전체 경로를 테스트 / 벤치마크하기 위한 용도
+        - pymongo의 Database / Collection 부분만 메모리로 대체하므로
+          identity map, 계측, explain 등 MongoDB의 나머지 동작은 그대로 사용함
+    """
+
+    def __init__(self, collections: Dict[str, List[Dict[str, Any]]] = None):
+        self._client = None
+        self._read_db = self._write_db = InMemoryDatabase(collections)
+
+    @classmethod
+    def from_fixtures(cls, path: str) -> "InMemoryMongoDB":
+        """
+            JSON fixture 로드 (MongoDB Extended JSON 지원)
+            - 디렉토리: {collection}.json 파일마다 document list
+            - 파일: {collection: [document, ...]}
+        """
+        collections = {}
+        if os.path.isdir(path):
+            for filename in sorted(os.listdir(path)):
+                if filename.endswith(".json"):
+                    with open(os.path.join(path, filename), encoding="utf-8") as f:
+                        collections[filename[:-5]] = json_util.loads(f.read())
+        else:
+            with open(path, encoding="utf-8") as f:
+                collections = json_util.loads(f.read())
+        return cls(collections=collections)
+
+    def _close_client(self):
+        pass
+
+    def ping(self):
+        return self._read_db.command("ping")
+
+    def run_transaction(self, callback: Callable[[Optional[Any]], Any]) -> Any:
+        # 한 process 안에서만 쓰므로 session 없이 그대로 실행
+        return callback(None)
+
+
+class InMemoryDatabase:
+    def __init__(self, collections: Dict[str, List[Dict[str, Any]]] = None):
+        self._collections: Dict[str, InMemoryCollection] = {}
+        for name, docs in (collections or {}).items():
+            self.get_collection(name)._docs.extend(copy.deepcopy(docs))
+
+    def __getitem__(self, name: str) -> "InMemoryCollection":
+        return self.get_collection(name)
+
+    def get_collection(self, name: str, **kwargs) -> "InMemoryCollection":
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(self, name)
+        return self._collections[name]
+
+    def command(self, command: str, value: Any = None, verbosity: str = "queryPlanner", **kwargs) -> Dict[str, Any]:
+        if command == "ping":
+            return {"ok": 1.0}
+        if command != "explain":
+            raise NotImplementedError(f"unsupported command: {command}")
+
+        if "find" in value:
+            collection, query, sort = value["find"], value.get("filter", {}), value.get("sort")
+        else:
+            collection, query, sort = value["aggregate"], {}, None
+            for stage in value["pipeline"]:
+                (operator, spec), = stage.items()
+                if operator == "$match" and sort is None:
+                    query = {**query, **spec}
+                elif operator == "$sort" and sort is None:
+                    sort = spec
+                elif operator != "$project":
+                    break
+        plan = self.get_collection(collection).plan(query, sort)
+        return {"queryPlanner": {"namespace": collection, "winningPlan": plan}, "ok": 1.0}
+
+
+class InMemoryCursor:
+    def __init__(self, docs: List[Dict[str, Any]], projection: Optional[Dict[str, Any]] = None):
+        self._docs = docs
+        self._projection = projection
+        self._sort = None
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list: Union[str, List[Tuple[str, int]]], direction: int = 1) -> "InMemoryCursor":
+        self._sort = [(key_or_list, direction)] if isinstance(key_or_list, str) else key_or_list
+        return self
+
+    def skip(self, skip: int) -> "InMemoryCursor":
+        self._skip = skip
+        return self
+
+    def limit(self, limit: int) -> "InMemoryCursor":
+        self._limit = limit
+        return self
+
+    def batch_size(self, batch_size: int) -> "InMemoryCursor":
+        return self
+
+    def max_time_ms(self, max_time_ms: int) -> "InMemoryCursor":
+        return self
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        docs = sort_documents(self._docs, self._sort) if self._sort else self._docs
+        docs = docs[self._skip:self._skip + self._limit] if self._limit else docs[self._skip:]
+        return iter([apply_projection(doc, self._projection) for doc in docs])
+
+    def __enter__(self) -> "InMemoryCursor":
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def close(self):
+        pass
+
+
+class InMemoryCollection:
+    """
+        pymongo Collection 중 MongoDB가 사용하는 method만 구현
+        - find / aggregate($match, $project, $set, $limit, $skip, $sort, $lookup, $facet, $count)
+        - update(operator / pipeline), insert, bulk_write
+        - create_indexes로 등록한 index를 기준으로 explain 결과(IXSCAN / COLLSCAN / SORT)를 흉내냄
+    """
+
+    def __init__(self, database: InMemoryDatabase, name: str):
+        self.database = database
+        self.name = name
+        self._docs: List[Dict[str, Any]] = []
+        self._indexes: Dict[str, List[Tuple[str, int]]] = {}
+
+    # ----------------------------------------------
+    # Read
+    # ----------------------------------------------
+    def find(self, filter: Dict[str, Any] = None, projection: Dict[str, Any] = None, **kwargs) -> InMemoryCursor:
+        return InMemoryCursor([doc for doc in self._docs if match_document(doc, filter)], projection)
+
+    def find_one(self, filter: Dict[str, Any] = None, projection: Dict[str, Any] = None, **kwargs) -> Optional[Dict[str, Any]]:
+        for doc in self._docs:
+            if match_document(doc, filter):
+                return apply_projection(doc, projection)
+        return None
+
+    def count_documents(self, filter: Dict[str, Any], **kwargs) -> int:
+        return sum(1 for doc in self._docs if match_document(doc, filter))
+
+    def aggregate(self, pipeline: List[Dict[str, Any]], **kwargs) -> InMemoryCursor:
+        return InMemoryCursor(self._run_pipeline(self._docs, pipeline))
+
+    def _run_pipeline(self, docs: List[Dict[str, Any]], pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # 저장된 document는 수정하지 않고, 값을 바꾸는 stage만 복사본을 만듦
+        for stage in pipeline:
+            (operator, spec), = stage.items()
+            if operator == "$match":
+                docs = [doc for doc in docs if match_document(doc, spec)]
+            elif operator == "$project":
+                docs = [apply_projection(doc, spec) for doc in docs]
+            elif operator in ["$set", "$addFields"]:
+                docs = [apply_update(doc, [stage], is_insert=False) for doc in docs]
+            elif operator == "$limit":
+                docs = docs[:spec]
+            elif operator == "$skip":
+                docs = docs[spec:]
+            elif operator == "$sort":
+                docs = sort_documents(docs, spec)
+            elif operator == "$count":
+                docs = [{spec: len(docs)}] if docs else []
+            elif operator == "$facet":
+                docs = [{
+                    name: self._run_pipeline(docs, sub_pipeline)
+                    for name, sub_pipeline in spec.items()
+                }]
+            elif operator == "$lookup":
+                docs = [self._lookup(doc, spec) for doc in docs]
+            else:
+                raise NotImplementedError(f"unsupported pipeline stage: {operator}")
+        return docs
+
+    def _lookup(self, doc: Dict[str, Any], spec: Dict[str, Any]) -> Dict[str, Any]:
+        foreign = self.database.get_collection(spec["from"])
+        foreign_docs = foreign._docs
+        if "localField" in spec:
+            local_values = _flatten(resolve_path(doc, spec["localField"])) or [None]
+            foreign_docs = [
+                foreign_doc for foreign_doc in foreign_docs
+                if any(
+                    _values_equal(local, value)
+                    for local in local_values
+                    for value in (_flatten(resolve_path(foreign_doc, spec["foreignField"])) or [None])
+                )
+            ]
+        doc = copy.deepcopy(doc)
+        set_path(doc, spec["as"], foreign._run_pipeline(foreign_docs, spec.get("pipeline", [])))
+        return doc
+
+    # ----------------------------------------------
+    # Write
+    # ----------------------------------------------
+    def insert_one(self, document: Dict[str, Any], **kwargs) -> InsertOneResult:
+        return InsertOneResult(self._insert(document), acknowledged=True)
+
+    def update_one(self, filter: Dict[str, Any], update: Union[Dict[str, Any], List[Dict[str, Any]]], upsert: bool = False, **kwargs) -> UpdateResult:
+        return self._update(filter, update, upsert=upsert, many=False)
+
+    def update_many(self, filter: Dict[str, Any], update: Union[Dict[str, Any], List[Dict[str, Any]]], upsert: bool = False, **kwargs) -> UpdateResult:
+        return self._update(filter, update, upsert=upsert, many=True)
+
+    def find_one_and_update(
+        self,
+        filter: Dict[str, Any],
+        update: Union[Dict[str, Any], List[Dict[str, Any]]],
+        projection: Dict[str, Any] = None,
+        upsert: bool = False,
+        return_document: bool = ReturnDocument.BEFORE,
+        **kwargs
+    ) -> Optional[Dict[str, Any]]:
+        for doc in self._docs:
+            if match_document(doc, filter):
+                before = apply_projection(doc, projection)
+                updated = apply_update(doc, update, is_insert=False)
+                doc.clear()
+                doc.update(updated)
+                return before if return_document == ReturnDocument.BEFORE else apply_projection(doc, projection)
+        if not upsert:
+            return None
+        _id = self._insert(apply_update(make_upsert_document(filter), update, is_insert=True))
+        return None if return_document == ReturnDocument.BEFORE else self.find_one({"_id": _id}, projection)
+
+    def replace_one(self, filter: Dict[str, Any], replacement: Dict[str, Any], upsert: bool = False, **kwargs) -> UpdateResult:
+        return self._update(filter, {"$replace": replacement}, upsert=upsert, many=False)
+
+    def delete_one(self, filter: Dict[str, Any], **kwargs) -> DeleteResult:
+        return DeleteResult({"n": self._delete(filter, many=False)}, acknowledged=True)
+
+    def delete_many(self, filter: Dict[str, Any], **kwargs) -> DeleteResult:
+        return DeleteResult({"n": self._delete(filter, many=True)}, acknowledged=True)
+
+    def bulk_write(self, requests: list, ordered: bool = True, **kwargs) -> BulkWriteResult:
+        result = {
+            "writeErrors": [], "writeConcernErrors": [], "upserted": [],
+            "nInserted": 0, "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0,
+        }
+        for idx, request in enumerate(requests):
+            try:
+                self._bulk_write_one(idx, request, result)
+            except DuplicateKeyError as e:
+                result["writeErrors"].append({"index": idx, "code": 11000, "errmsg": str(e), "op": request})
+                if ordered:
+                    break
+        if result["writeErrors"]:
+            raise BulkWriteError(result)
+        return BulkWriteResult(result, acknowledged=True)
+
+    def _bulk_write_one(self, idx: int, request: Any, result: Dict[str, Any]):
+        if isinstance(request, InsertOne):
+            self._insert(request._doc)
+            result["nInserted"] += 1
+        elif isinstance(request, (UpdateOne, UpdateMany, ReplaceOne)):
+            update = {"$replace": request._doc} if isinstance(request, ReplaceOne) else request._doc
+            updated = self._update(
+                request._filter, update,
+                upsert=bool(request._upsert),
+                many=isinstance(request, UpdateMany)
+            )
+            if updated.upserted_id is not None:
+                result["nUpserted"] += 1
+                result["upserted"].append({"index": idx, "_id": updated.upserted_id})
+            else:
+                result["nMatched"] += updated.matched_count
+                result["nModified"] += updated.modified_count
+        elif isinstance(request, (DeleteOne, DeleteMany)):
+            result["nRemoved"] += self._delete(request._filter, many=isinstance(request, DeleteMany))
+        else:
+            raise NotImplementedError(f"unsupported bulk operation: {request}")
+
+    def _insert(self, document: Dict[str, Any]) -> Any:
+        # pymongo와 같이 _id가 없으면 입력 document에 _id를 채움
+        document.setdefault("_id", ObjectId())
+        if any(doc["_id"] == document["_id"] for doc in self._docs):
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} _id: {document['_id']}")
+        self._docs.append(copy.deepcopy(document))
+        return document["_id"]
+
+    def _delete(self, filter: Dict[str, Any], many: bool) -> int:
+        removed = 0
+        for doc in list(self._docs):
+            if match_document(doc, filter):
+                self._docs.remove(doc)
+                removed += 1
+                if not many:
+                    break
+        return removed
+
+    def _update(
+        self,
+        filter: Dict[str, Any],
+        update: Union[Dict[str, Any], List[Dict[str, Any]]],
+        upsert: bool,
+        many: bool
+    ) -> UpdateResult:
+        matched, modified = 0, 0
+        for doc in self._docs:
+            if not match_document(doc, filter):
+                continue
+            matched += 1
+            updated = apply_update(doc, update, is_insert=False)
+            if updated != doc:
+                doc.clear()
+                doc.update(updated)
+                modified += 1
+            if not many:
+                break
+
+        raw_result = {"n": matched, "nModified": modified, "updatedExisting": bool(matched)}
+        if not matched and upsert:
+            raw_result["upserted"] = self._insert(apply_update(make_upsert_document(filter), update, is_insert=True))
+            raw_result["n"] = 1
+        return UpdateResult(raw_result, acknowledged=True)
+
+    # ----------------------------------------------
+    # Index / Explain
+    # ----------------------------------------------
+    def create_indexes(self, indexes: List[IndexModel], **kwargs) -> List[str]:
+        for index in indexes:
+            self._indexes[index.document["name"]] = list(index.document["key"].items())
+        return [index.document["name"] for index in indexes]
+
+    def plan(self, query: Dict[str, Any], sort: Optional[Union[Dict[str, int], List[Tuple[str, int]]]]) -> Dict[str, Any]:
+        """
+            query planner 흉내: query field가 prefix를 가장 길게 덮는 index를 고르고,
+            sort를 index 순서로 처리할 수 없으면 SORT stage를 붙임
+        """
+        fields = [key for key in (query or {}) if not key.startswith("$")]
+        sort = list(sort.items()) if isinstance(sort, dict) else list(sort or [])
+
+        best = None
+        for key in [[("_id", 1)]] + list(self._indexes.values()):
+            prefix = 0
+            while prefix < len(key) and key[prefix][0] in fields:
+                prefix += 1
+            covers_sort = _index_covers_sort(key, prefix, sort)
+            if not prefix and not (sort and covers_sort):
+                continue
+            if best is None or (prefix, covers_sort) > best[:2]:
+                best = (prefix, covers_sort, key)
+
+        plan = (
+            {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "keyPattern": dict(best[2])}}
+            if best else {"stage": "COLLSCAN"}
+        )
+        if sort and not (best and best[1]):
+            plan = {"stage": "SORT", "inputStage": plan}
+        return plan
+
+
+def _index_covers_sort(key: List[Tuple[str, int]], prefix: int, sort: List[Tuple[str, int]]) -> bool:
+    if not sort:
+        return True
+    for start in range(prefix + 1):
+        window = key[start:start + len(sort)]
+        if [field for field, _ in window] != [field for field, _ in sort]:
+            continue
+        directions = [a == b for (_, a), (_, b) in zip(window, sort)]
+        if all(directions) or not any(directions):
+            return True
+    return False
+
+
+# ----------------------------------------------
+# Query / Update helpers
+# ----------------------------------------------
+def resolve_path(doc: Any, path: str) -> List[Any]:
+    """
+        dotted path의 값 목록 (array를 만나면 각 element로 펼쳐서 탐색)
+    """
+    values = [doc]
+    for part in path.split("."):
+        next_values = []
+        for value in values:
+            if isinstance(value, dict):
+                if part in value:
+                    next_values.append(value[part])
+            elif isinstance(value, list):
+                if part.isdigit() and int(part) < len(value):
+                    next_values.append(value[int(part)])
+                else:
+                    next_values.extend(
+                        item[part] for item in value
+                        if isinstance(item, dict) and part in item
+                    )
+        values = next_values
+    return values
+
+
+def get_path(doc: Dict[str, Any], path: str, default: Any = None) -> Any:
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return default
+        value = value[part]
+    return value
+
+
+def set_path(doc: Dict[str, Any], path: str, value: Any):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        if not isinstance(doc.get(part), dict):
+            doc[part] = {}
+        doc = doc[part]
+    doc[parts[-1]] = value
+
+
+def unset_path(doc: Dict[str, Any], path: str):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(parts[-1], None)
+
+
+def match_document(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            if not all(match_document(doc, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(match_document(doc, sub) for sub in condition):
+                return False
+        elif key == "$nor":
+            if any(match_document(doc, sub) for sub in condition):
+                return False
+        elif not _match_condition(resolve_path(doc, key), condition):
+            return False
+    return True
+
+
+def _match_condition(values: List[Any], condition: Any) -> bool:
+    if isinstance(condition, re.Pattern):
+        condition = {"$regex": condition}
+    if not (isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition)):
+        return _equals_any(values, condition)
+
+    for operator, operand in condition.items():
+        if operator == "$eq":
+            matched = _equals_any(values, operand)
+        elif operator == "$ne":
+            matched = not _equals_any(values, operand)
+        elif operator == "$in":
+            matched = any(_equals_any(values, item) for item in operand)
+        elif operator == "$nin":
+            matched = not any(_equals_any(values, item) for item in operand)
+        elif operator == "$exists":
+            matched = bool(values) == bool(operand)
+        elif operator in ["$gt", "$gte", "$lt", "$lte"]:
+            matched = any(_compare(value, operator, operand) for value in _flatten(values))
+        elif operator == "$regex":
+            flags = re.IGNORECASE if "i" in condition.get("$options", "") else 0
+            pattern = operand if isinstance(operand, re.Pattern) else re.compile(operand, flags)
+            matched = any(isinstance(value, str) and pattern.search(value) for value in _flatten(values))
+        elif operator == "$options":
+            continue
+        elif operator == "$size":
+            matched = any(isinstance(value, list) and len(value) == operand for value in values)
+        elif operator == "$all":
+            matched = all(_equals_any(values, item) for item in operand)
+        elif operator == "$elemMatch":
+            matched = any(
+                isinstance(value, list) and any(
+                    match_document(item, operand) if isinstance(item, dict) else _match_condition([item], operand)
+                    for item in value
+                )
+                for value in values
+            )
+        elif operator == "$not":
+            matched = not _match_condition(values, operand)
+        else:
+            raise NotImplementedError(f"unsupported query operator: {operator}")
+        if not matched:
+            return False
+    return True
+
+
+def _flatten(values: List[Any]) -> List[Any]:
+    flattened = []
+    for value in values:
+        if isinstance(value, list):
+            flattened.extend(value)
+        else:
+            flattened.append(value)
+    return flattened
+
+
+def _values_equal(a: Any, b: Any) -> bool:
+    if isinstance(a, bool) != isinstance(b, bool):
+        return False
+    return a == b
+
+
+def _equals_any(values: List[Any], expected: Any) -> bool:
+    if expected is None and not values:
+        return True
+    for value in values:
+        if _values_equal(value, expected):
+            return True
+        if isinstance(value, list) and any(_values_equal(item, expected) for item in value):
+            return True
+    return False
+
+
+def _compare(value: Any, operator: str, operand: Any) -> bool:
+    if _type_rank(value) != _type_rank(operand):
+        return False
+    if operator == "$gt":
+        return value > operand
+    if operator == "$gte":
+        return value >= operand
+    if operator == "$lt":
+        return value < operand
+    return value <= operand
+
+
+def _type_rank(value: Any) -> int:
+    # BSON 비교 순서: null < number < string < object < array < ObjectId < bool < date
+    if value is None or value is _MISSING:
+        return 0
+    if isinstance(value, bool):
+        return 6
+    if isinstance(value, (int, float)):
+        return 1
+    if isinstance(value, str):
+        return 2
+    if isinstance(value, dict):
+        return 3
+    if isinstance(value, list):
+        return 4
+    if isinstance(value, ObjectId):
+        return 5
+    if isinstance(value, datetime):
+        return 7
+    return 8
+
+
+def _compare_sort_values(a: Any, b: Any) -> int:
+    rank_a, rank_b = _type_rank(a), _type_rank(b)
+    if rank_a != rank_b:
+        return -1 if rank_a < rank_b else 1
+    if rank_a in [0, 3, 4, 8]:
+        return 0
+    return (a > b) - (a < b)
+
+
+def sort_documents(docs: List[Dict[str, Any]], sort: Union[Dict[str, int], List[Tuple[str, int]]]) -> List[Dict[str, Any]]:
+    sort = list(sort.items()) if isinstance(sort, dict) else list(sort)
+
+    def compare(a: Dict[str, Any], b: Dict[str, Any]) -> int:
+        for field, direction in sort:
+            values_a, values_b = resolve_path(a, field), resolve_path(b, field)
+            result = _compare_sort_values(
+                values_a[0] if values_a else None,
+                values_b[0] if values_b else None
+            )
+            if result:
+                return result * (1 if direction >= 0 else -1)
+        return 0
+    return sorted(docs, key=functools.cmp_to_key(compare))
+
+
+def apply_projection(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not projection:
+        return copy.deepcopy(doc)
+
+    include_id = projection.get("_id", 1)
+    fields = {key: value for key, value in projection.items() if key != "_id"}
+    inclusion = any(
+        not (isinstance(value, (int, float, bool)) and not value)
+        for value in fields.values()
+    ) or (not fields and include_id)
+
+    if not inclusion:
+        result = copy.deepcopy(doc)
+        for field in fields:
+            unset_path(result, field)
+        if not include_id:
+            result.pop("_id", None)
+        return result
+
+    result = {}
+    if include_id and "_id" in doc:
+        result["_id"] = copy.deepcopy(doc["_id"])
+    for field, value in fields.items():
+        if isinstance(value, (int, float, bool)):
+            _include_path(doc, result, field.split("."))
+        else:
+            value = evaluate_expression(value, doc)
+            if value is not _MISSING:
+                set_path(result, field, value)
+    return result
+
+
+def _include_path(source: Any, target: Dict[str, Any], parts: List[str]):
+    head, rest = parts[0], parts[1:]
+    if not isinstance(source, dict) or head not in source:
+        return
+    value = source[head]
+    if not rest:
+        target[head] = copy.deepcopy(value)
+    elif isinstance(value, dict):
+        _include_path(value, target.setdefault(head, {}), rest)
+    elif isinstance(value, list):
+        existing = target.setdefault(head, [{} for _ in value])
+        for item, target_item in zip(value, existing):
+            if isinstance(item, dict):
+                _include_path(item, target_item, rest)
+
+
+def make_upsert_document(query: Dict[str, Any]) -> Dict[str, Any]:
+    """
+        upsert 시 query의 equality 조건으로 새 document의 기본값을 만듦
+    """
+    document = {}
+    for key, value in query.items():
+        if key.startswith("$"):
+            continue
+        if isinstance(value, dict) and value and all(k.startswith("$") for k in value):
+            if "$eq" in value:
+                set_path(document, key, copy.deepcopy(value["$eq"]))
+            continue
+        set_path(document, key, copy.deepcopy(value))
+    return document
+
+
+def apply_update(
+    doc: Dict[str, Any],
+    update_query: Union[Dict[str, Any], List[Dict[str, Any]]],
+    is_insert: bool
+) -> Dict[str, Any]:
+    doc = copy.deepcopy(doc)
+
+    # pipeline update
+    if isinstance(update_query, list):
+        for stage in update_query:
+            (operator, spec), = stage.items()
+            if operator in ["$set", "$addFields"]:
+                values = {field: evaluate_expression(expression, doc) for field, expression in spec.items()}
+                for field, value in values.items():
+                    if value is _MISSING:
+                        unset_path(doc, field)
+                    else:
+                        set_path(doc, field, value)
+            elif operator == "$unset":
+                for field in ([spec] if isinstance(spec, str) else spec):
+                    unset_path(doc, field)
+            elif operator == "$project":
+                doc = apply_projection(doc, spec)
+            else:
+                raise NotImplementedError(f"unsupported update stage: {operator}")
+        return doc
+
+    # replace_one / ReplaceOne: _id만 유지하고 document 전체를 교체
+    if "$replace" in update_query:
+        replacement = copy.deepcopy(update_query["$replace"])
+        if "_id" in doc:
+            replacement["_id"] = doc["_id"]
+        return replacement
+
+    for operator, spec in update_query.items():
+        if operator == "$set":
+            for field, value in spec.items():
+                set_path(doc, field, copy.deepcopy(value))
+        elif operator == "$setOnInsert":
+            if is_insert:
+                for field, value in spec.items():
+                    set_path(doc, field, copy.deepcopy(value))
+        elif operator == "$inc":
+            for field, value in spec.items():
+                set_path(doc, field, (get_path(doc, field) or 0) + value)
+        elif operator == "$unset":
+            for field in spec:
+                unset_path(doc, field)
+        elif operator == "$push":
+            for field, value in spec.items():
+                items = get_path(doc, field) or []
+                items = items + (value["$each"] if isinstance(value, dict) and "$each" in value else [value])
+                set_path(doc, field, items)
+        else:
+            raise NotImplementedError(f"unsupported update operator: {operator}")
+    return doc
+
+
+def evaluate_expression(expression: Any, doc: Dict[str, Any]) -> Any:
+    """
+        aggregation expression 평가 ($field 참조, $cond, $eq, $ne, $add, $ifNull 등)
+        - $$REMOVE는 _MISSING을 반환하고, $project / $set에서 해당 field를 만들지 않음
+    """
+    if expression == "$$REMOVE":
+        return _MISSING
+    if isinstance(expression, str) and expression.startswith("$"):
+        values = resolve_path(doc, expression[1:])
+        return values[0] if values else None
+    if isinstance(expression, list):
+        # array 안의 $$REMOVE는 null이 됨
+        return [_none_if_missing(evaluate_expression(item, doc)) for item in expression]
+    if not isinstance(expression, dict):
+        return expression
+    if len(expression) != 1 or not next(iter(expression)).startswith("$"):
+        values = {key: evaluate_expression(value, doc) for key, value in expression.items()}
+        return {key: value for key, value in values.items() if value is not _MISSING}
+
+    (operator, operand), = expression.items()
+    if operator == "$literal":
+        return operand
+    if operator == "$cond":
+        if isinstance(operand, list):
+            operand = {"if": operand[0], "then": operand[1], "else": operand[2]}
+        branch = "then" if _truthy(evaluate_expression(operand["if"], doc)) else "else"
+        return evaluate_expression(operand[branch], doc)
+    if operator == "$ifNull":
+        for item in operand:
+            value = evaluate_expression(item, doc)
+            if value is not None and value is not _MISSING:
+                return value
+        return None
+
+    args = evaluate_expression(operand if isinstance(operand, list) else [operand], doc)
+    if operator == "$eq":
+        return _values_equal(args[0], args[1])
+    if operator == "$ne":
+        return not _values_equal(args[0], args[1])
+    if operator in ["$gt", "$gte", "$lt", "$lte"]:
+        return _compare_sort_values(args[0], args[1]) in {
+            "$gt": [1], "$gte": [0, 1], "$lt": [-1], "$lte": [-1, 0]
+        }[operator]
+    if operator == "$add":
+        return sum(arg or 0 for arg in args)
+    if operator == "$subtract":
+        return (args[0] or 0) - (args[1] or 0)
+    if operator == "$multiply":
+        result = 1
+        for arg in args:
+            result *= arg or 0
+        return result
+    if operator == "$and":
+        return all(_truthy(arg) for arg in args)
+    if operator == "$or":
+        return any(_truthy(arg) for arg in args)
+    if operator == "$not":
+        return not _truthy(args[0])
+    if operator == "$in":
+        return args[0] in (args[1] or [])
+    if operator == "$size":
+        return len(args[0] or [])
+    raise NotImplementedError(f"unsupported expression operator: {operator}")
+
+
+def _none_if_missing(value: Any) -> Any:
+    return None if value is _MISSING else value
+
+
+def _truthy(value: Any) -> bool:
+    return value not in [None, False, 0] and value is not _MISSING
@@ -0,0 +1,176 @@
+import functools
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import random
+import time
+from typing import Any, Callable, Dict, Optional
+
+from chalicelib.setting import (MONGODB_EXPLAIN_SAMPLE_RATE,
+                                MONGODB_SLOW_QUERY_MS)
+from chalicelib.src.tools.metrics import put_metrics
+
+from ._identity import RequestScope, current_scope
+
+READ_OPERATIONS = ["get_document", "get_documents", "aggregate_documents", "count_documents"]
+
+# sampled explain은 query를 한 번 더 실행하므로 요청 밖(별도 thread 하나)에서 실행
+_explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+
+def instrumented(operation: str) -> Callable:
+    """
+        MongoDB method 실행 시간을 operation / collection 별로 기록
+        - 요청 안에서는 RequestScope에 모아두었다가 요청 종료 시 EMF로 기록
+        - MONGODB_SLOW_QUERY_MS를 넘으면 redact된 query shape와 함께 slow query 로그를 남김
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        # self를 제외한 positional 위치 (매 호출마다 signature.bind하지 않도록 미리 계산)
+        parameters = list(signature.parameters)
+        collection_index = parameters.index("collection") - 1 if "collection" in parameters else None
+
+        def record(self, started: float, args: tuple, kwargs: dict):
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            collection = kwargs.get("collection")
+            if collection is None and collection_index is not None and collection_index < len(args):
+                collection = args[collection_index]
+
+            scope = current_scope()
+            if scope:
+                scope.record_timing(operation, collection, elapsed_ms)
+            if elapsed_ms >= MONGODB_SLOW_QUERY_MS:
+                # 전체 인자는 slow query일 때만 필요
+                arguments = signature.bind(self, *args, **kwargs).arguments
+                _log_slow_query(self, scope, operation, collection, elapsed_ms, arguments)
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                record(self, started, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def flush_query_metrics(scope: RequestScope):
+    for (operation, collection), (count, total_ms, max_ms) in scope.timings.items():
+        put_metrics(
+            metrics={
+                "QueryCount": (count, "Count"),
+                "QueryTime": (round(total_ms, 2), "Milliseconds"),
+                "QueryMaxTime": (round(max_ms, 2), "Milliseconds"),
+            },
+            dimensions={
+                "route": scope.route or "-",
+                "operation": operation,
+                "collection": collection or "-",
+            }
+        )
+    for collection, count in scope.identity_hits.items():
+        put_metrics(
+            metrics={"IdentityHit": (count, "Count")},
+            dimensions={
+                "route": scope.route or "-",
+                "operation": "identity_hit",
+                "collection": collection,
+            }
+        )
+
+
+RequestScope.close_hooks.append(flush_query_metrics)
+
+
+def redact(value: Any) -> Any:
+    """
+        query의 구조(field, operator)만 남기고 값은 제거
+    """
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(value[0])] if value else []
+    return "?"
+
+
+def _log_slow_query(
+    db: Any,
+    scope: Optional[RequestScope],
+    operation: str,
+    collection: str,
+    elapsed_ms: float,
+    arguments: Dict[str, Any]
+):
+    log = {
+        "type": "slow_query",
+        "route": scope.route if scope else None,
+        "operation": operation,
+        "collection": collection,
+        "elapsed_ms": round(elapsed_ms, 2),
+        "query": redact(arguments.get("query")),
+        "sort": redact(arguments.get("sort")),
+        "pipelines": redact(arguments.get("pipelines")),
+    }
+    logging.warning(json.dumps(log, default=str))
+
+    if (
+        operation in READ_OPERATIONS
+        and MONGODB_EXPLAIN_SAMPLE_RATE
+        and random.random() < MONGODB_EXPLAIN_SAMPLE_RATE
+    ):
+        # explain 결과는 같은 route / operation / collection으로 별도 로그를 남김
+        _explain_executor.submit(_log_explain, db, {key: log[key] for key in ["route", "operation", "collection"]}, arguments)
+
+
+def _log_explain(db: Any, log: Dict[str, Any], arguments: Dict[str, Any]):
+    if explain := _sample_explain(db, log["operation"], log["collection"], arguments):
+        logging.warning(json.dumps({"type": "slow_query_explain", **log, "explain": explain}, default=str))
+
+
+def _sample_explain(db: Any, operation: str, collection: str, arguments: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    try:
+        if operation == "aggregate_documents":
+            explain = db.explain_aggregate(
+                collection=collection,
+                pipelines=arguments["pipelines"],
+                verbosity="executionStats"
+            )
+        else:
+            explain = db.explain_query(
+                collection=collection,
+                query=arguments["query"],
+                sort=arguments.get("sort"),
+                verbosity="executionStats"
+            )
+    except Exception as e:
+        logging.error(f"explain failed: {e}")
+        return None
+
+    if stats := _find_execution_stats(explain):
+        return {
+            "docs_examined": stats.get("totalDocsExamined"),
+            "keys_examined": stats.get("totalKeysExamined"),
+            "returned": stats.get("nReturned"),
+            "execution_ms": stats.get("executionTimeMillis"),
+        }
+    return None
+
+
+def _find_execution_stats(explain: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(explain, dict):
+        if isinstance(explain.get("executionStats"), dict):
+            return explain["executionStats"]
+        items = explain.values()
+    elif isinstance(explain, list):
+        items = explain
+    else:
+        return None
+
+    for item in items:
+        if stats := _find_execution_stats(item):
+            return stats
+    return None
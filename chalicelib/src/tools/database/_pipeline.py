@@ -0,0 +1,40 @@
+from typing import Any, Dict, List, Union
+
+
+class Param:
+    """
+        PipelineTemplate에서 요청마다 채워지는 stage
+        - Param("match", "$match") => bind(match=query) 시 {"$match": query}
+    """
+
+    def __init__(self, name: str, operator: str):
+        self.name = name
+        self.operator = operator
+
+    def __repr__(self) -> str:
+        return f"Param({self.name!r}, {self.operator!r})"
+
+
+class PipelineTemplate:
+    """
+        aggregation pipeline template
+        - static stage는 import 시점에 한 번만 만들어두고, bind() 시에는 Param stage만 채움
+        - static stage dict는 모든 요청이 공유하므로 bind() 결과를 수정하면 안 됨
+    """
+
+    def __init__(self, stages: List[Union[Dict[str, Any], Param]]):
+        self._stages = stages
+        self.params = [stage.name for stage in stages if isinstance(stage, Param)]
+
+    @property
+    def stages(self) -> List[Union[Dict[str, Any], Param]]:
+        return list(self._stages)
+
+    def bind(self, **params: Any) -> List[Dict[str, Any]]:
+        if missing := set(self.params) - set(params):
+            raise ValueError(f"missing pipeline params: {sorted(missing)}")
+
+        return [
+            {stage.operator: params[stage.name]} if isinstance(stage, Param) else stage
+            for stage in self._stages
+        ]
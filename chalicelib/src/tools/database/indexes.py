@@ -0,0 +1,234 @@
+"""
+    MongoDB index registry
+
+    - INDEXES: collection 별로 서비스가 필요로 하는 index 선언
+    - QUERY_SHAPES: 서비스가 실제로 사용하는 query / pipeline 형태 (서비스의 query / pipeline 생성 함수로 만듦)
+    - ensure: 선언된 index 생성 (이미 있으면 무시)
+    - check: 각 query shape를 explain으로 돌려서 COLLSCAN / in-memory SORT가 있으면 실패
+
+    python -m chalicelib.src.tools.database.indexes ensure
+    python -m chalicelib.src.tools.database.indexes check
+"""
+import logging
+import sys
+from typing import Any, Dict, Iterator, List
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from chalicelib.src.constants.common import COLLECTION, STATUS
+from chalicelib.src.utils import encode_cursor
+from chalicelib.src.v1_3.users.pipeline import (REACTION_FILTERS,
+                                                make_comment_query,
+                                                make_cursor_page_pipeline,
+                                                make_reaction_query,
+                                                make_skip_page_pipeline)
+from chalicelib.src.v1_3.wines import pipeline as wine_pipeline
+from chalicelib.src.v1_3.wines.projector import (WineDetailProjector,
+                                                  make_view_query)
+
+
+INDEXES: Dict[COLLECTION, List[IndexModel]] = {
+    COLLECTION.TOKEN: [
+        IndexModel([("access_token", ASCENDING), ("status", ASCENDING)], name="access_token_status"),
+        IndexModel([("user", ASCENDING)], name="user"),
+    ],
+    COLLECTION.INTERACTION: [
+        IndexModel([("user", ASCENDING), ("item", ASCENDING), ("item_type", ASCENDING)], name="user_item_item_type"),
+        IndexModel([("user", ASCENDING), ("item_type", ASCENDING), ("like", ASCENDING), ("_id", DESCENDING)], name="user_item_type_like_id"),
+        IndexModel([("user", ASCENDING), ("item_type", ASCENDING), ("bookmark", ASCENDING), ("_id", DESCENDING)], name="user_item_type_bookmark_id"),
+    ],
+    COLLECTION.COMMENT: [
+        IndexModel([("user", ASCENDING), ("status", ASCENDING), ("_id", DESCENDING)], name="user_status_id"),
+    ],
+    COLLECTION.WINE: [
+        IndexModel([("slug", ASCENDING), ("is_default", ASCENDING), ("status", ASCENDING)], name="slug_is_default_status"),
+        IndexModel([("redirections", ASCENDING)], name="redirections"),
+    ],
+    COLLECTION.CRITIC_REVIEW: [
+        IndexModel([("wine._id", ASCENDING), ("status", ASCENDING)], name="wine_id_status"),
+        IndexModel([("critic._id", ASCENDING)], name="critic_id"),
+    ],
+    COLLECTION.WINE_RESOLUTION: [
+        IndexModel([("wine", ASCENDING)], name="wine"),
+    ],
+    COLLECTION.WINE_VINTAGE: [
+        IndexModel([("vintages._id", ASCENDING)], name="vintages_id"),
+    ],
+    COLLECTION.WINE_DETAIL_VIEW: [
+        IndexModel([("_view.slug", ASCENDING), ("_view.is_default", ASCENDING), ("_view.status", ASCENDING)], name="view_slug_is_default_status"),
+        IndexModel([("_view.references", ASCENDING)], name="view_references"),
+    ],
+}
+
+def _make_service_shapes() -> List[Dict[str, Any]]:
+    """
+        서비스가 query / pipeline을 만드는 함수에 빈 값을 넣어서 shape를 만듦 (서비스와 같은 함수를 사용하므로 따로 맞출 필요 없음)
+    """
+    cursor = encode_cursor(ObjectId())
+    lookup = {"from": COLLECTION.WINE.value, "localField": "item", "foreignField": "_id", "as": "item"}
+    list_queries = {
+        f"UserService.get_wine_reactions({action})": (COLLECTION.INTERACTION, make_reaction_query("", "wine", action))
+        for action in REACTION_FILTERS
+    }
+    list_queries["UserService.get_article_reactions(like)"] = (COLLECTION.INTERACTION, make_reaction_query("", "article", "like"))
+    list_queries["UserService.get_comments"] = (COLLECTION.COMMENT, make_comment_query(""))
+
+    shapes = [
+        {
+            "name": "WineService.get_reaction",
+            "collection": COLLECTION.INTERACTION,
+            "query": wine_pipeline.make_reaction_query("", ""),
+        },
+        {
+            "name": "WineService._fetch_data_detail(slug)",
+            "collection": COLLECTION.WINE,
+            "query": wine_pipeline.make_detail_query("", is_slug=True),
+        },
+        {
+            "name": "WineService._fetch_redirect_slug(id)",
+            "collection": COLLECTION.WINE,
+            "query": wine_pipeline.make_redirect_query("-nv", is_slug=False),
+        },
+        {
+            "name": "WineService._fetch_redirect_slug(slug)",
+            "collection": COLLECTION.WINE,
+            "query": wine_pipeline.make_redirect_query("", is_slug=True),
+        },
+        {
+            "name": "WineService._fetch_data_detail(join_reviews)",
+            "collection": COLLECTION.CRITIC_REVIEW,
+            "query": {
+                wine_pipeline.JOIN_REVIEWS_WITHOUT_CRITIC["foreignField"]: "",
+                **wine_pipeline.JOIN_REVIEWS_WITHOUT_CRITIC["pipeline"][0]["$match"],
+            },
+        },
+        {
+            "name": "get_view_document(slug)",
+            "collection": COLLECTION.WINE_DETAIL_VIEW,
+            "query": make_view_query("", is_slug=True),
+        },
+    ]
+    # view 생성 시 중첩 $lookup이 있는 join 대상은 foreignField로 다시 읽음
+    shapes.extend(
+        {
+            "name": f"WineDetailProjector._collect_references({lookup['from']})",
+            "collection": COLLECTION(lookup["from"]),
+            "query": {lookup["foreignField"]: {"$in": [""]}},
+        }
+        for lookup in WineDetailProjector._iter_all_lookups()
+        if lookup["foreignField"] != "_id" and any("$lookup" in stage for stage in lookup.get("pipeline", []))
+    )
+    for name, (collection, query) in list_queries.items():
+        shapes.append({
+            "name": name,
+            "collection": collection,
+            "pipeline": make_skip_page_pipeline(query, {"_id": 1}, lookup, page=1, size=20),
+        })
+        shapes.append({
+            "name": f"{name}(cursor)",
+            "collection": collection,
+            "pipeline": make_cursor_page_pipeline(query, {"_id": 1}, lookup, cursor=cursor, size=20),
+        })
+    return shapes
+
+
+# 단일 조건 조회 (인증 / projector / 집계 갱신용, tests/test_indexes.py에서 실제 query와 비교)
+QUERY_SHAPES: List[Dict[str, Any]] = [
+    {
+        "name": "Authorizer.find_refresh_token",
+        "collection": COLLECTION.TOKEN,
+        "query": {"access_token": "", "status": STATUS.PUBLISHED.value},
+    },
+    {
+        "name": "WineDetailProjector.handle_change",
+        "collection": COLLECTION.WINE_DETAIL_VIEW,
+        "query": {"_view.references": {"$in": [""]}},
+    },
+    {
+        "name": "WineResolver.sync_wine",
+        "collection": COLLECTION.WINE_RESOLUTION,
+        "query": {"wine": ""},
+    },
+    {
+        "name": "WineVintageIndex.sync_wine",
+        "collection": COLLECTION.WINE_VINTAGE,
+        "query": {"vintages._id": ""},
+    },
+    {
+        "name": "WineVintageIndex.get(fallback)",
+        "collection": COLLECTION.WINE,
+        "query": {"slug": ""},
+    },
+    {
+        "name": "CriticReviewStats.sync_critic",
+        "collection": COLLECTION.CRITIC_REVIEW,
+        "query": {"critic._id": ""},
+    },
+    *_make_service_shapes(),
+]
+
+REJECTED_STAGES = {"COLLSCAN", "SORT"}
+
+
+def ensure_indexes(db) -> Dict[str, List[str]]:
+    """
+        선언된 index를 생성함 (같은 spec이 이미 있으면 MongoDB가 무시하므로 여러 번 실행해도 안전)
+    """
+    created = {}
+    for collection, indexes in INDEXES.items():
+        created[collection.value] = db.create_indexes(collection=collection.value, indexes=indexes)
+        logging.info(f"ensure indexes: {collection.value} {created[collection.value]}")
+    return created
+
+
+def check_query_shapes(db) -> List[Dict[str, Any]]:
+    """
+        각 query shape의 실행 계획에서 COLLSCAN / in-memory SORT를 찾아 반환
+    """
+    violations = []
+    for shape in QUERY_SHAPES:
+        collection = shape["collection"].value
+        if "pipeline" in shape:
+            explain = db.explain_aggregate(collection=collection, pipelines=shape["pipeline"])
+        else:
+            explain = db.explain_query(collection=collection, query=shape["query"], sort=shape.get("sort"))
+
+        stages = set(_iter_plan_stages(explain)) & REJECTED_STAGES
+        if stages:
+            violations.append({"name": shape["name"], "collection": collection, "stages": sorted(stages)})
+    return violations
+
+
+def _iter_plan_stages(explain: Any, in_plan: bool = False) -> Iterator[str]:
+    if isinstance(explain, list):
+        for item in explain:
+            yield from _iter_plan_stages(item, in_plan)
+    elif isinstance(explain, dict):
+        for key, value in explain.items():
+            if key == "stage" and in_plan and isinstance(value, str):
+                yield value
+            elif key == "$sort":
+                # pipeline의 $sort가 cursor로 내려가지 못하면 별도 stage로 남음
+                yield "SORT"
+            elif key in ["winningPlan", "queryPlan"]:
+                yield from _iter_plan_stages(value, True)
+            elif key not in ["rejectedPlans", "command", "originalCommand", "parsedQuery"]:
+                yield from _iter_plan_stages(value, in_plan)
+
+
+if __name__ == "__main__":
+    from chalicelib.src.tools.database import mongodb_obj
+
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    if command == "ensure":
+        ensure_indexes(mongodb_obj)
+    elif command == "check":
+        if violations := check_query_shapes(mongodb_obj):
+            for violation in violations:
+                logging.error(f"uncovered query shape: {violation}")
+            sys.exit(1)
+        logging.info(f"all {len(QUERY_SHAPES)} query shapes are covered by indexes")
+    else:
+        sys.exit(f"unknown command: {command}")
@@ -0,0 +1,192 @@
+"""
+    price history engine
+
+    - global_history_price의 가격을 배열(timestamp / 통화 / 값 / 현지 여부)로 한 번에 올림
+    - 통화 변환은 통화별 환율 배열로 한 번에 곱함
+    - global_history_price_packed: 국가별 packed binary (int32 timestamp / float32 값 / 통화 코드 한 번)
+      dict를 만들지 않고 np.frombuffer로 바로 배열로 올림
+    - 달력 기준 월 단위 bucket (1개월 / 2개월 / 4개월)으로 전체 평균 / 현지 평균을 계산
+      (월별 합계를 np.add.reduceat으로 먼저 만들고, 그 합계를 다시 bucket 단위로 묶음)
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# (bucket 하나의 개월 수, 현재 월부터 거슬러 올라가는 개월 수)
+# option1: 6개월 / 1개월 간격, option2: 12개월 / 2개월 간격, option3: 24개월 / 4개월 간격
+HISTORY_BUCKETS = [(1, 6), (2, 12), (4, 24)]
+
+PACKED_TIMESTAMP_DTYPE = np.dtype("<i4")
+PACKED_VALUE_DTYPE = np.dtype("<f4")
+
+
+def pack_history_price(history_price: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+        global_history_price -> global_history_price_packed
+        {
+            united-states: {
+                currency: STRING,
+                timestamps: BINARY (int32 little endian, timestamp 순),
+                values: BINARY (float32 little endian)
+            }
+        }
+        - 한 국가 안에 통화가 섞여 있으면 통화 코드를 한 번만 저장할 수 없으므로 ValueError
+    """
+    packed = {}
+    for country, price_info in history_price.items():
+        items = sorted(price_info["items"], key=lambda price: price["timestamp"])
+        if not items:
+            continue
+        currencies = {price["currency"] for price in items}
+        if len(currencies) > 1:
+            raise ValueError(f"mixed currencies in {country}: {sorted(currencies)}")
+        packed[country] = {
+            "currency": currencies.pop(),
+            "timestamps": np.asarray([price["timestamp"] for price in items], dtype=PACKED_TIMESTAMP_DTYPE).tobytes(),
+            "values": np.asarray([price["value"] for price in items], dtype=PACKED_VALUE_DTYPE).tobytes(),
+        }
+    return packed
+
+
+def to_month_index(timestamps: np.ndarray) -> np.ndarray:
+    """
+        timestamp(초) -> 1970-01부터 센 월 번호
+    """
+    return timestamps.astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+
+
+def from_month_index(months: np.ndarray) -> np.ndarray:
+    """
+        월 번호 -> 해당 월 1일 00:00 (UTC) timestamp
+    """
+    return months.astype("datetime64[M]").astype("datetime64[s]").astype(np.int64)
+
+
+class PriceHistory:
+    """
+        timestamp 순으로 정렬된 가격 배열
+        - values: 요청 통화로 변환된 값
+        - is_local: 현지 국가의 가격인지 여부
+    """
+
+    def __init__(self, timestamps: np.ndarray, values: np.ndarray, is_local: np.ndarray):
+        order = np.argsort(timestamps, kind="stable")
+        self.timestamps = timestamps[order]
+        self.values = values[order]
+        self.is_local = is_local[order]
+        self._monthly = None
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def from_document(
+        cls,
+        history_price: Dict[str, Any],
+        local_country: str,
+        currency_rate: Callable[[List[str]], np.ndarray],
+    ) -> "PriceHistory":
+        """
+            history_price: {
+                united-states: {
+                    items: [{timestamp: INTEGER, currency: STRING, value: FLOAT}]
+                }
+            }
+            currency_rate: 통화 코드 목록 -> 요청 통화로 바꾸는 배율 배열
+        """
+        points = [
+            (price["timestamp"], price["currency"], price["value"], country == local_country)
+            for country, price_info in history_price.items()
+            for price in price_info["items"]
+        ]
+        if not points:
+            return cls(np.empty(0, np.int64), np.empty(0, np.float64), np.empty(0, bool))
+
+        timestamps, currencies, values, is_local = zip(*points)
+        codes, inverse = np.unique(np.asarray(currencies, dtype=str), return_inverse=True)
+        return cls(
+            timestamps=np.asarray(timestamps, dtype=np.int64),
+            values=np.asarray(values, dtype=np.float64) * currency_rate(codes.tolist())[inverse],
+            is_local=np.asarray(is_local, dtype=bool),
+        )
+
+    @classmethod
+    def from_packed(
+        cls,
+        packed: Dict[str, Dict[str, Any]],
+        local_country: str,
+        currency_rate: Callable[[List[str]], np.ndarray],
+    ) -> "PriceHistory":
+        """
+            global_history_price_packed (pack_history_price 참고)를 바로 배열로 올림
+        """
+        series = [
+            (
+                country,
+                np.frombuffer(price_info["timestamps"], dtype=PACKED_TIMESTAMP_DTYPE),
+                np.frombuffer(price_info["values"], dtype=PACKED_VALUE_DTYPE),
+            )
+            for country, price_info in packed.items()
+        ]
+        if not series:
+            return cls(np.empty(0, np.int64), np.empty(0, np.float64), np.empty(0, bool))
+
+        rates = currency_rate([price_info["currency"] for price_info in packed.values()])
+        return cls(
+            timestamps=np.concatenate([timestamps for _, timestamps, _ in series]).astype(np.int64),
+            values=np.concatenate([values.astype(np.float64) * rate for (_, _, values), rate in zip(series, rates)]),
+            is_local=np.concatenate([np.full(len(timestamps), country == local_country) for country, timestamps, _ in series]),
+        )
+
+    def monthly(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+            월별 (월 번호, 전체 합계, 전체 개수, 현지 합계, 현지 개수)
+            - bucket 크기와 무관하므로 한 번만 계산
+        """
+        if self._monthly is not None:
+            return self._monthly
+
+        months = to_month_index(self.timestamps)
+        starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+        local_values = np.where(self.is_local, self.values, 0.0)
+        self._monthly = (
+            months[starts],
+            np.add.reduceat(self.values, starts),
+            np.diff(np.r_[starts, len(months)]),
+            np.add.reduceat(local_values, starts),
+            np.add.reduceat(self.is_local.astype(np.int64), starts),
+        )
+        return self._monthly
+
+    def downsample(self, width: int, span: int, now: int) -> List[Tuple[int, float, Optional[float]]]:
+        """
+            현재 월을 포함한 최근 span개월을 width개월 단위로 묶은 평균
+            - bucket은 1970-01부터 width개월씩 자른 달력 구간 (2개월: 1-2월, 3-4월 ...)
+            - 반환: [(bucket 시작 timestamp, 전체 평균, 현지 평균 또는 None)]
+        """
+        if not len(self):
+            return []
+        months, total, count, local_total, local_count = self.monthly()
+
+        current = to_month_index(np.asarray([now], dtype=np.int64))[0]
+        buckets = months // width
+        selected = (buckets > (current - span) // width) & (buckets <= current // width)
+        if not selected.any():
+            return []
+
+        buckets = buckets[selected]
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        global_avg = np.add.reduceat(total[selected], starts) / np.add.reduceat(count[selected], starts)
+        local_sum = np.add.reduceat(local_total[selected], starts)
+        local_cnt = np.add.reduceat(local_count[selected], starts)
+        local_avg = np.divide(local_sum, local_cnt, out=np.full(len(starts), np.nan), where=local_cnt > 0)
+
+        return [
+            (int(timestamp), round(float(global_value), 1), None if np.isnan(local_value) else round(float(local_value), 1))
+            for timestamp, global_value, local_value in zip(
+                from_month_index(buckets[starts] * width),
+                global_avg,
+                local_avg,
+            )
+        ]
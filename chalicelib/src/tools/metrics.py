@@ -0,0 +1,36 @@
+import json
+import time
+from typing import Any, Dict, Tuple
+
+from chalicelib.setting import METRICS_NAMESPACE, STAGE
+
+
+def put_metrics(
+    metrics: Dict[str, Tuple[float, str]],
+    dimensions: Dict[str, str],
+    properties: Dict[str, Any] = {}
+):
+    """
+        CloudWatch Embedded Metric Format(EMF)로 metric 기록
+        - Lambda의 stdout은 CloudWatch Logs로 전달되고, EMF 형식의 로그는 metric으로 추출됨
+        - metrics: {name: (value, unit)}
+    """
+    dimensions = {"stage": STAGE, **dimensions}
+    print(json.dumps({
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": METRICS_NAMESPACE,
+                    "Dimensions": [list(dimensions.keys())],
+                    "Metrics": [
+                        {"Name": name, "Unit": unit}
+                        for name, (_, unit) in metrics.items()
+                    ]
+                }
+            ]
+        },
+        **dimensions,
+        **properties,
+        **{name: value for name, (value, _) in metrics.items()},
+    }, default=str))
@@ -1,34 +1,195 @@
-from typing import Any, Dict, List, Tuple
+"""
+    price processor
 
+    - currency / country 기준 데이터는 PriceReference snapshot 하나로 묶어서 컨테이너에 올림
+    - TTL이 지나면 읽기 경로는 기존 snapshot을 그대로 쓰고, background thread가 새 snapshot을 만든 뒤 통째로 교체
+      (내용이 같으면 교체하지 않으므로 version이 바뀌지 않음)
+    - PRICE_REFERENCE_SNAPSHOT 파일이 있으면 cold start 시 DB 대신 파일로 먼저 올림
+    - 요청 안에서는 처음 읽은 snapshot을 요청이 끝날 때까지 계속 사용
+      (교체 전후 snapshot이 섞이면 통화 순번이 달라져 다른 환율이 적용될 수 있음)
+
+    python -m chalicelib.src.tools.processor snapshot PATH
+"""
+import hashlib
+import logging
+import os
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from bson import json_util
+
+from chalicelib.setting import (PRICE_REFERENCE_SNAPSHOT,
+                                PRICE_REFERENCE_TTL_SECONDS)
 from chalicelib.src.constants.common import COLLECTION
-from chalicelib.src.tools.database import mongodb_obj
+from chalicelib.src.tools.database import RequestScope, current_scope, mongodb_obj
+from chalicelib.src.utils import get_now_timestamp
 from chalicelib.src.validators.field import Market, MarketPrice
 
 
-class PriceProcessor:
-    country_map = None
-    currency_map = None
-    
-    def __init__(self):
-        if not self.currency_map:
-            # initialize currency map if not already initialized
-            PriceProcessor.currency_map = self._initialize_currency_map()
-        if not self.country_map:
-            # initialize country map if not already initialized
-            PriceProcessor.country_map = self._initialise_country_map()
-    
-    def _initialize_currency_map(self):
-        currencies = self._fetch_currency_from_db()
-        return {
-            currency["code"]: currency for currency in currencies
-        }
-    
-    def _initialise_country_map(self):
-        countries = self._fetch_country_from_db()
-        return {
+class PriceReference:
+    """
+        currency / country 기준 데이터 snapshot (만든 뒤에는 바꾸지 않음)
+        - version: currencies / countries 내용의 hash
+        - created_at: DB에서 읽은 시각 (파일에서 올린 경우 파일을 만든 시각)
+    """
+
+    def __init__(
+        self,
+        currencies: List[Dict[str, Any]],
+        countries: List[Dict[str, Any]],
+        created_at: Optional[int] = None
+    ):
+        self.currencies = currencies
+        self.countries = countries
+        self.created_at = created_at or get_now_timestamp()
+        self.version = self.make_version(currencies, countries)
+
+        self.currency_map = {currency["code"]: currency for currency in currencies}
+        self.country_map = {
             **{country["_id"]: country for country in countries},
             **{country["alpha_2"]: country for country in countries},
         }
+        # currency code -> ordinal, rate_matrix[source ordinal, target ordinal] = source 1단위의 target 값
+        self.currency_index, self.rate_matrix = self._make_rate_matrix(self.currency_map)
+
+    @staticmethod
+    def make_version(currencies: List[Dict[str, Any]], countries: List[Dict[str, Any]]) -> str:
+        content = json_util.dumps([
+            sorted(currencies, key=lambda currency: currency["code"]),
+            sorted(countries, key=lambda country: country["_id"]),
+        ], sort_keys=True)
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()[:12]
+
+    @staticmethod
+    def _make_rate_matrix(currency_map: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, int], np.ndarray]:
+        """
+            USD를 거치는 환율(to: USD로, from: USD에서)을 통화 쌍별로 미리 곱해 둔 교차 환율 행렬
+        """
+        codes = sorted({"USD", *currency_map})
+        to_usd = np.asarray([1.0 if code == "USD" else currency_map[code]["to"] for code in codes], dtype=np.float64)
+        from_usd = np.asarray([1.0 if code == "USD" else currency_map[code]["from"] for code in codes], dtype=np.float64)
+        return {code: idx for idx, code in enumerate(codes)}, np.outer(to_usd, from_usd)
+
+    @classmethod
+    def load(cls, path: str) -> "PriceReference":
+        with open(path, "r") as f:
+            snapshot = json_util.loads(f.read())
+        return cls(
+            currencies=snapshot["currencies"],
+            countries=snapshot["countries"],
+            created_at=snapshot["created_at"]
+        )
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            f.write(json_util.dumps({
+                "version": self.version,
+                "created_at": self.created_at,
+                "currencies": self.currencies,
+                "countries": self.countries,
+            }, indent=2, ensure_ascii=False))
+
+
+# 요청 안에서 사용 중인 (request scope, snapshot)
+_REQUEST_REFERENCE: ContextVar[Optional[Tuple[RequestScope, PriceReference]]] = ContextVar("price_reference", default=None)
+
+
+class PriceProcessor:
+    _reference: Optional[PriceReference] = None
+    _refresh_lock = threading.Lock()
+    _refresh_at = 0.0
+    ttl_seconds = PRICE_REFERENCE_TTL_SECONDS
+    
+    def __init__(self):
+        if PriceProcessor._reference is None:
+            with PriceProcessor._refresh_lock:
+                if PriceProcessor._reference is None:
+                    # initialize reference if not already initialized
+                    PriceProcessor._reference = self._bootstrap_reference()
+
+    @property
+    def price_reference(self) -> PriceReference:
+        """
+            현재 snapshot (TTL이 지났으면 background refresh만 시작하고 기존 snapshot을 바로 반환)
+        - 요청 안에서는 그 요청에서 처음 반환한 snapshot을 계속 반환
+        """
+        scope = current_scope()
+        if scope is not None and (pinned := _REQUEST_REFERENCE.get()) is not None and pinned[0] is scope:
+            return pinned[1]
+
+        reference = PriceProcessor._reference
+        if time.monotonic() >= PriceProcessor._refresh_at:
+            self._schedule_refresh()
+        if scope is not None:
+            _REQUEST_REFERENCE.set((scope, reference))
+        return reference
+
+    @property
+    def currency_map(self) -> Dict[str, Dict[str, Any]]:
+        return self.price_reference.currency_map
+
+    @property
+    def country_map(self) -> Dict[str, Dict[str, Any]]:
+        return self.price_reference.country_map
+
+    @property
+    def currency_index(self) -> Dict[str, int]:
+        return self.price_reference.currency_index
+
+    @property
+    def rate_matrix(self) -> np.ndarray:
+        return self.price_reference.rate_matrix
+
+    @classmethod
+    def _bootstrap_reference(cls) -> PriceReference:
+        """
+            snapshot 파일이 있으면 파일로, 없으면 DB에서 읽음
+            (파일로 올린 경우 파일의 created_at 기준으로 TTL이 지나면 DB에서 다시 읽음)
+        """
+        if PRICE_REFERENCE_SNAPSHOT and os.path.exists(PRICE_REFERENCE_SNAPSHOT):
+            try:
+                reference = PriceReference.load(PRICE_REFERENCE_SNAPSHOT)
+                age = max(0, get_now_timestamp() - reference.created_at)
+                PriceProcessor._refresh_at = time.monotonic() + max(0.0, cls.ttl_seconds - age)
+                return reference
+            except Exception:
+                logging.exception(f"failed to load price reference snapshot: {PRICE_REFERENCE_SNAPSHOT}")
+
+        PriceProcessor._refresh_at = time.monotonic() + cls.ttl_seconds
+        return cls._load_reference()
+
+    @classmethod
+    def _schedule_refresh(cls):
+        with cls._refresh_lock:
+            if time.monotonic() < PriceProcessor._refresh_at:
+                return
+            # refresh가 실패해도 다음 TTL까지는 다시 시도하지 않음
+            PriceProcessor._refresh_at = time.monotonic() + cls.ttl_seconds
+        threading.Thread(target=cls.refresh, name="price-reference-refresh", daemon=True).start()
+
+    @classmethod
+    def refresh(cls) -> PriceReference:
+        """
+            DB에서 새 snapshot을 만들어 교체 (실패하면 기존 snapshot 유지)
+        """
+        try:
+            reference = cls._load_reference()
+            if PriceProcessor._reference is None or reference.version != PriceProcessor._reference.version:
+                PriceProcessor._reference = reference
+        except Exception:
+            logging.exception("failed to refresh price reference")
+        return PriceProcessor._reference
+
+    @classmethod
+    def _load_reference(cls) -> PriceReference:
+        return PriceReference(
+            currencies=list(cls._fetch_currency_from_db()),
+            countries=list(cls._fetch_country_from_db())
+        )
     
     @staticmethod
     def _fetch_currency_from_db():
@@ -87,8 +248,77 @@ class PriceProcessor:
                 ]
             }
         """
-        prices = self.select_local_prices(location=location, price=price)
-        return self.to_string(prices=prices)
+        return self.make_price_strings(location=location, prices=[price])[0]
+
+    def make_price_strings(self, location: str, prices: List[Optional[Dict[str, Any]]]) -> List[str]:
+        """
+            목록 페이지 와인들의 global_market_price를 한 번에 가격 문자열로 (make_price_string 참고)
+            - 현지 국가 가격이 있으면 현지 가격, 없으면 전체 국가 가격 중 최저가
+            - MarketPrice를 만들지 않고 (와인 순번, 값, 통화) 배열로 한 번에 환산해서 최저가만 구함
+            - 결과는 MarketPrice로 검증하는 select_local_prices + to_string과 같음
+        """
+        reference = self.price_reference
+        country_id, currency = self._check_country_and_currency(location, reference=reference)
+        if currency not in reference.currency_index:
+            return [""] * len(prices)
+
+        owners, values, currencies = [], [], []
+        for idx, price in enumerate(prices):
+            if not price:
+                continue
+            for country, offers in ({country_id: price[country_id]} if price.get(country_id) else price).items():
+                if country not in reference.country_map:
+                    continue
+                for offer in offers:
+                    if self._is_valid_offer(offer, country=country, currency=currency, reference=reference):
+                        owners.append(idx)
+                        values.append(offer["value"])
+                        currencies.append(offer["currency"])
+        if not owners:
+            return [""] * len(prices)
+
+        converted = self.convert_values(values=values, currencies=currencies, currency=currency, reference=reference)
+        owners = np.asarray(owners)
+        minimum = np.full(len(prices), np.inf)
+        np.minimum.at(minimum, owners[converted > 0], converted[converted > 0])
+
+        symbol = reference.currency_map[currency]["symbol"]
+        return ["{} {:,}".format(symbol, int(round(value, 1))) if np.isfinite(value) else "" for value in minimum.tolist()]
+
+    def _is_valid_offer(self, offer: Dict[str, Any], country: str, currency: str, reference: PriceReference) -> bool:
+        """
+            MarketPrice로 변환할 수 있는 가격인지 (값 > 0은 환산 후 확인)
+            - 흔한 형태(int 병 수, bool 경매 여부, http 주소, 3자 이하 통화 기호 등)는 pydantic 없이 바로 확인
+            - 그 밖의 값(1.0 / "1" 병 수, 1 / "true" 경매 여부 등)은 MarketPrice를 직접 만들어서 pydantic의 변환 규칙을 그대로 따름
+        """
+        if not (
+            isinstance(offer, dict)
+            and offer.get("currency") in reference.currency_index
+            and isinstance(offer.get("value"), (int, float))
+        ):
+            return False
+
+        market = offer.get("market")
+        original_price = offer.get("original_price")
+        symbol = reference.currency_map[currency]["symbol"]
+        alpha_2 = reference.country_map[country]["alpha_2"]
+        if (
+            isinstance(original_price, dict)
+            and type(original_price.get("bottle_count")) is int and original_price["bottle_count"] > 0
+            and isinstance(market, dict)
+            and type(market.get("name")) is str
+            and type(href := market.get("href", market.get("url"))) is str and href.startswith("http")
+            and type(market.get("isAuction", market.get("is_auction"))) is bool
+            and type(symbol) is str and 1 <= len(symbol) <= 3
+            and type(alpha_2) is str and len(alpha_2) == 2
+            and len(currency) == 3
+        ):
+            return True
+        try:
+            self._make_market_price(country=country, currency=currency, price=offer, value=1.0, reference=reference)
+        except Exception:
+            return False
+        return True
     
     def select_local_prices(self, location: str, price: Dict[str, Any]) -> List[MarketPrice]:
         """
@@ -162,20 +392,30 @@ class PriceProcessor:
             }
         """
         
-        if not price:
+        reference = self.price_reference
+        if not price or currency not in reference.currency_index:
             return []
 
+        # 변환할 수 있는 가격만 모아서 한 번에 환산
+        entries = [
+            (country, item)
+            for country, prices in price.items() if country in reference.country_map
+            for item in prices
+            if isinstance(item, dict) and item.get("currency") in reference.currency_index and isinstance(item.get("value"), (int, float))
+        ]
+        values = self.convert_values(
+            values=[item["value"] for _, item in entries],
+            currencies=[item["currency"] for _, item in entries],
+            currency=currency,
+            reference=reference
+        ) if entries else []
+
         all_prices = []
-        for country, prices in price.items():
-            if country not in self.country_map:
+        for (country, item), value in zip(entries, values):
+            try:
+                all_prices.append(self._make_market_price(country=country, currency=currency, price=item, value=float(value), reference=reference))
+            except:
                 continue
-            
-            for price in prices:
-                try:
-                    all_price = self.convert_to_market_price(country=country, currency=currency, price=price)
-                    all_prices.append(all_price)
-                except:
-                    continue
                     
         return all_prices
 
@@ -204,11 +444,28 @@ class PriceProcessor:
                 }
             }
         """
+        reference = self.price_reference
+        return self._make_market_price(
+            country=country,
+            currency=currency,
+            price=price,
+            value=self._convert_price_value(currency=currency, price=price, reference=reference),
+            reference=reference
+        )
+
+    def _make_market_price(
+        self,
+        country: str,
+        currency: str,
+        price: Dict[str, Any],
+        value: float,
+        reference: PriceReference
+    ) -> MarketPrice:
         return MarketPrice(currency=currency,
-                           symbol=self.currency_map[currency]["symbol"],
-                           value=self._convert_price_value(currency=currency, price=price),
+                           symbol=reference.currency_map[currency]["symbol"],
+                           value=value,
                            bottleCount=price["original_price"]["bottle_count"],
-                           country=self.country_map[country]["alpha_2"],
+                           country=reference.country_map[country]["alpha_2"],
                            market=Market(**price["market"]))
     
     
@@ -257,32 +514,61 @@ class PriceProcessor:
         avg_value = sum([price.value for price in prices]) / len(prices)
         return round(avg_value, 1)
 
-    def _convert_price_value(self, currency: str, price: Dict[str, Any]) -> float:
+    def convert_values(
+        self,
+        values: List[float],
+        currencies: List[str],
+        currency: str,
+        reference: Optional[PriceReference] = None
+    ) -> np.ndarray:
+        """
+            (값, 원래 통화) 배열을 currency로 한 번에 환산
+            - values: 값 목록 (또는 np.ndarray)
+            - currencies: values와 같은 길이의 통화 코드 목록
+        """
+        codes, inverse = np.unique(np.asarray(currencies, dtype=str), return_inverse=True)
+        rates = self.make_currency_rates(currency=currency, codes=codes.tolist(), reference=reference)
+        return np.asarray(values, dtype=np.float64) * rates[inverse]
+
+    def make_currency_rates(self, currency: str, codes: List[str], reference: Optional[PriceReference] = None) -> np.ndarray:
+        """
+            codes의 각 통화 1단위를 currency로 바꾼 값 (값 배열에 그대로 곱해서 사용)
+            - reference: 환산에 쓸 snapshot (없으면 현재 snapshot, 순번과 환율은 반드시 같은 snapshot에서 읽음)
+        """
+        reference = reference or self.price_reference
+        return reference.rate_matrix[[reference.currency_index[code] for code in codes], reference.currency_index[currency]]
+
+    def _convert_price_value(self, currency: str, price: Dict[str, Any], reference: Optional[PriceReference] = None) -> float:
         """
             price: {
                 value: FLOAT,
                 currency: STRING,
             }
         """
-        value = self._to_usd(price["currency"], price["value"])
-        return self._to_currency(currency, value)
+        return price["value"] * float(self.make_currency_rates(currency=currency, codes=[price["currency"]], reference=reference)[0])
 
     def _to_usd(self, currency: str, price: float) -> float:
-        return (
-            price if currency == "USD" else
-            price * self.currency_map[currency]["to"]
-        )
+        return price * float(self.make_currency_rates(currency="USD", codes=[currency])[0])
 
     def _to_currency(self, currency: str, price: float) -> float:
-        return (
-            price if currency == "USD" else
-            price * self.currency_map[currency]["from"]
-        )
+        return price * float(self.make_currency_rates(currency=currency, codes=["USD"])[0])
         
-    def _check_country_and_currency(self, location: str) -> Tuple[str, str]:
+    def _check_country_and_currency(self, location: str, reference: Optional[PriceReference] = None) -> Tuple[str, str]:
+        country_map = (reference or self.price_reference).country_map
         location = location or "US"
-        location = location if location in self.country_map else "US"
+        location = location if location in country_map else "US"
         
-        country_dict = self.country_map[location]
+        country_dict = country_map[location]
         return country_dict["_id"], country_dict["currency_code"]
-        
\ No newline at end of file
+        
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "snapshot"
+    if command == "snapshot" and len(sys.argv) > 2:
+        reference = PriceProcessor._load_reference()
+        reference.dump(sys.argv[2])
+        logging.info(f"saved price reference {reference.version} to {sys.argv[2]}")
+    else:
+        sys.exit("usage: python -m chalicelib.src.tools.processor snapshot PATH")
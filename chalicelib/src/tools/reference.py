@@ -0,0 +1,187 @@
+"""
+    reference data cache
+
+    - glass / country / region / type / grape / aroma / critic 처럼 작고 잘 바뀌지 않는 collection을
+      컨테이너 메모리에 통째로 올려두고, $lookup 대신 python dict 조회로 채움
+    - TTL이 지나면 counters의 reference:{collection} version을 한 번에 읽고, 바뀐 collection만 다시 적재
+      (version은 projector가 변경을 받을 때 올림 / version이 없으면 TTL마다 다시 적재)
+    - 다시 적재는 background thread에서 하고, 요청은 그동안 기존 snapshot을 그대로 사용
+      (요청 경로에서 적재하는 것은 컨테이너에서 처음 사용하는 collection 뿐)
+"""
+import copy
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from chalicelib.setting import REFERENCE_CACHE_TTL_SECONDS
+from chalicelib.src.constants.common import COLLECTION
+from chalicelib.src.tools.database import mongodb_obj, resolve_path, set_path
+
+
+def _flatten(values: List[Any]) -> List[Any]:
+    flattened = []
+    for value in values:
+        flattened.extend(value if isinstance(value, list) else [value])
+    return [value for value in flattened if value is not None]
+
+
+class ReferenceCache:
+
+    def __init__(self, db: Any, ttl_seconds: float = 300):
+        self._db = db
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._schedule_lock = threading.Lock()
+        self._specs: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        # collection -> (_id -> document, _id -> index 순서): 다시 적재할 때 tuple 단위로 교체
+        self._snapshots: Dict[str, Tuple[Dict[Any, Dict[str, Any]], Dict[Any, int]]] = {}
+        self._versions: Dict[str, Optional[int]] = {}
+        self._checked_at = 0.0
+        self._refreshing = False
+
+    @staticmethod
+    def make_version_id(collection: str) -> str:
+        return f"reference:{collection}"
+
+    @staticmethod
+    def bump_version(collection: str):
+        """
+            collection이 바뀌었음을 알림 (다음 TTL 확인 때 해당 collection만 다시 적재)
+        """
+        mongodb_obj.upsert_document(
+            collection=COLLECTION.COUNTER.value,
+            query={"_id": ReferenceCache.make_version_id(collection)},
+            update_query={"$inc": {"count": 1}}
+        )
+
+    def register(self, collection: str, projection: Dict[str, Any], query: Optional[Dict[str, Any]] = None):
+        with self._lock:
+            spec = (query or {}, projection)
+            if self._specs.get(collection, spec) != spec:
+                raise ValueError(f"reference collection already registered with another spec: {collection}")
+            self._specs[collection] = spec
+
+    def register_lookup(self, lookup: Dict[str, Any]):
+        """
+            $lookup spec의 pipeline($match / $project)을 그대로 cache 조건으로 사용
+            - foreignField가 _id인 lookup만 지원
+        """
+        if lookup["foreignField"] != "_id":
+            raise ValueError(f"reference lookup must join on _id: {lookup['from']}.{lookup['foreignField']}")
+
+        query, projection = {}, None
+        for stage in lookup.get("pipeline", []):
+            if "$match" in stage:
+                query = {**query, **stage["$match"]}
+            elif "$project" in stage:
+                projection = stage["$project"]
+            else:
+                raise ValueError(f"unsupported reference lookup stage: {list(stage)}")
+        self.register(collection=lookup["from"], projection=projection, query=query)
+
+    def get(self, collection: str) -> Dict[Any, Dict[str, Any]]:
+        """
+            _id -> document (cache가 공유하는 document이므로 수정하면 안 됨)
+        """
+        return self._get_snapshot(collection)[0]
+
+    def resolve(self, document: Dict[str, Any], lookups: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+            document에 $lookup과 같은 결과를 채움 (_id index 순서, 중복 제거)
+        """
+        for lookup in lookups:
+            documents, ranks = self._get_snapshot(lookup["from"])
+            values = sorted(
+                {value for value in _flatten(resolve_path(document, lookup["localField"])) if value in documents},
+                key=ranks.__getitem__
+            )
+            set_path(document, lookup["as"], [copy.deepcopy(documents[value]) for value in values])
+        return document
+
+    def refresh(self, force: bool = False):
+        """
+            version이 바뀐 collection과 아직 적재하지 않은 collection을 다시 적재
+            (TTL이 지나지 않았으면 아직 적재하지 않은 collection만)
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._checked_at < self._ttl_seconds:
+                for collection in self._specs:
+                    if collection not in self._snapshots:
+                        self._load(collection)
+                return
+
+            collections = list(self._specs)
+            versions = {
+                document["_id"]: document.get("count")
+                for document in self._db.get_documents_by_ids(
+                    collection=COLLECTION.COUNTER.value,
+                    ids=[self.make_version_id(collection) for collection in collections],
+                    projection={"count": 1}
+                )
+                if document
+            }
+            for collection in collections:
+                version = versions.get(self.make_version_id(collection))
+                if (
+                    force
+                    or collection not in self._snapshots
+                    or version is None
+                    or version != self._versions.get(collection)
+                ):
+                    self._load(collection)
+                    self._versions[collection] = version
+            self._checked_at = time.monotonic()
+
+    def invalidate(self, collection: Optional[str] = None):
+        with self._lock:
+            for name in [collection] if collection else list(self._snapshots):
+                self._snapshots.pop(name, None)
+                self._versions.pop(name, None)
+            self._checked_at = 0.0
+
+    def _get_snapshot(self, collection: str) -> Tuple[Dict[Any, Dict[str, Any]], Dict[Any, int]]:
+        if collection not in self._specs:
+            raise KeyError(f"reference collection not registered: {collection}")
+        if collection not in self._snapshots:
+            self.refresh()
+        elif time.monotonic() - self._checked_at >= self._ttl_seconds:
+            self._schedule_refresh()
+        return self._snapshots.get(collection, ({}, {}))
+
+    def _schedule_refresh(self):
+        with self._schedule_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, name="reference-cache-refresh", daemon=True).start()
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception:
+            logging.exception("failed to refresh reference cache")
+            # 실패해도 다음 TTL까지는 기존 snapshot을 사용
+            self._checked_at = time.monotonic()
+        finally:
+            self._refreshing = False
+
+    def _load(self, collection: str):
+        query, projection = self._specs[collection]
+        # key로 쓰기 위해 _id는 항상 읽고, projection에서 뺀 경우에는 결과에서 제거
+        hide_id = (projection or {}).get("_id", 1) == 0
+        documents = {}
+        for document in self._db.iter_documents(
+            collection=collection,
+            query=query,
+            projection={**(projection or {}), "_id": 1},
+            sort=[("_id", 1)],
+            batch_size=1000
+        ):
+            key = document.pop("_id") if hide_id else document["_id"]
+            documents[key] = document
+        self._snapshots[collection] = (documents, {key: rank for rank, key in enumerate(documents)})
+        logging.info(f"reference cache loaded: {collection} {len(documents)}")
+
+
+reference_cache = ReferenceCache(db=mongodb_obj, ttl_seconds=REFERENCE_CACHE_TTL_SECONDS)
@@ -1,4 +1,5 @@
-from .gzip import compress_item, decompress_items
+from .cursor import decode_cursor, encode_cursor
+from .gzip import EncodedResponse, compress_item, decompress_items
 from .string import generate_code, make_slug, replace_to_multi_language
 from .time import (add_time_to_datetime, convert_date_to_string,
                    convert_date_to_timestamp, convert_string_to_datetime,
@@ -0,0 +1,22 @@
+import base64
+from typing import Any
+
+from bson import json_util
+from bson.errors import BSONError
+
+
+def encode_cursor(value: Any) -> str:
+    """
+        keyset pagination용 opaque cursor (마지막 document의 정렬 key를 base64로 감쌈)
+    """
+    return base64.urlsafe_b64encode(json_util.dumps(value).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> Any:
+    """
+        encode_cursor의 역변환
+        - base64 / json / Extended JSON ($oid 등) 어느 단계에서 깨져도 ValueError로 통일 (400 처리)
+    """
+    try:
+        return json_util.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError, UnicodeError, BSONError) as e:
+        raise ValueError(f"invalid cursor: {cursor}") from e
@@ -1,5 +1,6 @@
 import gzip
 import json
+from typing import Any, Dict
 
 
 def decompress_items(data):
@@ -8,4 +9,35 @@ def decompress_items(data):
     return json.loads(gzip.decompress(data).decode("utf-8"))
 
 def compress_item(data: dict):
-    return gzip.compress(json.dumps(data).encode("utf-8"))
\ No newline at end of file
+    return gzip.compress(json.dumps(data).encode("utf-8"))
+
+
+class EncodedResponse:
+    """
+        직렬화 / gzip 압축까지 끝낸 response body
+        - cache에 넣어두면 hit 시 json.dumps / gzip.compress 없이 bytes를 그대로 반환
+        - APIHandler는 Accept-Encoding에 따라 identity / gzip 중 하나를 골라서 보냄
+    """
+    __slots__ = ("identity", "gzip")
+
+    def __init__(self, identity: bytes, gzip: bytes):
+        self.identity = identity
+        self.gzip = gzip
+
+    @classmethod
+    def from_data(cls, data: Dict[str, Any], compresslevel: int = 9) -> "EncodedResponse":
+        # compress_item과 같은 직렬화 결과
+        identity = json.dumps(data).encode("utf-8")
+        return cls(identity=identity, gzip=gzip.compress(identity, compresslevel=compresslevel))
+
+    @classmethod
+    def from_model(cls, model: Any, compresslevel: int = 9) -> "EncodedResponse":
+        return cls.from_data(model.model_dump(), compresslevel=compresslevel)
+
+    @property
+    def size(self) -> int:
+        return len(self.identity) + len(self.gzip)
+
+    def model_dump(self) -> Dict[str, Any]:
+        # pydantic response와 같은 방식으로 다뤄야 하는 곳을 위한 fallback
+        return json.loads(self.identity)
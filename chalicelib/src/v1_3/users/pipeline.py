@@ -0,0 +1,88 @@
+from typing import Any, Dict, List
+
+from chalicelib.src.constants.common import STATUS
+from chalicelib.src.tools.database import MongoDB
+
+# 목록은 최신순 (_id 내림차순)
+LIST_SORT = {"_id": -1}
+
+# 리액션 목록의 action 별 조건
+REACTION_FILTERS = {
+    "like": {"like": 1},
+    "dislike": {"like": -1},
+    "bookmark": {"bookmark": 1},
+}
+
+
+# 유저 서비스의 조회 조건 / pipeline (tools/database/indexes.py의 QUERY_SHAPES도 같은 함수로 만듦)
+def make_reaction_query(user: str, item_type: str, action: str) -> Dict[str, Any]:
+    """
+        user의 리액션 목록 조건 (지원하지 않는 action이면 user 조건만 남김)
+    """
+    query = {"user": user}
+    if action in REACTION_FILTERS:
+        query.update({"item_type": item_type, **REACTION_FILTERS[action]})
+    return query
+
+
+def make_comment_query(user: str) -> Dict[str, Any]:
+    return {"user": user, "status": {"$gte": STATUS.PUBLISHED.value}}
+
+
+def make_cursor_page_pipeline(
+    query: Dict[str, Any],
+    projection: Dict[str, Any],
+    lookup: Dict[str, Any],
+    cursor: str,
+    size: int
+) -> List[Dict[str, Any]]:
+    """
+        cursor 방식: _id index range로 바로 이동 (size + 1개를 읽어서 다음 페이지가 있는지 확인)
+    """
+    return [
+        {"$match": {**query, **MongoDB.make_cursor_query(cursor)}},
+        {"$sort": LIST_SORT},
+        {"$limit": size + 1},
+        {"$project": projection},
+        {"$lookup": lookup},
+    ]
+
+
+def make_facet_page_pipeline(
+    query: Dict[str, Any],
+    projection: Dict[str, Any],
+    lookup: Dict[str, Any],
+    page: int,
+    size: int
+) -> List[Dict[str, Any]]:
+    """
+        page 방식 (counter가 없을 때): 같은 pipeline에서 total도 셈
+    """
+    facet = MongoDB.make_pagination_facet_query(page=page, size=size)
+    facet["items"].append({"$lookup": lookup})
+    return [
+        {"$match": query},
+        {"$project": projection},
+        {"$sort": LIST_SORT},
+        {"$facet": facet},
+    ]
+
+
+def make_skip_page_pipeline(
+    query: Dict[str, Any],
+    projection: Dict[str, Any],
+    lookup: Dict[str, Any],
+    page: int,
+    size: int
+) -> List[Dict[str, Any]]:
+    """
+        page 방식 (counter가 있을 때): 반환할 페이지만 읽음
+    """
+    return [
+        {"$match": query},
+        {"$project": projection},
+        {"$sort": LIST_SORT},
+        {"$skip": (page - 1) * size},
+        {"$limit": size},
+        {"$lookup": lookup},
+    ]
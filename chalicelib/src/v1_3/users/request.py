@@ -3,7 +3,8 @@ from typing import Optional
 from pydantic import BaseModel, Field
 
 from chalicelib.src.constants.common import PLATFORM
-from chalicelib.src.validators.request import DefaultRequest, ListRequest
+from chalicelib.src.validators.request import (CursorListRequest,
+                                               DefaultRequest)
 
 
 class SignInRequest(DefaultRequest):
@@ -36,11 +37,11 @@ class UpdateUserRequest(DefaultRequest):
     subscription: bool = Field(default=False)
     
 
-class GetUserInteractionsRequest(ListRequest):
+class GetUserInteractionsRequest(CursorListRequest):
     id: str
     action: str
     
     
 
-class GetUserCommentsRequest(ListRequest):
+class GetUserCommentsRequest(CursorListRequest):
     id: str
\ No newline at end of file
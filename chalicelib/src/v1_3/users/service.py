@@ -1,7 +1,7 @@
 import imghdr
 import io
 from http import HTTPStatus
-from typing import Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from chalice import UnauthorizedError
 from PIL import Image
@@ -10,9 +10,10 @@ from chalicelib.setting import DOMAIN, JWT_ALGORITHM, JWT_SECRET
 from chalicelib.src.constants.common import COLLECTION, PLATFORM, STATUS
 from chalicelib.src.tools.authorizer import Authorizer
 from chalicelib.src.tools.aws import upload_image_to_s3
-from chalicelib.src.tools.database import mongodb_obj
+from chalicelib.src.tools.counter import InteractionCounter
+from chalicelib.src.tools.database import gather, mongodb_obj
 from chalicelib.src.tools.social import Google
-from chalicelib.src.utils import (convert_timestamp_to_string,
+from chalicelib.src.utils import (convert_timestamp_to_string, encode_cursor,
                                   get_now_timestamp, make_slug)
 from chalicelib.src.v1_3.articles.constant import ARTICLE_LIST_PROJECTION
 from chalicelib.src.v1_3.wines.constant import WINE_LIST_PROJECTION
@@ -20,11 +21,15 @@ from chalicelib.src.validators.article import ArticleCard
 from chalicelib.src.validators.field import (SEO, AdditionalMeta, Breadcrumb,
                                              FullImage, Languages, Meta,
                                              MetaData, Pagination)
+from chalicelib.src.validators.request import CursorListRequest
 from chalicelib.src.validators.response import DefaultResponse, MessageResponse
 from chalicelib.src.validators.user import UserDetail
 from chalicelib.src.validators.wine import WineCard
 from chalicelib.static.image import OG_IMAGE
 
+from .pipeline import (make_comment_query, make_cursor_page_pipeline,
+                       make_facet_page_pipeline, make_reaction_query,
+                       make_skip_page_pipeline)
 from .request import (DeleteUserRequest, GetUserCommentsRequest,
                       GetUserInteractionsRequest, GetUserRequest,
                       SignInRequest, SignOutRequest, UpdateUserRequest)
@@ -126,17 +131,18 @@ class UserService:
                 "visited_at": get_now_timestamp()
             }
         }
-        # Update user visited_at
-        mongodb_obj.update_document(
-            collection=COLLECTION.USER.value,
-            query=query,
-            update_query=update_query
-        )
-        # Delete token
-        mongodb_obj.update_document(
-            collection=COLLECTION.TOKEN.value,
-            query={"access_token": input.accessToken},
-            update_query={"$set": {"status": -3}}
+        # Update user visited_at / Delete token (서로 다른 collection이므로 동시에 실행)
+        gather(
+            lambda: mongodb_obj.update_document(
+                collection=COLLECTION.USER.value,
+                query=query,
+                update_query=update_query
+            ),
+            lambda: mongodb_obj.update_document(
+                collection=COLLECTION.TOKEN.value,
+                query={"access_token": input.accessToken},
+                update_query={"$set": {"status": -3}}
+            )
         )
         return SignOutResponse(status=HTTPStatus.OK), HTTPStatus.OK
         
@@ -231,6 +237,22 @@ class UserService:
             status=HTTPStatus.NOT_FOUND
         ), HTTPStatus.NOT_FOUND
     
+    def get_version(self, input: GetUserRequest) -> Optional[str]:
+        """
+            user 상세 response의 version (ETag용, user가 없으면 None)
+            - 본인 / 타인에 따라 response가 다르므로 version에 포함
+        """
+        if document := mongodb_obj.get_document(
+            collection=COLLECTION.USER.value,
+            query={
+                "_id": input.id,
+                "status": {"$gte": STATUS.PUBLISHED.value},
+            },
+            projection={"_id": 1, "updated_at": 1}
+        ):
+            return f"{document.get('updated_at')}:{'self' if input.id == input.user else 'other'}"
+        return None
+    
     def update_user(self, input: UpdateUserRequest) -> Tuple[DefaultResponse, HTTPStatus]:
         query = {
             "_id": input.id,
@@ -284,19 +306,22 @@ class UserService:
                 "deleted_at": get_now_timestamp()
             }
         }
-        # Update user status
-        result = mongodb_obj.update_document(
-            collection=COLLECTION.USER.value,
-            query=query,
-            update_query=update_query
-        )
-        # Delete tokens
-        mongodb_obj.update_documents(
-            collection=COLLECTION.TOKEN.value,
-            query={"user": input.id},
-            update_query={"$set": {"status": -3}}
+        # Update user status / Delete tokens (서로 다른 collection이므로 동시에 실행)
+        result, _ = gather(
+            lambda: mongodb_obj.update_document(
+                collection=COLLECTION.USER.value,
+                query=query,
+                update_query=update_query
+            ),
+            lambda: mongodb_obj.update_documents(
+                collection=COLLECTION.TOKEN.value,
+                query={"user": input.id},
+                update_query={"$set": {"status": -3}}
+            )
         )
         if result.modified_count:
+            # 탈퇴한 user의 리액션은 item counter에서 제외
+            InteractionCounter.remove_user(user=input.user)
             return DefaultResponse(status=HTTPStatus.NO_CONTENT), HTTPStatus.OK
         
         return MessageResponse(
@@ -305,61 +330,29 @@ class UserService:
         ), HTTPStatus.NOT_FOUND
         
     def get_wine_reactions(self, input: GetUserInteractionsRequest) -> Tuple[GetUserWineInteractionsResponse, HTTPStatus]:
-        sort = {"_id": -1}
-        query = {"user": input.id}
-        
-        if input.action == "like":
-            query.update({
-                "item_type": "wine",
-                "like": 1
-            })
-        elif input.action == "dislike":
-            query.update({
-                "item_type": "wine",
-                "like": -1
-            })
-        elif input.action == "bookmark":
-            query.update({
-                "item_type": "wine",
-                "bookmark": 1
-            })
-        facet = {
-            "items": [
-                {"$skip": (input.page - 1) * input.size},
-                {"$limit": input.size}
-            ],
-            "total": [
-                {"$count": "count"}
-            ]
-        }
-        documents = mongodb_obj.aggregate_documents(
+        query = make_reaction_query(user=input.id, item_type="wine", action=input.action)
+        documents, total, next_cursor = self._fetch_page(
+            input=input,
             collection=COLLECTION.INTERACTION.value,
-            pipelines=[
-                {"$match": query},
-                {"$project": {"_id": 1, "item": 1}},
-                {"$sort": sort},
-                
-                {
-                    "$lookup": {
-                        "from": COLLECTION.WINE.value,
-                        "localField": "item",
-                        "foreignField": "_id",
-                        "as": "item",
-                        "pipeline": [
-                            {
-                                "$project": WINE_LIST_PROJECTION
-                            }
-                        ]
+            query=query,
+            projection={"_id": 1, "item": 1},
+            counter_id=(
+                InteractionCounter.make_user_counter_id(input.id, query["item_type"], input.action)
+                if "item_type" in query else None
+            ),
+            lookup={
+                "from": COLLECTION.WINE.value,
+                "localField": "item",
+                "foreignField": "_id",
+                "as": "item",
+                "pipeline": [
+                    {
+                        "$project": WINE_LIST_PROJECTION
                     }
-                },
-                {"$facet": facet},
-            ]
+                ]
+            }
         )
-        try:
-            items = [item["item"][0] for item in documents[0].get("items", []) if item.get("item")]
-            total = documents[0]["total"][0]["count"] if documents[0].get("total") else 0
-        except (KeyError, IndexError):
-            items, total = [], 0
+        items = [item["item"][0] for item in documents if item.get("item")]
         
         return GetUserWineInteractionsResponse(
             metaData=MetaData(
@@ -367,63 +360,32 @@ class UserService:
                 language=input.language,
             ),
             items=WineCard.to_items(items, language=input.language, location=input.location),
-            pagination=Pagination(
-                page=input.page,
-                size=len(items),
-                totalSize=total,
-                totalPage=(
-                    total // input.size if total % input.size == 0 
-                    else total // input.size + 1
-                )
-            )
+            pagination=self._make_pagination(input, len(items), total, next_cursor)
         ), HTTPStatus.OK
         
     def get_article_reactions(self, input: GetUserInteractionsRequest) -> Tuple[GetUserArticleInteractionsResponse, HTTPStatus]:
-        sort = {"_id": -1}
         query = {"user": input.id}
         
         if input.action == "like":
-            query.update({
-                "item_type": "article",
-                "like": 1
-            })
-        facet = {
-            "items": [
-                {"$skip": (input.page - 1) * input.size},
-                {"$limit": input.size}
-            ],
-            "total": [
-                {"$count": "count"}
-            ]
-        }
-        documents = mongodb_obj.aggregate_documents(
+            query = make_reaction_query(user=input.id, item_type="article", action=input.action)
+        documents, total, next_cursor = self._fetch_page(
+            input=input,
             collection=COLLECTION.INTERACTION.value,
-            pipelines=[
-                {"$match": query},
-                {"$project": {"_id": 1, "item": 1}},
-                {"$sort": sort},
-                
-                {
-                    "$lookup": {
-                        "from": COLLECTION.ARTICLE.value,
-                        "localField": "item",
-                        "foreignField": "_id",
-                        "as": "item",
-                        "pipeline": [
-                            {
-                                "$project": ARTICLE_LIST_PROJECTION
-                            }
-                        ]
+            query=query,
+            projection={"_id": 1, "item": 1},
+            lookup={
+                "from": COLLECTION.ARTICLE.value,
+                "localField": "item",
+                "foreignField": "_id",
+                "as": "item",
+                "pipeline": [
+                    {
+                        "$project": ARTICLE_LIST_PROJECTION
                     }
-                },
-                {"$facet": facet},
-            ]
+                ]
+            }
         )
-        try:
-            items = [item["item"][0] for item in documents[0].get("items", []) if item.get("item")]
-            total = documents[0]["total"][0]["count"] if documents[0].get("total") else 0
-        except (KeyError, IndexError):
-            items, total = [], 0
+        items = [item["item"][0] for item in documents if item.get("item")]
         
         return GetUserArticleInteractionsResponse(
             metaData=MetaData(
@@ -431,57 +393,29 @@ class UserService:
                 language=input.language,
             ),
             items=ArticleCard.to_items(items, language=input.language),
-            pagination=Pagination(
-                page=input.page,
-                size=len(items),
-                totalSize=total,
-                totalPage=(
-                    total // input.size if total % input.size == 0 
-                    else total // input.size + 1
-                )
-            )
+            pagination=self._make_pagination(input, len(items), total, next_cursor)
         ), HTTPStatus.OK
     
     def get_comments(self, input: GetUserCommentsRequest) -> Tuple[GetUserCommentsResponse, HTTPStatus]:
-        sort = {"_id": -1}
-        query = {"user": input.id, "status": {"$gte": STATUS.PUBLISHED.value}}
+        query = make_comment_query(user=input.id)
         
-        facet = {
-            "items": [
-                {"$skip": (input.page - 1) * input.size},
-                {"$limit": input.size}
-            ],
-            "total": [
-                {"$count": "count"}
-            ]
-        }
-        documents = mongodb_obj.aggregate_documents(
+        items, total, next_cursor = self._fetch_page(
+            input=input,
             collection=COLLECTION.COMMENT.value,
-            pipelines=[
-                {"$match": query},
-                {"$project": {"_id": 1, "user": 1, "article": 1, "content": 1, "created_at": 1}},
-                {"$sort": sort},
-                {
-                    "$lookup": {
-                        "from": COLLECTION.ARTICLE.value,
-                        "localField": "article",
-                        "foreignField": "_id",
-                        "as": "article",
-                        "pipeline": [
-                            {
-                                "$project": ARTICLE_LIST_PROJECTION
-                            }
-                        ]
+            query=query,
+            projection={"_id": 1, "user": 1, "article": 1, "content": 1, "created_at": 1},
+            lookup={
+                "from": COLLECTION.ARTICLE.value,
+                "localField": "article",
+                "foreignField": "_id",
+                "as": "article",
+                "pipeline": [
+                    {
+                        "$project": ARTICLE_LIST_PROJECTION
                     }
-                },
-                {"$facet": facet},
-            ]
+                ]
+            }
         )
-        try:
-            items = documents[0].get("items", [])
-            total = documents[0]["total"][0]["count"] if documents[0].get("total") else 0
-        except (KeyError, IndexError):
-            items, total = [], 0
         
         return GetUserCommentsResponse(
             metaData=MetaData(
@@ -496,16 +430,80 @@ class UserService:
                     article=ArticleCard.to_items(item["article"], language=input.language)[0],
                 ) for item in items
             ],
-            pagination=Pagination(
-                page=input.page,
-                size=len(items),
-                totalSize=total,
-                totalPage=(
-                    total // input.size if total % input.size == 0 
-                    else total // input.size + 1
+            pagination=self._make_pagination(input, len(items), total, next_cursor)
+        ), HTTPStatus.OK
+        
+    ###############################
+    # METHODS for Business Logic
+    ###############################
+    def _fetch_page(
+        self,
+        input: CursorListRequest,
+        collection: str,
+        query: Dict[str, Any],
+        projection: Dict[str, Any],
+        lookup: Dict[str, Any],
+        counter_id: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], int, Optional[str]]:
+        """
+            최신순(_id 내림차순) 목록 조회
+            - cursor: _id index range로 바로 이동 (keyset pagination)
+            - page: $skip 방식 (기존 호환용)
+            - 두 방식 모두 $lookup은 반환할 페이지에만 적용
+            - counter_id의 counter가 있으면 total을 다시 세지 않음
+            - counter가 없으면 page 방식은 $facet, cursor 방식은 count_documents로 total을 셈
+        """
+        def get_count() -> Optional[int]:
+            return InteractionCounter.get_count(counter_id) if counter_id else None
+        
+        def get_total() -> int:
+            total = get_count()
+            return mongodb_obj.count_documents(collection=collection, query=query) if total is None else total
+        
+        if input.cursor:
+            # 다음 페이지 위치가 cursor로 정해지므로 total 조회와 페이지 조회는 동시에 실행
+            total, documents = gather(
+                get_total,
+                lambda: mongodb_obj.aggregate_documents(
+                    collection=collection,
+                    pipelines=make_cursor_page_pipeline(query, projection, lookup, cursor=input.cursor, size=input.size)
                 )
             )
-        ), HTTPStatus.OK
+            has_next = len(documents) > input.size
+            documents = documents[:input.size]
+        elif (total := get_count()) is None:
+            documents = mongodb_obj.aggregate_documents(
+                collection=collection,
+                pipelines=make_facet_page_pipeline(query, projection, lookup, page=input.page, size=input.size)
+            )
+            try:
+                total = documents[0]["total"][0]["count"] if documents[0].get("total") else 0
+                documents = documents[0].get("items", [])
+            except (KeyError, IndexError):
+                documents, total = [], 0
+            has_next = input.page * input.size < total
+        else:
+            documents = mongodb_obj.aggregate_documents(
+                collection=collection,
+                pipelines=make_skip_page_pipeline(query, projection, lookup, page=input.page, size=input.size)
+            )
+            has_next = input.page * input.size < total
+        
+        next_cursor = encode_cursor(documents[-1]["_id"]) if (has_next and documents) else None
+        return documents, total, next_cursor
+    
+    @staticmethod
+    def _make_pagination(input: CursorListRequest, size: int, total: int, next_cursor: Optional[str]) -> Pagination:
+        return Pagination(
+            page=0 if input.cursor else input.page,
+            size=size,
+            totalSize=total,
+            totalPage=(
+                total // input.size if total % input.size == 0 
+                else total // input.size + 1
+            ),
+            nextCursor=next_cursor
+        )
         
     @staticmethod
     def check_image_type(content: bytes):
@@ -23,7 +23,11 @@ WINE_DETAIL_PROJECTION = {
     "aroma": 1,
     "winemaking": 1,
     "taste": 1,
-    "global_history_price": 1,
+    # packed가 있으면 global_history_price는 내려받지 않음 (wines/history.py 참고)
+    "global_history_price": {
+        "$cond": [{"$ifNull": ["$global_history_price_packed", False]}, "$$REMOVE", "$global_history_price"]
+    },
+    "global_history_price_packed": 1,
     "global_market_price": 1,
     "vestimated_price": 1,
     "meta": 1,
@@ -51,6 +55,11 @@ WINE_LIST_PROJECTION = {
     "winery.name": 1,
 }
 
+WINE_VERSION_PROJECTION = {
+    "_id": 1,
+    "updated_at": 1,
+}
+
 WINE_REDIRECT_PROJECTION = {
     "_id": 1,
     "slug": 1,
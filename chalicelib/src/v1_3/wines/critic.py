@@ -0,0 +1,306 @@
+"""
+    critic_review_stats
+
+    - 와인별 critic review 집계 (점수 평균, quality 투표, keyword 빈도, taste 평균)를 합계 / 개수로 저장
+    - review가 추가 / 수정 / 비공개되면 review 하나의 기여분(contribution) 차이만 $inc로 반영
+      (마지막으로 반영한 기여분은 critic_review_contributions에 review 단위로 저장)
+    - 요청 경로에서는 summarize로 평균 / 정렬만 하고, 누락이나 불일치는 rebuild로 다시 계산
+
+    python -m chalicelib.src.v1_3.wines.critic rebuild
+"""
+import logging
+import sys
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import DeleteMany, ReplaceOne, UpdateOne
+
+from chalicelib.src.constants.common import COLLECTION, STATUS
+from chalicelib.src.constants.wine import REVIEW_QUALITY
+from chalicelib.src.tools.database import mongodb_obj, set_path
+from chalicelib.src.utils import get_now_timestamp
+
+from .pipeline import CRITIC_REVIEW_STATUSES
+
+STATS_COLLECTION = COLLECTION.CRITIC_REVIEW_STATS.value
+CONTRIBUTION_COLLECTION = COLLECTION.CRITIC_REVIEW_CONTRIBUTION.value
+
+KEYWORD_FIELDS = ["colors", "aromas", "palates", "pairings", "ingredients"]
+TASTE_FIELDS = ["body", "acidity", "tannin", "sweetness"]
+REVIEW_STATS_PROJECTION = {
+    "_id": 1,
+    "wine._id": 1,
+    "critic._id": 1,
+    "status": 1,
+    "score": 1,
+    "quality": 1,
+    "keyword": 1,
+    "taste_structure": 1,
+}
+
+
+def _encode_key(key: str) -> str:
+    # keyword를 field 이름으로 쓰기 위해 "." / "$"를 전각 문자로 바꿈
+    return key.replace(".", "．").replace("$", "＄")
+
+
+def _decode_key(key: str) -> str:
+    return key.replace("．", ".").replace("＄", "$")
+
+
+def _make_100_point_score(value: float, ground: int) -> Optional[float]:
+    if not value or not ground:
+        return None
+    return round(value / ground * 100, 2)
+
+
+def _average(total: Dict[str, Any]) -> Optional[float]:
+    return (total.get("sum", 0) / total["count"]) if total.get("count") else None
+
+
+class CriticReviewStats:
+
+    @staticmethod
+    def make_contribution(review: Dict[str, Any]) -> Dict[str, float]:
+        """
+            review 하나가 집계에 더하는 값 ({dotted path: 증가값})
+        """
+        contribution = Counter()
+        for kind in ["actual", "predicted"]:
+            if score := _make_100_point_score(review["score"][kind]["value"], review["score"][kind]["ground"]):
+                contribution[f"{kind}_score.sum"] += score
+                contribution[f"{kind}_score.count"] += 1
+
+        actual_quality_id = review["quality"]["actual"]["_id"]
+        predicted_quality_id = review["quality"]["predicted"]["_id"]
+        if not actual_quality_id or not predicted_quality_id:
+            return dict(contribution)
+
+        qualities = REVIEW_QUALITY.__member_values__()
+        if actual_quality_id in qualities:
+            contribution[f"actual_votes.{actual_quality_id}"] += 1
+        if predicted_quality_id in qualities:
+            contribution[f"predicted_votes.{predicted_quality_id}"] += 1
+
+        for field in KEYWORD_FIELDS:
+            for keyword in review["keyword"][field]:
+                contribution[f"keywords.{field}.{_encode_key(keyword.replace('_', ' '))}"] += 1
+
+        for field in TASTE_FIELDS:
+            value = review["taste_structure"][field]
+            if value and int(value):
+                contribution[f"taste.{field}.sum"] += int(value)
+                contribution[f"taste.{field}.count"] += 1
+        return dict(contribution)
+
+    @staticmethod
+    def expand(contribution: Dict[str, float]) -> Dict[str, Any]:
+        stats = {}
+        for path, value in contribution.items():
+            set_path(stats, path, value)
+        return stats
+
+    @staticmethod
+    def aggregate(critic_reviews: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+            요청에서 join한 critic review로 바로 집계 (critic이 없는 review는 제외)
+        """
+        total = Counter()
+        for review in critic_reviews:
+            if review.get("critic"):
+                total.update(CriticReviewStats.make_contribution(review))
+        return CriticReviewStats.expand(total)
+
+    @staticmethod
+    def summarize(stats: Dict[str, Any]) -> Dict[str, Any]:
+        """
+            집계를 평균 / 투표 수 / 빈도순 keyword로 정리 (언어와 무관)
+        """
+        keywords = stats.get("keywords", {})
+        taste = stats.get("taste", {})
+        return {
+            "actual_score": _average(stats.get("actual_score", {})),
+            "predicted_score": _average(stats.get("predicted_score", {})),
+            "actual_votes": {key: stats.get("actual_votes", {}).get(key, 0) for key in REVIEW_QUALITY.__member_values__()},
+            "predicted_votes": {key: stats.get("predicted_votes", {}).get(key, 0) for key in REVIEW_QUALITY.__member_values__()},
+            "keywords": {
+                field: [
+                    _decode_key(keyword)
+                    for keyword, count in sorted(keywords.get(field, {}).items(), key=lambda x: x[1], reverse=True)
+                    if count > 0
+                ]
+                for field in KEYWORD_FIELDS
+            },
+            "taste": {field: _average(taste.get(field, {})) for field in TASTE_FIELDS},
+        }
+
+    @staticmethod
+    def get(wine_id: str) -> Optional[Dict[str, Any]]:
+        return mongodb_obj.get_document(
+            collection=STATS_COLLECTION,
+            query={"_id": wine_id},
+            projection={"_id": 0, "updated_at": 0}
+        ) or None
+
+    @staticmethod
+    def sync_review(id: Any, document: Optional[Dict[str, Any]], published_critics: Optional[set] = None):
+        """
+            review 하나의 변경을 반영 (삭제된 경우 document=None)
+            - 이전에 반영한 기여분과의 차이만 $inc (review의 와인이 바뀌면 이전 와인에서 빼고 새 와인에 더함)
+            - 기여분은 primary에서 읽고, $inc가 성공한 뒤에 저장 (중간에 실패하면 같은 변경을 다시 받아도 차이가 남음)
+            - published_critics: 공개된 critic _id (여러 review를 반영할 때 한 번만 조회하도록 넘겨받음)
+        """
+        db = mongodb_obj.primary()
+        wine_id = document["wine"]["_id"] if document else None
+        if document and published_critics is None:
+            published_critics = CriticReviewStats._get_published_critics([document])
+        contribution = (
+            CriticReviewStats.make_contribution(document)
+            if document and CriticReviewStats._is_counted(document, published_critics)
+            else {}
+        )
+        before = db.get_document(
+            collection=CONTRIBUTION_COLLECTION,
+            query={"_id": id},
+            projection={"_id": 0, "wine": 1, "contribution": 1}
+        )
+
+        previous = dict(before.get("contribution", []))
+        if before.get("wine") == wine_id:
+            CriticReviewStats._increment(wine_id, {
+                key: contribution.get(key, 0) - previous.get(key, 0)
+                for key in set(contribution) | set(previous)
+            })
+        else:
+            CriticReviewStats._increment(before.get("wine"), {key: -value for key, value in previous.items()})
+            CriticReviewStats._increment(wine_id, contribution)
+
+        if document:
+            db.upsert_document(
+                collection=CONTRIBUTION_COLLECTION,
+                query={"_id": id},
+                update_query={"$set": {
+                    "wine": wine_id,
+                    "contribution": list(contribution.items()),
+                    "updated_at": get_now_timestamp()
+                }}
+            )
+        elif before:
+            db.delete_document(collection=CONTRIBUTION_COLLECTION, query={"_id": id})
+
+    @staticmethod
+    def sync_critic(critic_id: Any):
+        """
+            critic의 공개 여부가 바뀌면 해당 critic의 review를 다시 반영
+        """
+        db = mongodb_obj.primary()
+        published_critics = {
+            critic["_id"]
+            for critic in db.get_documents(
+                collection=COLLECTION.CRITIC.value,
+                query={"_id": critic_id, "status": {"$gte": STATUS.PUBLISHED.value}},
+                projection={"_id": 1}
+            )
+        }
+        for review in db.iter_documents(
+            collection=COLLECTION.CRITIC_REVIEW.value,
+            query={"critic._id": critic_id},
+            projection=REVIEW_STATS_PROJECTION
+        ):
+            CriticReviewStats.sync_review(review["_id"], review, published_critics=published_critics)
+
+    @staticmethod
+    def rebuild() -> int:
+        """
+            critic review 전체를 다시 집계해서 stats / contribution을 덮어씀
+        """
+        started_at = get_now_timestamp()
+        reviews = list(mongodb_obj.iter_documents(
+            collection=COLLECTION.CRITIC_REVIEW.value,
+            query={"status": {"$in": CRITIC_REVIEW_STATUSES}},
+            projection=REVIEW_STATS_PROJECTION,
+            batch_size=1000
+        ))
+        published_critics = CriticReviewStats._get_published_critics(reviews)
+
+        totals: Dict[Any, Counter] = {}
+        contributions = []
+        for review in reviews:
+            if not CriticReviewStats._is_counted(review, published_critics):
+                continue
+            contribution = CriticReviewStats.make_contribution(review)
+            totals.setdefault(review["wine"]["_id"], Counter()).update(contribution)
+            contributions.append(ReplaceOne(
+                {"_id": review["_id"]},
+                {
+                    "_id": review["_id"],
+                    "wine": review["wine"]["_id"],
+                    "contribution": list(contribution.items()),
+                    "updated_at": get_now_timestamp()
+                },
+                upsert=True
+            ))
+        stats = [
+            ReplaceOne(
+                {"_id": wine_id},
+                {"_id": wine_id, **CriticReviewStats.expand(total), "updated_at": get_now_timestamp()},
+                upsert=True
+            )
+            for wine_id, total in totals.items()
+        ]
+
+        # 다시 만들지 않은 document(review가 모두 비공개된 와인 등)는 삭제
+        prune = DeleteMany({"updated_at": {"$lt": started_at}})
+        for collection, operations in [(CONTRIBUTION_COLLECTION, contributions + [prune]), (STATS_COLLECTION, stats + [prune])]:
+            for idx in range(0, len(operations), 1000):
+                mongodb_obj.bulk_update_documents(
+                    collection=collection,
+                    bulk_operations=operations[idx:idx + 1000],
+                    ordered=False
+                )
+        return len(totals)
+
+    @staticmethod
+    def _increment(wine_id: Any, delta: Dict[str, float]):
+        if wine_id is None or not (delta := {key: value for key, value in delta.items() if value}):
+            return
+        mongodb_obj.bulk_update_documents(
+            collection=STATS_COLLECTION,
+            bulk_operations=[UpdateOne(
+                {"_id": wine_id},
+                {"$inc": delta, "$set": {"updated_at": get_now_timestamp()}},
+                upsert=True
+            )]
+        )
+
+    @staticmethod
+    def _get_published_critics(reviews: List[Dict[str, Any]]) -> set:
+        critic_ids = list({review["critic"]["_id"] for review in reviews if review.get("critic")})
+        return {
+            critic["_id"]
+            for critic in mongodb_obj.primary().get_documents(
+                collection=COLLECTION.CRITIC.value,
+                query={"_id": {"$in": critic_ids}, "status": {"$gte": STATUS.PUBLISHED.value}},
+                projection={"_id": 1}
+            )
+        } if critic_ids else set()
+
+    @staticmethod
+    def _is_counted(review: Dict[str, Any], published_critics: set) -> bool:
+        return (
+            review.get("status") in CRITIC_REVIEW_STATUSES
+            and bool(review.get("critic"))
+            and review["critic"]["_id"] in published_critics
+        )
+
+
+critic_review_stats = CriticReviewStats()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "rebuild"
+    if command == "rebuild":
+        logging.info(f"rebuilt critic review stats of {critic_review_stats.rebuild()} wines")
+    else:
+        sys.exit(f"unknown command: {command}")
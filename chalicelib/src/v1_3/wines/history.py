@@ -0,0 +1,97 @@
+"""
+    global_history_price_packed
+
+    - global_history_price(국가별 {timestamp, currency, value} 목록)를 국가별 packed binary로 함께 저장
+      (형식은 chalicelib.src.tools.history.pack_history_price 참고)
+    - 와인 상세는 packed가 있으면 global_history_price를 읽지 않고 packed만 배열로 올림
+    - 와인이 바뀌면 projector가 sync_wine으로 다시 만들고, 기존 와인은 migrate로 채움
+    - global_history_price가 원본: 외부 수집기가 계속 이 field에 가격을 추가하므로 삭제하지 않음
+
+    python -m chalicelib.src.v1_3.wines.history migrate
+"""
+import logging
+import sys
+from typing import Any, Dict, Optional
+
+from pymongo import UpdateOne
+
+from chalicelib.src.constants.common import COLLECTION
+from chalicelib.src.tools.database import mongodb_obj
+from chalicelib.src.tools.history import pack_history_price
+
+LEGACY_FIELD = "global_history_price"
+PACKED_FIELD = "global_history_price_packed"
+
+
+class HistoryPricePacker:
+
+    def make_update(self, document: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+            document의 packed를 다시 만드는 update query (바뀐 것이 없거나 pack할 수 없으면 None)
+        """
+        if not document.get(LEGACY_FIELD):
+            return None
+        try:
+            packed = pack_history_price(document[LEGACY_FIELD])
+        except ValueError as e:
+            logging.warning(f"skip packing history price of {document['_id']}: {e}")
+            return None
+
+        if packed == document.get(PACKED_FIELD):
+            return None
+        return {"$set": {PACKED_FIELD: packed}}
+
+    def sync_wine(self, id: Any, document: Optional[Dict[str, Any]]):
+        """
+            와인 변경 시 global_history_price가 바뀌었으면 packed도 다시 만듦
+            (packed가 같으면 쓰지 않으므로 자기 변경으로 다시 호출되어도 반복되지 않음)
+        """
+        if document and (update_query := self.make_update(document)):
+            mongodb_obj.update_document(
+                collection=COLLECTION.WINE.value,
+                query={"_id": id},
+                update_query=update_query
+            )
+
+    def migrate(self) -> int:
+        """
+            global_history_price가 있는 와인 전체의 packed를 채움
+        """
+        total = 0
+        operations = []
+        for wine in mongodb_obj.iter_documents(
+            collection=COLLECTION.WINE.value,
+            query={LEGACY_FIELD: {"$exists": True}},
+            projection={"_id": 1, LEGACY_FIELD: 1, PACKED_FIELD: 1},
+            batch_size=1000
+        ):
+            if update_query := self.make_update(wine):
+                operations.append(UpdateOne({"_id": wine["_id"]}, update_query))
+            if len(operations) >= 1000:
+                total += len(operations)
+                mongodb_obj.bulk_update_documents(
+                    collection=COLLECTION.WINE.value,
+                    bulk_operations=operations,
+                    ordered=False
+                )
+                operations = []
+        if operations:
+            total += len(operations)
+            mongodb_obj.bulk_update_documents(
+                collection=COLLECTION.WINE.value,
+                bulk_operations=operations,
+                ordered=False
+            )
+        return total
+
+
+history_price_packer = HistoryPricePacker()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "migrate"
+    if command == "migrate":
+        logging.info(f"packed history price of {history_price_packer.migrate()} wines")
+    else:
+        sys.exit(f"unknown command: {command}")
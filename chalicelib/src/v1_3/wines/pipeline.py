@@ -0,0 +1,207 @@
+from typing import Any, Dict, List
+
+from chalicelib.src.constants.common import COLLECTION, ITEM_TYPE, STATUS
+from chalicelib.src.tools.database import MongoDB, Param, PipelineTemplate
+
+from .constant import *
+
+
+def _required_fields(projection: Dict[str, Any]) -> List[str]:
+    return [key for key, value in projection.items() if value]
+
+
+JOIN_GLASS = MongoDB.make_lookup_query(
+    collection=COLLECTION.GLASS.value,
+    local_field="glass_type._id",
+    as_field="glass_type",
+    required_fields=_required_fields(JOIN_GLASS_PROJECTION)
+)
+JOIN_COUNTRY = MongoDB.make_lookup_query(
+    collection=COLLECTION.COUNTRY.value,
+    local_field="country._id",
+    as_field="country",
+    required_fields=_required_fields(JOIN_COUNTRY_PROJECTION)
+)
+JOIN_REGION = MongoDB.make_lookup_query(
+    collection=COLLECTION.REGION.value,
+    local_field="region._id",
+    as_field="region",
+    required_fields=_required_fields(JOIN_REGION_PROJECTION)
+)
+JOIN_PAIRING = MongoDB.make_lookup_query(
+    collection=COLLECTION.PAIRING.value,
+    local_field="pairing.items._id",
+    as_field="pairing_items",
+    required_fields=_required_fields(JOIN_PAIRING_PROJECTION)
+)
+JOIN_PRIMARY_AROMA = MongoDB.make_lookup_query(
+    collection=COLLECTION.AROMA.value,
+    local_field="aroma.primary._id",
+    as_field="aroma.primary",
+    required_fields=_required_fields(JOIN_AROMA_PROJECTION)
+)
+JOIN_SECONDARY_AROMA = MongoDB.make_lookup_query(
+    collection=COLLECTION.AROMA.value,
+    local_field="aroma.secondary._id",
+    as_field="aroma.secondary",
+    required_fields=_required_fields(JOIN_AROMA_PROJECTION)
+)
+JOIN_TERTIARY_AROMA = MongoDB.make_lookup_query(
+    collection=COLLECTION.AROMA.value,
+    local_field="aroma.tertiary._id",
+    as_field="aroma.tertiary",
+    required_fields=_required_fields(JOIN_AROMA_PROJECTION)
+)
+JOIN_TYPES = MongoDB.make_lookup_query(
+    collection=COLLECTION.TYPE.value,
+    local_field="types._id",
+    as_field="types",
+    required_fields=_required_fields(JOIN_TYPE_PROJECTION)
+)
+JOIN_GRAPE = MongoDB.make_lookup_query(
+    collection=COLLECTION.GRAPE.value,
+    local_field="grape.items._id",
+    as_field="grape.details",
+    required_fields=_required_fields(JOIN_GRAPE_PROJECTION)
+)
+JOIN_VINTAGES = MongoDB.make_lookup_query(
+    collection=COLLECTION.WINE.value,
+    local_field="slug",
+    foreign_field="slug",
+    as_field="available_vintages",
+    required_fields=_required_fields(JOIN_VINTAGE_PROJECTION)
+)
+JOIN_RECOMMENDED_WINE = MongoDB.make_lookup_query(
+    collection=COLLECTION.WINE.value,
+    local_field="module.recommended_wine.items._id",
+    as_field="module.recommended_wine.items",
+    required_fields=_required_fields(WINE_LIST_PROJECTION)
+)
+JOIN_CRITIC = {
+    "from": COLLECTION.CRITIC.value,
+    "localField": "critic._id",
+    "foreignField": "_id",
+    "as": "critic",
+    "pipeline": [
+        {
+            "$match": {
+                "status": {"$gte": STATUS.PUBLISHED.value}
+            }
+        },
+        {
+            "$project": JOIN_CRITIC_PROJECTION
+        }
+    ]
+}
+# 노출되는 critic review status
+CRITIC_REVIEW_STATUSES = [STATUS.PUBLISHED.value, -9201]
+
+JOIN_REVIEWS_WITHOUT_CRITIC = {
+    "from": COLLECTION.CRITIC_REVIEW.value,
+    "localField": "_id",
+    "foreignField": "wine._id",
+    "as": "critic_reviews",
+    "pipeline": [
+        {
+            "$match": {
+                "status": {"$in": CRITIC_REVIEW_STATUSES}
+            }
+        },
+        {
+            "$project": JOIN_REVIEW_PROJECTION
+        }
+    ]
+}
+JOIN_REVIEWS = {
+    **JOIN_REVIEWS_WITHOUT_CRITIC,
+    "pipeline": [
+        *JOIN_REVIEWS_WITHOUT_CRITIC["pipeline"],
+        {"$lookup": JOIN_CRITIC}
+    ]
+}
+
+# 와인 상세 조회 pipeline: $match만 요청마다 채움
+WINE_DETAIL_PIPELINE = PipelineTemplate([
+    Param("match", "$match"),
+    {"$limit": 1},
+    {"$project": WINE_DETAIL_PROJECTION},
+    {"$lookup": JOIN_VINTAGES},
+    {"$lookup": JOIN_PAIRING},
+    {"$lookup": JOIN_COUNTRY},
+    {"$lookup": JOIN_REVIEWS},
+    {"$lookup": JOIN_REGION},
+    {"$lookup": JOIN_GRAPE},
+    {"$lookup": JOIN_GLASS},
+    {"$lookup": JOIN_TYPES},
+    {"$lookup": JOIN_PRIMARY_AROMA},
+    {"$lookup": JOIN_SECONDARY_AROMA},
+    {"$lookup": JOIN_TERTIARY_AROMA},
+    {"$lookup": JOIN_RECOMMENDED_WINE},
+])
+
+# reference cache로 채우는 lookup (작은 collection: $lookup 대신 python dict 조회)
+WINE_REFERENCE_LOOKUPS = [
+    JOIN_PAIRING,
+    JOIN_COUNTRY,
+    JOIN_REGION,
+    JOIN_GRAPE,
+    JOIN_GLASS,
+    JOIN_TYPES,
+    JOIN_PRIMARY_AROMA,
+    JOIN_SECONDARY_AROMA,
+    JOIN_TERTIARY_AROMA,
+]
+REVIEW_REFERENCE_LOOKUPS = [JOIN_CRITIC]
+
+# 와인 상세 조회 pipeline (reference cache 사용 시): wine / critic review만 DB에서 join
+# (available_vintages는 wine_vintages에서 채움)
+WINE_DETAIL_BASE_PIPELINE = PipelineTemplate([
+    Param("match", "$match"),
+    {"$limit": 1},
+    {"$project": WINE_DETAIL_PROJECTION},
+    {"$lookup": JOIN_REVIEWS_WITHOUT_CRITIC},
+    {"$lookup": JOIN_RECOMMENDED_WINE},
+])
+
+
+# 와인 서비스의 조회 조건 (tools/database/indexes.py의 QUERY_SHAPES도 같은 함수로 만듦)
+def make_detail_query(id: str, is_slug: bool) -> Dict[str, Any]:
+    """
+        와인 상세 조회 조건 (_id 또는 slug)
+    """
+    if not is_slug:
+        return {"_id": id}
+    return {
+        "_id": {"$regex": id},
+        "slug": id,
+        "is_default": True,
+        "status": {"$ne": STATUS.DELETED.value}
+    }
+
+
+def make_redirect_query(id: str, is_slug: bool) -> Dict[str, Any]:
+    """
+        상세 조회에 실패한 id를 redirect할 기본 빈티지 조건
+        - _id: 빈티지를 뗀 slug의 기본 빈티지
+        - slug: redirections에 해당 slug가 있는 기본 빈티지
+    """
+    query = {
+        "status": {
+            "$gte": STATUS.PUBLISHED.value
+        },
+        "is_default": True
+    }
+    if not is_slug:
+        slug = "-".join(id.split("-")[:-1])
+        query["_id"] = {"$regex": slug}
+    else:
+        query["redirections"] = {"$in": [id]}
+    return query
+
+
+def make_reaction_query(user: str, item: str) -> Dict[str, Any]:
+    return {
+        "user": user,
+        "item": item,
+        "item_type": ITEM_TYPE.WINE.value
+    }
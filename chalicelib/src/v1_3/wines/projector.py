@@ -0,0 +1,252 @@
+"""
+    wine_detail_view projector
+
+    - 와인 상세 pipeline(WINE_DETAIL_PIPELINE)의 결과를 와인 단위로 미리 만들어 둠
+    - 참조하는 document(glass, region, aroma, grape, critic 등)가 바뀌면 해당 view만 다시 만듦
+    - 요청 경로에서는 wine_detail_view를 _id / slug로 한 번 조회하면 됨
+    - reference collection이 바뀌면 reference cache version도 함께 올림
+    - 와인이 바뀌면 wine_resolutions / wine_vintages / global_history_price_packed도 함께 갱신
+    - critic review / critic이 바뀌면 critic_review_stats도 함께 갱신
+    - 변경 직후의 document로 view를 만들어야 하므로 읽기는 모두 primary에서 함
+
+    python -m chalicelib.src.v1_3.wines.projector rebuild
+    python -m chalicelib.src.v1_3.wines.projector watch
+"""
+import logging
+import sys
+from typing import Any, Dict, List, Optional, Set
+
+from chalicelib.src.constants.common import COLLECTION, STATUS
+from chalicelib.src.tools.database import mongodb_obj, resolve_path
+from chalicelib.src.tools.reference import ReferenceCache
+from chalicelib.src.utils import get_now_timestamp
+
+from .critic import critic_review_stats
+from .history import history_price_packer
+from .pipeline import (REVIEW_REFERENCE_LOOKUPS, WINE_DETAIL_PIPELINE,
+                       WINE_REFERENCE_LOOKUPS)
+from .resolution import wine_resolver
+from .vintage import vintage_index
+
+VIEW_COLLECTION = COLLECTION.WINE_DETAIL_VIEW.value
+VIEW_META_FIELD = "_view"
+# _view.built_at은 상세 response의 version(ETag)으로 사용
+VIEW_PROJECTION = {f"{VIEW_META_FIELD}.references": 0}
+
+
+def _iter_lookups(stages: List[Any]) -> List[Dict[str, Any]]:
+    return [stage["$lookup"] for stage in stages if isinstance(stage, dict) and "$lookup" in stage]
+
+
+def _flatten(values: List[Any]) -> List[Any]:
+    flattened = []
+    for value in values:
+        flattened.extend(value if isinstance(value, list) else [value])
+    return [value for value in flattened if value is not None]
+
+
+def _make_reference(collection: str, field: str, value: Any) -> str:
+    return f"{collection}:{field}:{value}"
+
+
+# view를 다시 만들어야 하는 collection (wine 자신 + pipeline의 $lookup 대상)
+WATCHED_COLLECTIONS = sorted({
+    COLLECTION.WINE.value,
+    *[lookup["from"] for lookup in _iter_lookups(WINE_DETAIL_PIPELINE.stages)],
+    *[
+        nested["from"]
+        for lookup in _iter_lookups(WINE_DETAIL_PIPELINE.stages)
+        for nested in _iter_lookups(lookup.get("pipeline", []))
+    ],
+})
+REFERENCE_COLLECTIONS = {lookup["from"] for lookup in WINE_REFERENCE_LOOKUPS + REVIEW_REFERENCE_LOOKUPS}
+
+
+class WineDetailProjector:
+
+    def build(self, id: str) -> Optional[Dict[str, Any]]:
+        """
+            와인 하나의 view를 다시 만듦 (와인이 없으면 view 삭제)
+        """
+        db = mongodb_obj.primary()
+        wine = db.get_document(
+            collection=COLLECTION.WINE.value,
+            query={"_id": id},
+            projection={
+                "slug": 1,
+                "is_default": 1,
+                "status": 1,
+                **{lookup["localField"]: 1 for lookup in _iter_lookups(WINE_DETAIL_PIPELINE.stages)}
+            }
+        )
+        documents = db.aggregate_documents(
+            collection=COLLECTION.WINE.value,
+            pipelines=WINE_DETAIL_PIPELINE.bind(match={"_id": id})
+        ) if wine else []
+        if not documents:
+            db.delete_document(collection=VIEW_COLLECTION, query={"_id": id})
+            return None
+
+        document = {
+            **documents[0],
+            VIEW_META_FIELD: {
+                "slug": wine.get("slug"),
+                "is_default": wine.get("is_default"),
+                "status": wine.get("status"),
+                "references": sorted(self._collect_references(wine, WINE_DETAIL_PIPELINE.stages)),
+                "built_at": get_now_timestamp(),
+            }
+        }
+        db.replace_document(collection=VIEW_COLLECTION, query={"_id": id}, document=document)
+        return document
+
+    def rebuild(self) -> int:
+        total = 0
+        for wine in mongodb_obj.primary().iter_documents(
+            collection=COLLECTION.WINE.value,
+            query={},
+            projection={"_id": 1},
+            batch_size=1000
+        ):
+            self.build(wine["_id"])
+            total += 1
+        return total
+
+    def handle_change(self, collection: str, id: Any, document: Optional[Dict[str, Any]] = None) -> Set[str]:
+        """
+            변경된 document를 참조하는 view를 다시 만듦
+            - document: 변경 후 document (삭제된 경우 None)
+        """
+        if collection == COLLECTION.WINE.value:
+            wine_resolver.sync_wine(id=id, document=document)
+            vintage_index.sync_wine(id=id, document=document)
+            history_price_packer.sync_wine(id=id, document=document)
+        elif collection == COLLECTION.CRITIC_REVIEW.value:
+            critic_review_stats.sync_review(id=id, document=document)
+        elif collection == COLLECTION.CRITIC.value:
+            critic_review_stats.sync_critic(critic_id=id)
+
+        db = mongodb_obj.primary()
+        previous_slug = None
+        if collection == COLLECTION.WINE.value:
+            # 기존 view의 slug: 삭제되거나 slug가 바뀐 와인은 이전 slug의 다른 빈티지 view도 다시 만듦
+            view = db.get_document(
+                collection=VIEW_COLLECTION,
+                query={"_id": id},
+                projection={f"{VIEW_META_FIELD}.slug": 1}
+            )
+            previous_slug = view.get(VIEW_META_FIELD, {}).get("slug")
+
+        if collection in REFERENCE_COLLECTIONS:
+            # 컨테이너의 reference cache도 다음 TTL 확인 때 다시 적재되도록 version을 올림
+            ReferenceCache.bump_version(collection)
+
+        references = {_make_reference(collection, "_id", id)}
+        for lookup in self._iter_all_lookups():
+            if lookup["from"] == collection and lookup["foreignField"] != "_id" and document:
+                references.update(
+                    _make_reference(collection, lookup["foreignField"], value)
+                    for value in _flatten(resolve_path(document, lookup["foreignField"]))
+                )
+        if previous_slug is not None:
+            references.add(_make_reference(collection, "slug", previous_slug))
+
+        ids = {
+            view["_id"]
+            for view in db.iter_documents(
+                collection=VIEW_COLLECTION,
+                query={f"{VIEW_META_FIELD}.references": {"$in": sorted(references)}},
+                projection={"_id": 1}
+            )
+        }
+        if collection == COLLECTION.WINE.value:
+            ids.add(id)
+        for wine_id in ids:
+            self.build(wine_id)
+        return ids
+
+    def watch(self):
+        """
+            change stream을 따라가면서 view를 갱신 (resume token은 projector_states에 저장)
+        """
+        state_query = {"_id": VIEW_COLLECTION}
+        state = mongodb_obj.primary().get_document(
+            collection=COLLECTION.PROJECTOR_STATE.value,
+            query=state_query,
+            projection={"resume_token": 1}
+        )
+        with mongodb_obj.watch(collections=WATCHED_COLLECTIONS, resume_after=state.get("resume_token")) as stream:
+            for change in stream:
+                if change["operationType"] in ["insert", "update", "replace", "delete"]:
+                    ids = self.handle_change(
+                        collection=change["ns"]["coll"],
+                        id=change["documentKey"]["_id"],
+                        document=change.get("fullDocument")
+                    )
+                    logging.info(f"{change['operationType']} {change['ns']['coll']} {change['documentKey']['_id']}: rebuilt {len(ids)} views")
+                mongodb_obj.upsert_document(
+                    collection=COLLECTION.PROJECTOR_STATE.value,
+                    query=state_query,
+                    update_query={"$set": {"resume_token": change["_id"], "updated_at": get_now_timestamp()}}
+                )
+
+    def _collect_references(self, document: Dict[str, Any], stages: List[Any]) -> Set[str]:
+        """
+            view가 참조하는 document 목록 ({collection}:{field}:{value})
+            - 중첩 $lookup(critic_reviews -> critics)은 join 대상 document를 읽어서 이어서 수집
+        """
+        references = set()
+        for lookup in _iter_lookups(stages):
+            values = _flatten(resolve_path(document, lookup["localField"]))
+            references.update(_make_reference(lookup["from"], lookup["foreignField"], value) for value in values)
+
+            nested = _iter_lookups(lookup.get("pipeline", []))
+            if nested and values:
+                for joined in mongodb_obj.primary().iter_documents(
+                    collection=lookup["from"],
+                    query={lookup["foreignField"]: {"$in": values}},
+                    projection={"_id": 1, **{item["localField"]: 1 for item in nested}}
+                ):
+                    references.add(_make_reference(lookup["from"], "_id", joined["_id"]))
+                    references.update(self._collect_references(joined, lookup["pipeline"]))
+        return references
+
+    @staticmethod
+    def _iter_all_lookups() -> List[Dict[str, Any]]:
+        lookups = _iter_lookups(WINE_DETAIL_PIPELINE.stages)
+        return lookups + [nested for lookup in lookups for nested in _iter_lookups(lookup.get("pipeline", []))]
+
+
+def make_view_query(id: str, is_slug: bool) -> Dict[str, Any]:
+    """
+        wine_detail_view 조회 조건 (make_detail_query의 slug 조건을 _view 기준으로)
+    """
+    if not is_slug:
+        return {"_id": id}
+    return {
+        f"{VIEW_META_FIELD}.slug": id,
+        f"{VIEW_META_FIELD}.is_default": True,
+        f"{VIEW_META_FIELD}.status": {"$ne": STATUS.DELETED.value},
+    }
+
+
+def get_view_document(id: str, is_slug: bool) -> Optional[Dict[str, Any]]:
+    """
+        wine_detail_view 조회 (view가 아직 없으면 None)
+    """
+    return mongodb_obj.get_document(
+        collection=VIEW_COLLECTION,
+        query=make_view_query(id, is_slug),
+        projection=VIEW_PROJECTION
+    ) or None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "rebuild"
+    if command == "rebuild":
+        logging.info(f"rebuilt {WineDetailProjector().rebuild()} wine detail views")
+    elif command == "watch":
+        WineDetailProjector().watch()
+    else:
+        sys.exit(f"unknown command: {command}")
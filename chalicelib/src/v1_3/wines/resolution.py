@@ -0,0 +1,181 @@
+"""
+    wine_resolutions
+
+    - 요청 id(slug / _id / redirection)를 canonical 와인(_id, slug, is_default)으로 바꾸는 table
+      - id:{_id}           모든 와인
+      - slug:{slug}        slug의 기본 빈티지 (is_default, 삭제되지 않은 와인)
+      - alias:{redirection} 기본 빈티지의 redirections
+    - regex 조회($regex는 _id index를 쓰지 못함) 대신 _id point read 한 번으로 찾고, 결과는 컨테이너 메모리에 둠
+    - 와인이 바뀌면 projector가 sync_wine으로 갱신하고, 누락이나 불일치는 rebuild로 다시 만듦
+      (entry가 바뀌면 version을 올려서 다른 컨테이너의 메모리도 check interval(30초) 안에 비움)
+    - 없는 id의 404 / 301 결정은 wine_negative_cache에 잠깐 기억 (entry가 생기거나 바뀌면 version을 올려서 비움)
+
+    python -m chalicelib.src.v1_3.wines.resolution rebuild
+"""
+import logging
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import DeleteMany, ReplaceOne
+
+from chalicelib.setting import (WINE_NEGATIVE_CACHE, WINE_NEGATIVE_CACHE_SIZE,
+                                WINE_NEGATIVE_CACHE_TTL_SECONDS,
+                                WINE_RESOLUTION_CACHE_SIZE,
+                                WINE_RESOLUTION_TTL_SECONDS)
+from chalicelib.src.constants.common import COLLECTION, STATUS
+from chalicelib.src.tools.cache import NegativeCache, VersionedCache
+from chalicelib.src.tools.database import mongodb_obj
+from chalicelib.src.utils import get_now_timestamp
+
+RESOLUTION_COLLECTION = COLLECTION.WINE_RESOLUTION.value
+RESOLUTION_SOURCE_PROJECTION = {"_id": 1, "slug": 1, "is_default": 1, "status": 1, "redirections": 1}
+RESOLUTION_CACHE_NAME = "wine_resolution"
+NEGATIVE_CACHE_NAME = "wine_not_found"
+
+
+class WineResolver:
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300):
+        self._entries = VersionedCache(
+            name=RESOLUTION_CACHE_NAME,
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds
+        )
+
+    @staticmethod
+    def make_key(kind: str, value: str) -> str:
+        return f"{kind}:{value}"
+
+    @staticmethod
+    def make_entries(document: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+            와인 document 하나에서 나오는 resolution entry 목록
+        """
+        entry = {
+            "wine": document["_id"],
+            "slug": document.get("slug"),
+            "is_default": document.get("is_default", False),
+            "status": document.get("status"),
+            "updated_at": get_now_timestamp(),
+        }
+        entries = [{"_id": WineResolver.make_key("id", document["_id"]), **entry}]
+        if entry["is_default"] and entry["slug"] and entry["status"] != STATUS.DELETED.value:
+            entries.append({"_id": WineResolver.make_key("slug", entry["slug"]), **entry})
+            entries.extend(
+                {"_id": WineResolver.make_key("alias", alias), **entry}
+                for alias in document.get("redirections") or []
+            )
+        return entries
+
+    def get(self, kind: str, value: str) -> Optional[Dict[str, Any]]:
+        key = self.make_key(kind, value)
+        if (entry := self._entries.get(key)) is None:
+            entry = mongodb_obj.get_document(
+                collection=RESOLUTION_COLLECTION,
+                query={"_id": key},
+                projection={"_id": 0, "wine": 1, "slug": 1, "is_default": 1, "status": 1}
+            )
+            if not entry:
+                return None
+            self._entries.put(key, entry)
+        return entry
+
+    def resolve_detail(self, id: str, is_slug: bool) -> Optional[str]:
+        """
+            상세 조회할 와인 _id (slug면 기본 빈티지)
+        """
+        if not is_slug:
+            entry = self.get("id", id)
+        elif (entry := self.get("slug", id)) and entry["status"] == STATUS.DELETED.value:
+            entry = None
+        return entry["wine"] if entry else None
+
+    def resolve_redirect(self, id: str, is_slug: bool) -> Optional[str]:
+        """
+            상세 조회에 실패했을 때 redirect할 slug
+            - _id: 빈티지를 뗀 slug의 기본 빈티지
+            - slug: redirections에 해당 slug가 있는 기본 빈티지
+        """
+        if not is_slug:
+            entry = self.get("slug", "-".join(id.split("-")[:-1]))
+        else:
+            entry = self.get("alias", id)
+        if entry and entry["is_default"] and (entry["status"] or 0) >= STATUS.PUBLISHED.value:
+            return entry["slug"]
+        return None
+
+    def sync_wine(self, id: str, document: Optional[Dict[str, Any]]):
+        """
+            와인 하나의 entry를 다시 만듦 (삭제된 경우 document=None)
+        """
+        entries = self.make_entries(document) if document else []
+        previous = {
+            self._make_state(entry)
+            for entry in mongodb_obj.primary().iter_documents(
+                collection=RESOLUTION_COLLECTION,
+                query={"wine": id},
+                projection={"_id": 1, "slug": 1, "is_default": 1, "status": 1}
+            )
+        }
+        operations = [DeleteMany({"wine": id})]
+        operations.extend(ReplaceOne({"_id": entry["_id"]}, entry, upsert=True) for entry in entries)
+        mongodb_obj.bulk_update_documents(collection=RESOLUTION_COLLECTION, bulk_operations=operations)
+        self._entries.clear()
+
+        # 와인 / slug / redirection이 생기거나 바뀌면 (draft 발행, 삭제 취소, 기본 빈티지 변경 등)
+        # 모든 컨테이너의 resolution / negative cache를 비우도록 version을 올림
+        if {self._make_state(entry) for entry in entries} != previous:
+            VersionedCache.bump_version(RESOLUTION_CACHE_NAME)
+            NegativeCache.bump_version(NEGATIVE_CACHE_NAME)
+
+    def rebuild(self) -> int:
+        started_at = get_now_timestamp()
+        total = 0
+        operations = []
+        for document in mongodb_obj.iter_documents(
+            collection=COLLECTION.WINE.value,
+            query={},
+            projection=RESOLUTION_SOURCE_PROJECTION,
+            batch_size=1000
+        ):
+            operations.extend(
+                ReplaceOne({"_id": entry["_id"]}, entry, upsert=True)
+                for entry in self.make_entries(document)
+            )
+            total += 1
+            if len(operations) >= 1000:
+                mongodb_obj.bulk_update_documents(collection=RESOLUTION_COLLECTION, bulk_operations=operations, ordered=False)
+                operations = []
+        # 다시 만들지 않은 entry(더 이상 기본 빈티지가 아닌 slug 등)는 삭제
+        operations.append(DeleteMany({"updated_at": {"$lt": started_at}}))
+        mongodb_obj.bulk_update_documents(collection=RESOLUTION_COLLECTION, bulk_operations=operations, ordered=False)
+        self._entries.clear()
+        VersionedCache.bump_version(RESOLUTION_CACHE_NAME)
+        NegativeCache.bump_version(NEGATIVE_CACHE_NAME)
+        return total
+
+    @staticmethod
+    def _make_state(entry: Dict[str, Any]) -> Tuple[Any, ...]:
+        """
+            404 / 301 결정에 영향을 주는 entry 값
+        """
+        return entry["_id"], entry.get("slug"), entry.get("is_default", False), entry.get("status")
+
+
+wine_resolver = WineResolver(max_entries=WINE_RESOLUTION_CACHE_SIZE, ttl_seconds=WINE_RESOLUTION_TTL_SECONDS)
+
+# 없는 와인 id -> redirect할 slug ("": 404)
+wine_negative_cache = NegativeCache(
+    name=NEGATIVE_CACHE_NAME,
+    max_entries=WINE_NEGATIVE_CACHE_SIZE,
+    ttl_seconds=WINE_NEGATIVE_CACHE_TTL_SECONDS
+) if WINE_NEGATIVE_CACHE else None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "rebuild"
+    if command == "rebuild":
+        logging.info(f"rebuilt resolutions of {wine_resolver.rebuild()} wines")
+    else:
+        sys.exit(f"unknown command: {command}")
@@ -1,15 +1,24 @@
+from contextvars import ContextVar
+from functools import partial
 from http import HTTPStatus
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from chalicelib.setting import DOMAIN
-from chalicelib.src.constants.common import (COLLECTION, ITEM_TYPE, REACTION,
-                                             STATUS)
+from chalicelib.setting import (CRITIC_REVIEW_STATS, DOMAIN, REFERENCE_CACHE,
+                                RESPONSE_CACHE, RESPONSE_CACHE_MAX_BYTES,
+                                RESPONSE_CACHE_MAX_ENTRIES,
+                                RESPONSE_CACHE_TTL_SECONDS, WINE_DETAIL_VIEW,
+                                WINE_RESOLUTION)
+from chalicelib.src.constants.common import COLLECTION, ITEM_TYPE, REACTION
 from chalicelib.src.constants.wine import REVIEW_QUALITY
-from chalicelib.src.tools.database import mongodb_obj
+from chalicelib.src.tools.cache import ResponseCache
+from chalicelib.src.tools.counter import REACTION_PROJECTION, InteractionCounter
+from chalicelib.src.tools.database import (RequestScope, current_scope, gather,
+                                          mongodb_obj)
+from chalicelib.src.tools.history import HISTORY_BUCKETS, PriceHistory
 from chalicelib.src.tools.processor import PriceProcessor
-from chalicelib.src.utils import (convert_date_to_string,
+from chalicelib.src.tools.reference import reference_cache
+from chalicelib.src.utils import (EncodedResponse, convert_date_to_string,
                                   convert_timestamp_to_string,
-                                  decrease_days_to_timestamp,
                                   get_now_timestamp)
 from chalicelib.src.validators.field import (SEO, AdditionalMeta, Breadcrumb,
                                              Element, FullImage, Languages,
@@ -36,96 +45,205 @@ from chalicelib.static.wine import (COST_EFFECTIVENESS, CRITIC_DESCRIPTION,
                                     TECHNICAL_DESCRIPTION)
 
 from .constant import *
+from .critic import CriticReviewStats, critic_review_stats
+from .pipeline import (REVIEW_REFERENCE_LOOKUPS, WINE_DETAIL_BASE_PIPELINE,
+                       WINE_DETAIL_PIPELINE, WINE_REFERENCE_LOOKUPS,
+                       make_detail_query, make_reaction_query,
+                       make_redirect_query)
+from .projector import VIEW_META_FIELD, get_view_document
 from .request import (GetWineDetailRequest, GetWineReactionRequest,
                       WineReactionRequest)
+from .resolution import wine_negative_cache, wine_resolver
 from .response import GetWineDetailResponse, GetWineReactionResponse
+from .vintage import vintage_index
+
+# RESPONSE_CACHE: 렌더링된 와인 상세 response를 (_id, updated_at, language, location, price reference version) 단위로 재사용
+detail_response_cache = ResponseCache(
+    name="wine_detail",
+    max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=RESPONSE_CACHE_MAX_BYTES,
+    ttl_seconds=RESPONSE_CACHE_TTL_SECONDS
+) if RESPONSE_CACHE else None
+
+
+def _register_reference_lookups():
+    """
+        REFERENCE_CACHE: 작은 collection은 $lookup 대신 reference cache에서 채움
+    """
+    for lookup in WINE_REFERENCE_LOOKUPS + REVIEW_REFERENCE_LOOKUPS:
+        reference_cache.register_lookup(lookup)
+
+
+_register_reference_lookups()
+
+# 요청 안에서 get_version이 찾은 (request scope, 요청 id, document) - get_item에서 다시 읽지 않음
+_REQUEST_DETAIL: ContextVar[Optional[Tuple[RequestScope, str, Dict[str, Any]]]] = ContextVar("wine_detail", default=None)
+# 요청 안에서 negative cache를 읽은 결과 (request scope, 요청 id, redirect slug) - get_version / get_item이 한 번만 읽음
+_REQUEST_NOT_FOUND: ContextVar[Optional[Tuple[RequestScope, str, Optional[str]]]] = ContextVar("wine_not_found", default=None)
 
 
 class WineService(PriceProcessor):
     
-    def get_item(self, input: GetWineDetailRequest) -> Tuple[GetWineDetailResponse, HTTPStatus]:
+    def get_item(self, input: GetWineDetailRequest) -> Tuple[Union[GetWineDetailResponse, EncodedResponse], HTTPStatus]:
         """
             와인 상세 정보 조회
         """
         
+        # 최근에 없었던 id는 DB 조회 없이 같은 결과(404 / 301)로 응답
+        if (slug := self._get_not_found_slug(input.id)) is not None:
+            return self._make_not_found_response(id=input.id, language=input.language, slug=slug)
+        
         if document := self._fetch_data_detail(id=input.id):
-            return self._handle_response_detail(location=input.location,
-                                                language=input.language,
-                                                document=document), HTTPStatus.OK
+            if not detail_response_cache:
+                return self._handle_response_detail(location=input.location,
+                                                    language=input.language,
+                                                    document=document), HTTPStatus.OK
+            
+            # response는 document / language / location / 환율(price reference version)으로만 결정됨
+            # (view는 참조하는 document가 바뀌어도 updated_at이 그대로이므로 built_at도 포함)
+            # identity / gzip body를 같이 저장해서 hit 시 직렬화 / 압축도 생략
+            key = (
+                document["_id"],
+                document.get("updated_at"),
+                document.get(VIEW_META_FIELD, {}).get("built_at"),
+                input.language,
+                input.location,
+                self.price_reference.version
+            )
+            response = detail_response_cache.get_or_set(
+                key,
+                lambda: EncodedResponse.from_model(
+                    self._handle_response_detail(location=input.location,
+                                                 language=input.language,
+                                                 document=document)
+                )
+            )
+            return response, HTTPStatus.OK
             
         ## DB NOT FOUND
-        query = {
-            "status": {
-                "$gte": STATUS.PUBLISHED.value
-            },
-            "is_default": True
-        }
-        if not self.check_if_id_is_slug(input.id):
-            # _id로 찾을 수 없다면 slug로 찾아보기
-            words = input.id.split("-")
-            slug = "-".join(words[:-1])
-            query["_id"] = {"$regex": slug}
-        else:
-            # slug로도 찾을 수 없으면 redirection 여부 체크
-            query["redirections"] = {"$in": [input.id]}            
-        
-        if document := mongodb_obj.get_document(
-            query=query,
-            collection=COLLECTION.WINE.value,
-            projection=WINE_REDIRECT_PROJECTION
-        ):
-            redirect = RedirectResponse.make_redirect_url(f"/wine/{document['slug']}", input.language)
+        slug = self._fetch_redirect_slug(id=input.id) or ""
+        if wine_negative_cache:
+            wine_negative_cache.put(input.id, slug)
+        return self._make_not_found_response(id=input.id, language=input.language, slug=slug)
+    
+    @staticmethod
+    def _get_not_found_slug(id: str) -> Optional[str]:
+        """
+            negative cache에 남은 redirect slug (없으면 None)
+            - get_version / get_item이 같은 요청에서 hit / miss를 두 번 세지 않도록 요청 안에서는 한 번만 읽음
+        """
+        if not wine_negative_cache:
+            return None
+        scope = current_scope()
+        if scope is not None and (pinned := _REQUEST_NOT_FOUND.get()) is not None and pinned[0] is scope and pinned[1] == id:
+            return pinned[2]
+        slug = wine_negative_cache.get(id)
+        if scope is not None:
+            _REQUEST_NOT_FOUND.set((scope, id, slug))
+        return slug
+    
+    @staticmethod
+    def _make_not_found_response(id: str, language: str, slug: str) -> Tuple[RedirectResponse, HTTPStatus]:
+        if slug:
+            redirect = RedirectResponse.make_redirect_url(f"/wine/{slug}", language)
             return RedirectResponse(redirect=redirect), HTTPStatus.MOVED_PERMANENTLY
         
-        redirect = RedirectResponse.make_redirect_url(f"/wine", input.language)
-        message = f"wine not found: {input.id}"
+        redirect = RedirectResponse.make_redirect_url(f"/wine", language)
+        message = f"wine not found: {id}"
         return RedirectResponse(redirect=redirect, message=message), HTTPStatus.NOT_FOUND
     
+    def get_version(self, input: GetWineDetailRequest) -> Optional[str]:
+        """
+            와인 상세 response의 version (ETag용, 와인이 없으면 None)
+            - detail_response_cache key와 같은 기준: 와인 document의 updated_at + price reference version
+            - view를 쓰면 참조 document(critic review / 빈티지 등) 변경도 반영되도록 built_at도 포함
+            - 찾은 document는 요청 단위로 남겨서 get_item이 id 해석 / view 조회를 다시 하지 않음
+        """
+        if self._get_not_found_slug(input.id) is not None:
+            return None
+        if not (document := self._fetch_version_document(input.id)):
+            return None
+        built_at = document.get(VIEW_META_FIELD, {}).get("built_at")
+        # 가격은 환율로 환산되므로 price reference version도 포함
+        return f"{document['_id']}:{document.get('updated_at')}:{built_at}:{self.price_reference.version}"
+    
+    def _fetch_version_document(self, id: str) -> Dict[str, Any]:
+        """
+            ETag version을 만들 document (없으면 {})
+            - view가 있으면 view document 전체 (get_item은 그대로 렌더링)
+            - 없으면 와인 document의 _id / updated_at만 (get_item은 slug 대신 이 _id로 pipeline 실행)
+        """
+        document = {}
+        if resolved := self._resolve_detail_id(id):
+            is_slug = self.check_if_id_is_slug(resolved)
+            if WINE_DETAIL_VIEW:
+                document = get_view_document(id=resolved, is_slug=is_slug) or {}
+            if not document:
+                document = mongodb_obj.get_document(
+                    collection=COLLECTION.WINE.value,
+                    query=make_detail_query(id=resolved, is_slug=is_slug),
+                    projection=WINE_VERSION_PROJECTION
+                )
+        if (scope := current_scope()) is not None:
+            _REQUEST_DETAIL.set((scope, id, document))
+        return document
+    
+    @staticmethod
+    def _get_version_document(id: str) -> Optional[Dict[str, Any]]:
+        """
+            같은 요청의 get_version에서 찾은 document (get_version을 거치지 않았으면 None)
+        """
+        scope = current_scope()
+        if scope is not None and (pinned := _REQUEST_DETAIL.get()) is not None and pinned[0] is scope and pinned[1] == id:
+            return pinned[2]
+        return None
+    
     def update_reaction(self, input: WineReactionRequest) -> Tuple[DefaultResponse, HTTPStatus]:
         """
             와인 리액션 (좋아요, 싫어요, 북마크)
+            - 요청마다 바로 씀 (write-behind batch 없음): Lambda 컨테이너는 한 번에 요청 하나만 처리하므로
+              요청 종료 시 flush하면 모을 write가 없고, 요청 사이에 남겨두면 컨테이너가 멈추거나 회수될 때 유실됨
         """
         
-        query = {
-            "user": input.user, 
-            "item": input.id,
-            "item_type": ITEM_TYPE.WINE.value
-        }
+        query = make_reaction_query(user=input.user, item=input.id)
         if input.action == REACTION.LIKE:
-            update = {
-                "like": {
-                    "$cond": {
-                        "if": {"$ne": ["$like", 1]},
-                        "then": 1,
-                        "else": 0
-                    }
-                }
-            }
+            field, value = "like", 1
         elif input.action == REACTION.DISLIKE:
-            update = {
-                "like": {
-                    "$cond": {
-                        "if": {"$ne": ["$like", -1]},
-                        "then": -1,
-                        "else": 0
-                    }
-                }
-            }
+            field, value = "like", -1
         elif input.action == REACTION.BOOKMARK:
-            update = {
-                "bookmark": {
-                    "$cond": {
-                        "if": {"$ne": ["$bookmark", 1]},
-                        "then": 1,
-                        "else": 0
-                    }
+            field, value = "bookmark", 1
+        # 같은 리액션이면 취소(0), 아니면 설정 (toggle)
+        update = {
+            field: {
+                "$cond": {
+                    "if": {"$ne": [f"${field}", value]},
+                    "then": value,
+                    "else": 0
                 }
             }
+        }
         
-        mongodb_obj.upsert_document(
-            query=query,
-            update_query=[{"$set": update}],
-            collection=COLLECTION.INTERACTION.value)
+        def write(session):
+            before = mongodb_obj.find_and_upsert_document(
+                collection=COLLECTION.INTERACTION.value,
+                query=query,
+                update_query=[{"$set": update}],
+                projection=REACTION_PROJECTION,
+                session=session
+            )
+            # counter 갱신 (변경 전후 상태의 차이만큼 증감)
+            # 변경 후 상태는 변경 전 상태에 같은 toggle을 적용한 것이고, interaction과 counter는 같은 transaction으로 씀
+            before = before or {}
+            deltas = InteractionCounter.make_deltas(
+                user=input.user,
+                item_type=ITEM_TYPE.WINE.value,
+                item=input.id,
+                before=before,
+                after={**before, field: 0 if before.get(field) == value else value}
+            )
+            InteractionCounter.apply_deltas(deltas, session=session)
+
+        mongodb_obj.run_transaction(write)
         return DefaultResponse(status=HTTPStatus.OK), HTTPStatus.OK
     
     def get_reaction(self, input: GetWineReactionRequest) -> Tuple[GetWineReactionResponse, HTTPStatus]:
@@ -133,22 +251,18 @@ class WineService(PriceProcessor):
             와인 리액션 조회
         """
         
-        # update article
-        query = {
-            "user": input.user,
-            "item": input.id,
-            "item_type": "wine"
-        }
+        query = make_reaction_query(user=input.user, item=input.id)
         projection = {
             "_id": 0,
             "like": 1,
             "bookmark": 1
         }
-        if document := mongodb_obj.get_document(
+        document = mongodb_obj.get_document(
             query=query,
             projection=projection,
             collection=COLLECTION.INTERACTION.value,
-        ):
+        )
+        if document:
             like = document.get("like") == 1
             dislike = document.get("like") == -1
             bookmark = document.get("bookmark") == 1
@@ -172,145 +286,86 @@ class WineService(PriceProcessor):
             MongoDB에서 ID에 해당하는 와인 상세 정보 조회
             - ID가 실제 _id일 수도 있고, slug일 수도 있음
         """
+        if (pinned := self._get_version_document(id)) is not None:
+            # get_version에서 찾은 document 재사용 (view document면 그대로, 아니면 해석된 _id로 pipeline 실행)
+            if not pinned or VIEW_META_FIELD in pinned:
+                return pinned or None
+            id = pinned["_id"]
+        elif not (id := self._resolve_detail_id(id)):
+            return None
+        
+        is_slug = self.check_if_id_is_slug(id)
         
-        # query = {"status": {"$gte": STATUS.PUBLISHED.value}}
-        query = {}
-        if not self.check_if_id_is_slug(id):
-            query.update({"_id": id})
+        # projector가 만든 read model이 있으면 point read로 끝냄
+        if WINE_DETAIL_VIEW and pinned is None and (document := get_view_document(id=id, is_slug=is_slug)):
+            return document
+        
+        def fetch() -> List[Dict[str, Any]]:
+            return mongodb_obj.aggregate_documents(
+                collection=COLLECTION.WINE.value,
+                pipelines=self.make_detail_pipeline(id=id)
+            )
+        
+        # 와인 document 없이 id만으로 할 수 있는 조회는 pipeline과 동시에 실행
+        vintages = None
+        if REFERENCE_CACHE and is_slug:
+            documents, vintages = gather(fetch, lambda: vintage_index.get(id))
+        elif CRITIC_REVIEW_STATS and not is_slug:
+            # _handle_response_detail의 critic_review_stats.get은 요청 단위 identity map에서 읽음
+            documents, _ = gather(fetch, lambda: critic_review_stats.get(id))
         else:
-            query.update({
-                "_id": {"$regex": id},
-                "slug": id,
-                "is_default": True,
-                "status": {"$ne": STATUS.DELETED.value}
-            })
-            
-        join_glass = self._make_lookup_query(
-            collection=COLLECTION.GLASS,
-            local_field="glass_type._id",
-            as_field="glass_type",
-            required_fields=[key for key, value in JOIN_GLASS_PROJECTION.items() if value]
-        )
-        join_country = self._make_lookup_query(
-            collection=COLLECTION.COUNTRY,
-            local_field="country._id",
-            as_field="country",
-            required_fields=[key for key, value in JOIN_COUNTRY_PROJECTION.items() if value]
-        )
-        join_region = self._make_lookup_query(
-            collection=COLLECTION.REGION,
-            local_field="region._id",
-            as_field="region",
-            required_fields=[key for key, value in JOIN_REGION_PROJECTION.items() if value]
-        )
-        join_pairing = self._make_lookup_query(
-            collection=COLLECTION.PAIRING,
-            local_field="pairing.items._id",
-            as_field="pairing_items",
-            required_fields=[key for key, value in JOIN_PAIRING_PROJECTION.items() if value]
-        )
-        join_primary_aroma = self._make_lookup_query(
-            collection=COLLECTION.AROMA,
-            local_field="aroma.primary._id",
-            as_field="aroma.primary",
-            required_fields=[key for key, value in JOIN_AROMA_PROJECTION.items() if value]
-        )
-        join_secondary_aroma = self._make_lookup_query(
-            collection=COLLECTION.AROMA,
-            local_field="aroma.secondary._id",
-            as_field="aroma.secondary",
-            required_fields=[key for key, value in JOIN_AROMA_PROJECTION.items() if value]
-        )
-        join_tertiary_aroma = self._make_lookup_query(
-            collection=COLLECTION.AROMA,
-            local_field="aroma.tertiary._id",
-            as_field="aroma.tertiary",
-            required_fields=[key for key, value in JOIN_AROMA_PROJECTION.items() if value]
-        )
-        join_types = self._make_lookup_query(
-            collection=COLLECTION.TYPE,
-            local_field="types._id",
-            as_field="types",
-            required_fields=[key for key, value in JOIN_TYPE_PROJECTION.items() if value]
-        )
-        join_grape = self._make_lookup_query(
-            collection=COLLECTION.GRAPE,
-            local_field="grape.items._id",
-            as_field="grape.details",
-            required_fields=[key for key, value in JOIN_GRAPE_PROJECTION.items() if value],
-        )
-        join_vintages = self._make_lookup_query(
-            collection=COLLECTION.WINE,
-            local_field="slug",
-            foreign_field="slug",
-            required_fields=[key for key, value in JOIN_VINTAGE_PROJECTION.items() if value],
-            as_field="available_vintages",
-        )
-        join_recommended_wine = self._make_lookup_query(
-            collection=COLLECTION.WINE,
-            local_field="module.recommended_wine.items._id",
-            as_field="module.recommended_wine.items",
-            required_fields=[key for key, value in WINE_LIST_PROJECTION.items() if value],
-        )
-        join_reviews = {
-            "from": COLLECTION.CRITIC_REVIEW.value,
-            "localField": "_id",
-            "foreignField": "wine._id",
-            "as": "critic_reviews",
-            "pipeline": [
-                {
-                    "$match": {
-                        "status": {"$in": [STATUS.PUBLISHED.value, -9201]}
-                    }    
-                },
-                {
-                    "$project": JOIN_REVIEW_PROJECTION
-                },
-                {
-                    "$lookup": {
-                        "from": COLLECTION.CRITIC.value,
-                        "localField": "critic._id",
-                        "foreignField": "_id",
-                        "as": "critic",
-                        "pipeline": [
-                            {
-                                "$match": {
-                                    "status": {"$gte": STATUS.PUBLISHED.value}
-                                }  
-                            },
-                            {
-                                "$project": JOIN_CRITIC_PROJECTION
-                            }
-                        ]
-                    }
-                }
-            ]
-        }
-        pipelines = [
-            {"$match": query},
-            {"$limit": 1},
-            {"$project": WINE_DETAIL_PROJECTION},
-            {"$lookup": join_vintages},
-            {"$lookup": join_pairing},
-            {"$lookup": join_country},
-            {"$lookup": join_reviews},
-            {"$lookup": join_region},
-            {"$lookup": join_grape},
-            {"$lookup": join_glass},
-            {"$lookup": join_types},
-            {"$lookup": join_primary_aroma},
-            {"$lookup": join_secondary_aroma},
-            {"$lookup": join_tertiary_aroma},
-            {"$lookup": join_recommended_wine},
-        ]
+            documents = fetch()
         
         # OK
-        if documents := mongodb_obj.aggregate_documents(
-            collection=COLLECTION.WINE.value,
-            pipelines=pipelines
-        ):
-            return documents[0]
+        if documents:
+            document = documents[0]
+            if REFERENCE_CACHE:
+                reference_cache.resolve(document, WINE_REFERENCE_LOOKUPS)
+                for review in document.get("critic_reviews", []):
+                    reference_cache.resolve(review, REVIEW_REFERENCE_LOOKUPS)
+                if vintages is None:
+                    vintages = vintage_index.get(document["slug"]) if document.get("slug") else []
+                document["available_vintages"] = list(vintages)
+            return document
         return None
+    
+    def _resolve_detail_id(self, id: str) -> Optional[str]:
+        """
+            WINE_RESOLUTION: slug를 wine_resolutions에서 기본 빈티지 _id로 바꿈 (없는 와인이면 None)
+        """
+        if not WINE_RESOLUTION:
+            return id
+        return wine_resolver.resolve_detail(id=id, is_slug=self.check_if_id_is_slug(id))
+    
+    def _fetch_redirect_slug(self, id: str) -> Optional[str]:
+        """
+            상세 조회에 실패한 id를 redirect할 slug
+            - _id: 빈티지를 뗀 slug의 기본 빈티지
+            - slug: redirections에 해당 slug가 있는 기본 빈티지
+        """
+        if WINE_RESOLUTION:
+            return wine_resolver.resolve_redirect(id=id, is_slug=self.check_if_id_is_slug(id))
+        
+        document = mongodb_obj.get_document(
+            query=make_redirect_query(id=id, is_slug=self.check_if_id_is_slug(id)),
+            collection=COLLECTION.WINE.value,
+            projection=WINE_REDIRECT_PROJECTION
+        )
+        return document["slug"] if document else None
+    
+    def make_detail_pipeline(self, id: str) -> List[Dict[str, Any]]:
+        """
+            와인 상세 조회 pipeline (WINE_DETAIL_PIPELINE에 $match만 채움)
+            - reference cache 사용 시 작은 collection / 빈티지 목록의 $lookup은 빼고 _fetch_data_detail에서 채움
+        """
+        template = WINE_DETAIL_BASE_PIPELINE if REFERENCE_CACHE else WINE_DETAIL_PIPELINE
+        return template.bind(match=self.make_detail_query(id=id))
+    
+    def make_detail_query(self, id: str) -> Dict[str, Any]:
+        """
+            와인 상세 조회 조건 (_id 또는 slug)
+        """
+        return make_detail_query(id=id, is_slug=self.check_if_id_is_slug(id))
         
     def _handle_response_detail(self, 
                                 location: str,
@@ -335,7 +390,11 @@ class WineService(PriceProcessor):
         aroma = Aroma.to_item(name=document["name"], aroma=document.get("aroma"), language=language)     
         pairing = Pairing.to_item(name=document["name"], language=language, pairing=document.get("pairing"))
         
-        history_price = self._normalize_history_price(location=location, history_price=document.get("global_history_price"))
+        history_price = self._normalize_history_price(
+            location=location,
+            history_price=document.get("global_history_price"),
+            packed_history_price=document.get("global_history_price_packed")
+        )
         global_prices = self._normalize_global_prices(location=location, market_price=document.get("global_market_price"))
         local_prices = self._normalize_local_prices(location=location, market_price=document.get("global_market_price"))
         actual_price = self._normalize_actual_price(local_prices=local_prices)
@@ -368,7 +427,12 @@ class WineService(PriceProcessor):
 
     
         critic_score = Wine.make_critic_score(document.get("score"))
-        critic_review = self._normalize_critic_review(name=document["name"], language=language, critic_reviews=document["critic_reviews"])
+        critic_review = self._normalize_critic_review(
+            name=document["name"],
+            language=language,
+            critic_reviews=document["critic_reviews"],
+            stats=critic_review_stats.get(document["_id"]) if CRITIC_REVIEW_STATS else None
+        )
 
         taste_structure = self._normalize_taste(taste=document["taste"], language=language)
         technical_description = document.get("winemaking", {}).get("description") or TECHNICAL_DESCRIPTION[language].format(name=document["name"])
@@ -800,7 +864,7 @@ class WineService(PriceProcessor):
             currency=local_prices[0].currency
         )
     
-    def _normalize_history_price(self, location: str, history_price: dict) -> Optional[HistoryPrice]:
+    def _normalize_history_price(self, location: str, history_price: dict, packed_history_price: Optional[dict] = None) -> Optional[HistoryPrice]:
         """
             price: {
                 united-states: {
@@ -820,89 +884,29 @@ class WineService(PriceProcessor):
                 }
             }
         """
-        if not history_price:
+        if not history_price and not packed_history_price:
             return None
         
         local_country, currency = self._check_country_and_currency(location)
-        
-        # timestamp에 대하여 전체 가격 합 / 지역 별 가격 구하기
-        price_per_timestamp = {}
-        for country, price_info in history_price.items():        
-            for price in price_info["items"]:
-                timestamp = price["timestamp"]
-                price_value = self._convert_price_value(currency=currency, price=price)
-
-                if timestamp not in price_per_timestamp:
-                    price_per_timestamp[timestamp] = {"total": 0, "count": 0, "local": 0}
-                    
-                price_per_timestamp[timestamp]["total"] += price_value
-                price_per_timestamp[timestamp]["count"] += 1
-
-                if country == local_country:
-                    price_per_timestamp[timestamp]["local"] = price_value
+        currency_rate = partial(self.make_currency_rates, currency)
+        # packed_history_price: global_history_price_packed (dict 없이 binary에서 바로 배열로 올림)
+        history = (
+            PriceHistory.from_packed(packed=packed_history_price, local_country=local_country, currency_rate=currency_rate)
+            if packed_history_price else
+            PriceHistory.from_document(history_price=history_price, local_country=local_country, currency_rate=currency_rate)
+        )
 
-        # timestamp에 대하여 전체 평균 가격 / 지역 별 평균 가격 구하기
-        all_history_prices = [
-            HistoryPriceOption(
-                timestamp=int(timestamp),
-                globalAvgValue=round(value["total"] / value["count"], 1),
-                localAvgValue=value["local"] if country else round(value["total"] / value["count"], 1)
-            ) for timestamp, value in price_per_timestamp.items()
+        # 달력 기준 1 / 2 / 4개월 bucket으로 최근 6 / 12 / 24개월의 전체 평균 / 현지 평균 구하기
+        now = get_now_timestamp()
+        option_1, option_2, option_3 = [
+            [
+                HistoryPriceOption(
+                    timestamp=timestamp,
+                    globalAvgValue=global_avg,
+                    localAvgValue=local_avg
+                ) for timestamp, global_avg, local_avg in history.downsample(width=width, span=span, now=now)
+            ] for width, span in HISTORY_BUCKETS
         ]
-                
-        option_1 = [] # 6개월 이내의 가격만 가져오기
-        option_2 = [] # 12개월 이내의 가격만 가져오기 + 2개월 간격으로 평균값 계산
-        option_3 = [] # 24개월 이내의 가격만 가져오기 + 4개월 간격으로 평균값 계산
-        
-        option_1_timestamp = decrease_days_to_timestamp(
-            timestamp=get_now_timestamp(), days=6*30
-        )
-        option_2_timestamp = decrease_days_to_timestamp(
-            timestamp=get_now_timestamp(), days=12*30
-        )
-        option_3_timestamp = decrease_days_to_timestamp(
-            timestamp=get_now_timestamp(), days=24*30
-        )
-        
-        all_history_prices.reverse()
-    
-        for idx, price in enumerate(all_history_prices):
-            if price.timestamp >= option_1_timestamp:
-                option_1.append(
-                    HistoryPriceOption(
-                        timestamp=price.timestamp,
-                        globalAvgValue=price.globalAvgValue,
-                        localAvgValue=price.localAvgValue if price.localAvgValue else None
-                    )
-                )
-            
-            if idx and idx % 1 == 0 and price.timestamp >= option_2_timestamp:
-                global_avg = sum([price.globalAvgValue for price in all_history_prices[idx-2:idx]])/2
-                local_avg = sum([price.localAvgValue for price in all_history_prices[idx-2:idx]])/2
-                
-                price = HistoryPriceOption(
-                    timestamp=price.timestamp,
-                    globalAvgValue=round(global_avg, 1) if global_avg else None,
-                    localAvgValue=round(local_avg, 1) if local_avg else None
-                )
-                if price.globalAvgValue or price.localAvgValue:
-                    option_2.append(price)
-            
-            if idx and idx % 3 == 0 and price.timestamp >= option_3_timestamp:
-                global_avg = sum([price.globalAvgValue for price in all_history_prices[idx-4:idx]])/4
-                local_avg = sum([price.localAvgValue for price in all_history_prices[idx-4:idx]])/4
-                
-                price = HistoryPriceOption(
-                    timestamp=price.timestamp,
-                    globalAvgValue=round(global_avg, 1) if global_avg else None,
-                    localAvgValue=round(local_avg, 1) if local_avg else None
-                )
-                if price.globalAvgValue or price.localAvgValue:
-                    option_3.append(price)
-        
-        option_1.reverse()
-        option_2.reverse()
-        option_3.reverse()
         return HistoryPrice(
             option1=option_1,
             option2=option_2,
@@ -918,31 +922,18 @@ class WineService(PriceProcessor):
         # global price
         global_prices: List[GlobalPrice] = []
         
-        # 국가별 평균 가격들
-        for country, prices in market_price.items():
-            if country not in self.country_map:
-                continue
-            
-            market_prices = []
-            for price in prices:
-                try:
-                    market_prices.append(
-                        self.convert_to_market_price(
-                            country=country,
-                            currency=currency,
-                            price=price
-                        )
-                    )
-                except:
-                    continue
+        # 국가별 평균 가격들 (전체 가격을 한 번에 환산한 뒤 국가별로 묶음)
+        prices_per_country: Dict[str, List[MarketPrice]] = {}
+        for price in self.convert_to_market_prices(price=market_price, currency=currency):
+            prices_per_country.setdefault(price.country, []).append(price)
 
-            average_price = self.get_average_price(prices=market_prices)
+        for country, market_prices in prices_per_country.items():
             global_prices.append(
                 GlobalPrice(
-                    value=average_price,
+                    value=self.get_average_price(prices=market_prices),
                     currency=currency,
                     symbol=self.currency_map[currency]["symbol"],
-                    country=self.country_map[country]["alpha_2"]
+                    country=country
                 )
             )
         
@@ -1022,33 +1013,13 @@ class WineService(PriceProcessor):
         else:
             return PRICE_DESCRIPTION["low"][language].format(name=name, local_country=local_country)
 
-    def _normalize_critic_review(self, name: str, critic_reviews: List[dict], language: str) -> Optional[CriticReview]:
+    def _normalize_critic_review(self, name: str, critic_reviews: List[dict], language: str, stats: Optional[Dict[str, Any]] = None) -> Optional[CriticReview]:
+        """
+            stats: critic_review_stats에 미리 집계된 값 (없으면 critic_reviews로 바로 집계)
+        """
         if not critic_reviews or not isinstance(critic_reviews, list):
             return None
         
-        total_actual_score = 0
-        total_actual_count = 0
-        total_predicted_score = 0
-        total_predicted_count = 0
-        
-        total_actual_vote = {key: 0 for key in REVIEW_QUALITY.__member_values__()}
-        total_predicted_vote = {key: 0 for key in REVIEW_QUALITY.__member_values__()}
-        
-        total_aroma = {}
-        total_color = {}
-        total_palate = {}
-        total_pairing = {}
-        total_ingredient = {}
-        
-        total_body = 0
-        total_body_count = 0
-        total_acidity = 0
-        total_acidity_count = 0
-        total_tannin = 0
-        total_tannin_count = 0
-        total_sweetness = 0
-        total_sweetness_count = 0
-        
         review_detail = {}
         review_detail_types = []
         for detail in critic_reviews:
@@ -1058,75 +1029,18 @@ class WineService(PriceProcessor):
             critic = detail["critic"][0]
             
             critic_id = critic["_id"]
-            actual_score = self._make_100_point_score(detail["score"]["actual"]["value"], detail["score"]["actual"]["ground"])
-            predicted_score = self._make_100_point_score(detail["score"]["predicted"]["value"], detail["score"]["predicted"]["ground"])
-            if actual_score:
-                total_actual_score += actual_score
-                total_actual_count += 1
-            if predicted_score:
-                total_predicted_score += predicted_score
-                total_predicted_count += 1
-                
             actual_quality_id = detail["quality"]["actual"]["_id"]
             predicted_quality_id = detail["quality"]["predicted"]["_id"]
             
             if not actual_quality_id or not predicted_quality_id:
                 continue
             
-            if actual_quality_id in total_actual_vote:
-                total_actual_vote[actual_quality_id] += 1
-            
-            if predicted_quality_id in total_predicted_vote:
-                total_predicted_vote[predicted_quality_id] += 1
-                
-            for aroma in detail["keyword"]["aromas"]:
-                aroma = aroma.replace("_", " ")
-                if aroma not in total_aroma:
-                    total_aroma[aroma] = 0
-                total_aroma[aroma] += 1
-                
-            for color in detail["keyword"]["colors"]:
-                color = color.replace("_", " ")
-                if color not in total_color:
-                    total_color[color] = 0
-                total_color[color] += 1
-                
-            for palate in detail["keyword"]["palates"]:
-                palate = palate.replace("_", " ")
-                if palate not in total_palate:
-                    total_palate[palate] = 0
-                total_palate[palate] += 1
-                
-            for pairing in detail["keyword"]["pairings"]:
-                pairing = pairing.replace("_", " ")
-                if pairing not in total_pairing:
-                    total_pairing[pairing] = 0
-                total_pairing[pairing] += 1
-                
-            for ingredient in detail["keyword"]["ingredients"]:
-                ingredient = ingredient.replace("_", " ")
-                if ingredient not in total_ingredient:
-                    total_ingredient[ingredient] = 0
-                total_ingredient[ingredient] += 1
-            
             taste_structure = TasteStructure(
                 body=self._check_taste_body(detail["taste_structure"]["body"], language),
                 acidity=self._check_taste_acidity(detail["taste_structure"]["acidity"], language),
                 tannin=self._check_taste_tannin(detail["taste_structure"]["tannin"], language),
                 sweetness=self._check_taste_sweetness(detail["taste_structure"]["sweetness"], language),
             )
-            if taste_structure.body and taste_structure.body.score: 
-                total_body += taste_structure.body.score
-                total_body_count += 1
-            if taste_structure.acidity and taste_structure.acidity.score: 
-                total_acidity += taste_structure.acidity.score
-                total_acidity_count += 1
-            if taste_structure.tannin and taste_structure.tannin.score: 
-                total_tannin += taste_structure.tannin.score
-                total_tannin_count += 1
-            if taste_structure.sweetness and taste_structure.sweetness.score: 
-                total_sweetness += taste_structure.sweetness.score
-                total_sweetness_count += 1
 
             review_detail[critic_id] = DetailCriticReview(
                 profile=CriticProfile(
@@ -1170,22 +1084,20 @@ class WineService(PriceProcessor):
             ) for critic_id, critic in review_detail.items()   
         ]
         
-        total_colors = sorted(total_color.items(), key=lambda x: x[1], reverse=True)
-        total_aromas = sorted(total_aroma.items(), key=lambda x: x[1], reverse=True)
-        total_palates = sorted(total_palate.items(), key=lambda x: x[1], reverse=True)
-        total_pairings = sorted(total_pairing.items(), key=lambda x: x[1], reverse=True)
-        total_ingredients = sorted(total_ingredient.items(), key=lambda x: x[1], reverse=True)
+        summary = CriticReviewStats.summarize(stats or CriticReviewStats.aggregate(critic_reviews))
+        total_colors = summary["keywords"]["colors"]
+        total_aromas = summary["keywords"]["aromas"]
+        total_palates = summary["keywords"]["palates"]
+        total_pairings = summary["keywords"]["pairings"]
+        total_ingredients = summary["keywords"]["ingredients"]
         
-        total_colors = [color[0] for color in total_colors]
-        total_aromas = [aroma[0] for aroma in total_aromas]
-        total_palates = [palate[0] for palate in total_palates]
-        total_pairings = [pairing[0] for pairing in total_pairings]
-        total_ingredients = [ingredient[0] for ingredient in total_ingredients]
+        total_body = summary["taste"]["body"]
+        total_acidity = summary["taste"]["acidity"]
+        total_tannin = summary["taste"]["tannin"]
+        total_sweetness = summary["taste"]["sweetness"]
         
-        total_body = (total_body / total_body_count) if total_body_count else None
-        total_acidity = (total_acidity / total_acidity_count) if total_acidity_count else None
-        total_tannin = (total_tannin / total_tannin_count) if total_tannin_count else None
-        total_sweetness = (total_sweetness / total_sweetness_count) if total_sweetness_count else None
+        total_actual_vote = summary["actual_votes"]
+        total_predicted_vote = summary["predicted_votes"]
         
         tastes = []
         if total_body:
@@ -1197,8 +1109,8 @@ class WineService(PriceProcessor):
         if total_sweetness:
             tastes.append(self._check_taste_sweetness(total_sweetness, language))    
             
-        total_actual_score = (total_actual_score / total_actual_count) if total_actual_count else None
-        total_predicted_score = (total_predicted_score / total_predicted_count) if total_predicted_count else None
+        total_actual_score = summary["actual_score"]
+        total_predicted_score = summary["predicted_score"]
         
         # description
         colors = [color.title() for color in total_colors]
@@ -1292,33 +1204,6 @@ class WineService(PriceProcessor):
     ##############################################################
     # HELPER METHODS
     ##############################################################
-    @staticmethod
-    def _make_lookup_query(
-        local_field: str,
-        required_fields: List[str],
-        collection: COLLECTION,
-        as_field: Optional[str],
-        foreign_field: Optional[str] = "_id"
-    ) -> Dict[str, Any]:
-        return {
-            "from": collection.value,
-            "localField": local_field,
-            "foreignField": foreign_field,
-            "as": as_field,
-            "pipeline": [
-                {
-                    "$project": {
-                        "_id": 0,
-                        **{
-                            field: 1 for field in required_fields
-                        }
-                    }
-                }
-            ]
-        }
-        
-    
-    
     @staticmethod
     def check_if_id_is_slug(_id: str) -> bool:
         parsed_ids = _id.split("-")
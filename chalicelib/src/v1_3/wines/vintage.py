@@ -0,0 +1,132 @@
+"""
+    wine_vintages
+
+    - slug별 빈티지 목록 (_id: slug, vintages: JOIN_VINTAGE_PROJECTION 형태)
+    - 와인 상세의 available_vintages를 wines self $lookup 대신 point read + 컨테이너 cache로 채움
+    - 와인이 바뀌면 projector가 sync_wine으로 갱신하고, 누락이나 불일치는 rebuild로 다시 만듦
+      (index에 slug가 없으면 wines에서 slug로 직접 조회하고, 이 결과는 cache하지 않음)
+    - sync는 방금 바뀐 와인을 읽어야 하므로 primary에서 읽음
+
+    python -m chalicelib.src.v1_3.wines.vintage rebuild
+"""
+import logging
+import sys
+from typing import Any, Dict, List, Optional
+
+from pymongo import DeleteMany, ReplaceOne
+
+from chalicelib.setting import (REFERENCE_CACHE_TTL_SECONDS,
+                                WINE_VINTAGE_CACHE_SIZE)
+from chalicelib.src.constants.common import COLLECTION
+from chalicelib.src.tools.cache import ResponseCache
+from chalicelib.src.tools.database import MongoDB, mongodb_obj
+from chalicelib.src.utils import get_now_timestamp
+
+from .constant import JOIN_VINTAGE_PROJECTION
+
+VINTAGE_COLLECTION = COLLECTION.WINE_VINTAGE.value
+
+
+class WineVintageIndex:
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300):
+        self._entries = ResponseCache(
+            name="wine_vintage",
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds
+        )
+
+    def get(self, slug: str) -> List[Dict[str, Any]]:
+        """
+            slug의 빈티지 목록 (cache가 공유하는 list이므로 수정하면 안 됨)
+            - index에 없는 slug는 projector가 아직 반영하지 않은 것이므로 wines에서 읽고 cache하지 않음
+        """
+        if (vintages := self._entries.get(slug)) is None:
+            document = mongodb_obj.get_document(
+                collection=VINTAGE_COLLECTION,
+                query={"_id": slug},
+                projection={"_id": 0, "vintages": 1}
+            )
+            if not document:
+                return self._fetch_vintages(mongodb_obj, slug)
+            vintages = document["vintages"]
+            self._entries.put(slug, vintages)
+        return vintages
+
+    def sync_slug(self, slug: str):
+        if vintages := self._fetch_vintages(mongodb_obj.primary(), slug):
+            mongodb_obj.replace_document(
+                collection=VINTAGE_COLLECTION,
+                query={"_id": slug},
+                document={"_id": slug, "vintages": vintages, "updated_at": get_now_timestamp()}
+            )
+        else:
+            mongodb_obj.delete_document(collection=VINTAGE_COLLECTION, query={"_id": slug})
+
+    def sync_wine(self, id: str, document: Optional[Dict[str, Any]]):
+        """
+            와인 하나가 바뀌었을 때 관련된 slug를 다시 만듦 (slug 변경 / 삭제 시 이전 slug 포함)
+        """
+        slugs = {
+            vintage["_id"]
+            for vintage in mongodb_obj.primary().iter_documents(
+                collection=VINTAGE_COLLECTION,
+                query={"vintages._id": id},
+                projection={"_id": 1}
+            )
+        }
+        if document and document.get("slug"):
+            slugs.add(document["slug"])
+        for slug in slugs:
+            self.sync_slug(slug)
+        self._entries.clear()
+
+    def rebuild(self) -> int:
+        started_at = get_now_timestamp()
+        vintages: Dict[str, List[Dict[str, Any]]] = {}
+        for document in mongodb_obj.iter_documents(
+            collection=COLLECTION.WINE.value,
+            query={"slug": {"$exists": True}},
+            projection=JOIN_VINTAGE_PROJECTION,
+            batch_size=1000
+        ):
+            vintages.setdefault(document["slug"], []).append(document)
+
+        operations = [
+            ReplaceOne(
+                {"_id": slug},
+                {"_id": slug, "vintages": items, "updated_at": get_now_timestamp()},
+                upsert=True
+            )
+            for slug, items in vintages.items()
+        ]
+        # 더 이상 와인이 없는 slug는 삭제
+        operations.append(DeleteMany({"updated_at": {"$lt": started_at}}))
+        for idx in range(0, len(operations), 1000):
+            mongodb_obj.bulk_update_documents(
+                collection=VINTAGE_COLLECTION,
+                bulk_operations=operations[idx:idx + 1000],
+                ordered=False
+            )
+        self._entries.clear()
+        return len(vintages)
+
+    @staticmethod
+    def _fetch_vintages(db: MongoDB, slug: str) -> List[Dict[str, Any]]:
+        return db.get_documents(
+            collection=COLLECTION.WINE.value,
+            query={"slug": slug},
+            projection=JOIN_VINTAGE_PROJECTION
+        )
+
+
+vintage_index = WineVintageIndex(max_entries=WINE_VINTAGE_CACHE_SIZE, ttl_seconds=REFERENCE_CACHE_TTL_SECONDS)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "rebuild"
+    if command == "rebuild":
+        logging.info(f"rebuilt vintages of {vintage_index.rebuild()} slugs")
+    else:
+        sys.exit(f"unknown command: {command}")
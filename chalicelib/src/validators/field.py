@@ -22,6 +22,7 @@ class Pagination(BaseModel):
     page: int = Field(ge=0)
     totalSize: int = Field(ge=0)
     totalPage: int = Field(ge=0)
+    nextCursor: Optional[str] = Field(default=None)
 
 
 class Module(BaseModel):
@@ -1,6 +1,8 @@
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+from chalicelib.src.utils import decode_cursor
 
 
 class DefaultRequest(BaseModel):
@@ -14,4 +16,16 @@ class DetailRequest(DefaultRequest):
         
 class ListRequest(DefaultRequest):
     page: int = Field(default=1, ge=1)
-    size: int = Field(default=20, ge=1, le=100)
\ No newline at end of file
+    size: int = Field(default=20, ge=1, le=100)
+
+
+class CursorListRequest(ListRequest):
+    # cursor가 있으면 page 대신 keyset pagination 사용 (이전 응답의 pagination.nextCursor)
+    cursor: Optional[str] = Field(default=None)
+
+    @field_validator("cursor")
+    @classmethod
+    def validate_cursor(cls, cursor: Optional[str]) -> Optional[str]:
+        if cursor:
+            decode_cursor(cursor)
+        return cursor
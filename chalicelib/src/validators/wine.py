@@ -188,8 +188,13 @@ class WineCard(Wine):
         
     @staticmethod
     def to_items(items: List[dict], language: str, location: str):
+        # 목록 전체의 가격 문자열을 한 번에 계산
+        prices = PriceProcessor().make_price_strings(
+            location=location,
+            prices=[item.get("global_market_price") for item in items]
+        )
         card_items = []
-        for item in items:
+        for item, price in zip(items, prices):
             name = item["name"]
             href = Wine.make_href(slug=item["slug"], vintage=item["vintage"], is_default=item.get("is_default", False))
             types = [type["name"].upper() for type in item["types"]]
@@ -211,7 +216,7 @@ class WineCard(Wine):
                     href=href,
                     name=Wine.convert_wine_name(name, winery, item["vintage"]),
                     types=types,
-                    price=PriceProcessor().make_price_string(location=location, price=item.get("global_market_price")),
+                    price=price,
                     region=region,
                     winery=winery,
                     country=country,
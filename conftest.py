@@ -0,0 +1,22 @@
+"""
+    pytest 수집 설정
+    tests/__init__.py와 chalicelib/src/constants/__init__.py는 이 트리에 없는 모듈(tests.articles, constants.article 등)을 import 하므로
+    두 패키지는 __init__을 실행하지 않고 경로만 가진 패키지로 등록해 하위 모듈을 직접 import 한다.
+"""
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _register_package(name: str, path: str) -> None:
+    if name in sys.modules:
+        return
+    package = types.ModuleType(name)
+    package.__path__ = [os.path.join(ROOT, path)]
+    sys.modules[name] = package
+
+
+_register_package("tests", "tests")
+_register_package("chalicelib.src.constants", os.path.join("chalicelib", "src", "constants"))
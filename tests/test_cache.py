@@ -0,0 +1,41 @@
+import pytest
+
+from chalicelib.src.tools.cache import NegativeCache, VersionedCache
+from chalicelib.src.tools.database import InMemoryMongoDB, mongodb_obj
+
+
+@pytest.fixture(autouse=True)
+def db(monkeypatch):
+    db = InMemoryMongoDB()
+    monkeypatch.setattr(mongodb_obj, "_instance", db)
+    return db
+
+
+class TestVersionedCache:
+
+    def test_bump_clears_other_instances(self):
+        # 컨테이너 두 개의 같은 이름 cache
+        a = VersionedCache(name="wine_resolution", check_interval_seconds=0)
+        b = VersionedCache(name="wine_resolution", check_interval_seconds=0)
+        a.get("slug:x"), b.get("slug:x")
+        a.put("slug:x", {"wine": "x-2015"})
+        b.put("slug:x", {"wine": "x-2015"})
+
+        VersionedCache.bump_version("wine_resolution")
+        assert a.get("slug:x") is None
+        assert b.get("slug:x") is None
+
+    def test_check_interval(self):
+        cache = VersionedCache(name="wine_resolution", check_interval_seconds=60)
+        cache.get("slug:x")
+        cache.put("slug:x", {"wine": "x-2015"})
+
+        VersionedCache.bump_version("wine_resolution")
+        assert cache.get("slug:x") == {"wine": "x-2015"}
+
+    def test_version_id(self, db):
+        NegativeCache.bump_version("wine_not_found")
+        VersionedCache.bump_version("wine_resolution")
+        assert sorted(doc["_id"] for doc in db._read_db["counters"].find({})) == [
+            "negative:wine_not_found", "version:wine_resolution"
+        ]
@@ -0,0 +1,50 @@
+import threading
+import time
+
+import pytest
+
+from chalicelib.src.tools.database import InMemoryMongoDB, current_scope, gather, request_scope
+
+
+class TestGather:
+
+    def test_results_in_order(self):
+        assert gather(lambda: 1, lambda: 2, lambda: 3) == [1, 2, 3]
+        assert gather() == []
+
+    def test_runs_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+        # 순서대로 실행하면 barrier가 풀리지 않고 timeout
+        assert gather(barrier.wait, barrier.wait) is not None
+
+    def test_request_scope_is_shared(self):
+        db = InMemoryMongoDB(collections={"wines": [{"_id": "w1"}], "users": [{"_id": "u1"}]})
+        with request_scope() as scope:
+            scopes = gather(
+                current_scope,
+                current_scope,
+                lambda: db.get_document(collection="wines", query={"_id": "w1"}, projection={"_id": 1}),
+                lambda: db.get_document(collection="users", query={"_id": "u1"}, projection={"_id": 1}),
+            )[:2]
+            assert db.get_document(collection="wines", query={"_id": "w1"}, projection={"_id": 1}) == {"_id": "w1"}
+        assert scopes == [scope, scope]
+        assert scope.timings[("get_document", "wines")][0] == 1
+        assert scope.timings[("get_document", "users")][0] == 1
+        assert scope.identity_hits == {"wines": 1}
+
+    def test_waits_for_all_before_raising(self):
+        finished = []
+
+        def slow():
+            time.sleep(0.05)
+            finished.append(True)
+
+        def fail():
+            raise ValueError("failed")
+
+        with pytest.raises(ValueError):
+            gather(fail, slow)
+        assert finished == [True]
+
+    def test_nested_runs_in_worker(self):
+        assert gather(lambda: 0, lambda: gather(lambda: 1, lambda: 2)) == [0, [1, 2]]
@@ -0,0 +1,42 @@
+import pytest
+
+from chalicelib.src.tools.counter import InteractionCounter
+
+
+def make_deltas(before, after):
+    return InteractionCounter.make_deltas(user="u", item_type="wine", item="w", before=before, after=after)
+
+
+class TestMakeDeltas:
+
+    def test_like_to_dislike(self):
+        assert make_deltas({"like": 1}, {"like": -1}) == {
+            "user:u:wine:like": -1,
+            "wine:w:like": -1,
+            "user:u:wine:dislike": 1,
+            "wine:w:dislike": 1,
+        }
+
+    @pytest.mark.parametrize("field, value, action", [
+        ("like", 1, "like"),
+        ("like", -1, "dislike"),
+        ("bookmark", 1, "bookmark"),
+    ])
+    def test_toggle_off(self, field, value, action):
+        assert make_deltas({field: value}, {field: 0}) == {
+            f"user:u:wine:{action}": -1,
+            f"wine:w:{action}": -1,
+        }
+
+    def test_first_reaction(self):
+        # upsert로 새로 생성된 경우 변경 전 document는 빈 dict
+        assert make_deltas({}, {"bookmark": 1}) == {"user:u:wine:bookmark": 1, "wine:w:bookmark": 1}
+
+    def test_unrelated_field_unchanged(self):
+        assert make_deltas({"like": 1, "bookmark": 1}, {"like": 1, "bookmark": 0}) == {
+            "user:u:wine:bookmark": -1,
+            "wine:w:bookmark": -1,
+        }
+
+    def test_no_change(self):
+        assert make_deltas({"like": 0, "bookmark": 0}, {"like": 0}) == {}
@@ -0,0 +1,34 @@
+import base64
+
+import pytest
+from bson import ObjectId
+from pydantic import ValidationError
+
+from chalicelib.src.utils import decode_cursor, encode_cursor
+from chalicelib.src.validators.request import CursorListRequest
+
+
+def encode_raw(text):
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii")
+
+
+class TestCursor:
+
+    @pytest.mark.parametrize("value", [ObjectId(), "chateau-margaux-2015", 3])
+    def test_round_trip(self, value):
+        assert decode_cursor(encode_cursor(value)) == value
+
+    @pytest.mark.parametrize("cursor", [
+        "not base64!",
+        encode_raw("{broken"),
+        encode_raw('{"$oid": "zz"}'),
+    ])
+    def test_invalid(self, cursor):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+    def test_request_validation(self):
+        cursor = encode_cursor(ObjectId())
+        assert CursorListRequest(cursor=cursor).cursor == cursor
+        with pytest.raises(ValidationError):
+            CursorListRequest(cursor=encode_raw('{"$oid": "zz"}'))
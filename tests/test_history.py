@@ -0,0 +1,93 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from chalicelib.src.tools.history import (HISTORY_BUCKETS, PriceHistory,
+                                          pack_history_price)
+
+RATES = {"USD": 1.0, "EUR": 1.25, "KRW": 0.001}
+
+
+def currency_rate(codes):
+    return np.asarray([RATES[code] for code in codes], dtype=np.float64)
+
+
+def timestamp(year, month, day=1, hour=0, minute=0, second=0):
+    return int(datetime(year, month, day, hour, minute, second, tzinfo=timezone.utc).timestamp())
+
+
+def make_history(**countries):
+    return {
+        country: {"items": [{"timestamp": ts, "currency": currency, "value": value} for ts, currency, value in items]}
+        for country, items in countries.items()
+    }
+
+
+NOW = timestamp(2024, 6, 15)
+
+
+class TestDownsample:
+
+    def test_calendar_buckets(self):
+        history = PriceHistory.from_document(
+            make_history(**{"united-states": [
+                (timestamp(2024, 4, 30, 23, 59, 59), "USD", 10.0),
+                (timestamp(2024, 5, 1), "USD", 20.0),
+                (timestamp(2024, 6, 30, 23, 59, 59), "USD", 40.0),
+            ]}),
+            local_country="united-states",
+            currency_rate=currency_rate,
+        )
+        # 2개월 bucket은 1970-01부터 자른 달력 구간 (3-4월, 5-6월)
+        assert history.downsample(width=2, span=12, now=NOW) == [
+            (timestamp(2024, 3, 1), 10.0, 10.0),
+            (timestamp(2024, 5, 1), 30.0, 30.0),
+        ]
+
+    def test_span_excludes_older_months(self):
+        history = PriceHistory.from_document(
+            make_history(france=[
+                (timestamp(2023, 12, 31, 23, 59, 59), "EUR", 8.0),
+                (timestamp(2024, 1, 1), "EUR", 16.0),
+            ]),
+            local_country="united-states",
+            currency_rate=currency_rate,
+        )
+        # 6개월: 2024-01 ~ 2024-06, 현지 가격이 없으면 현지 평균은 None
+        assert history.downsample(width=1, span=6, now=NOW) == [(timestamp(2024, 1, 1), 20.0, None)]
+
+    def test_global_and_local_average(self):
+        history = PriceHistory.from_document(
+            make_history(**{
+                "united-states": [(timestamp(2024, 6, 2), "USD", 30.0)],
+                "south-korea": [(timestamp(2024, 6, 3), "KRW", 50000.0)],
+            }),
+            local_country="united-states",
+            currency_rate=currency_rate,
+        )
+        assert history.downsample(width=1, span=6, now=NOW) == [(timestamp(2024, 6, 1), 40.0, 30.0)]
+
+    def test_empty(self):
+        history = PriceHistory.from_document({}, local_country="united-states", currency_rate=currency_rate)
+        assert [history.downsample(width, span, now=NOW) for width, span in HISTORY_BUCKETS] == [[], [], []]
+
+
+class TestPackedHistory:
+
+    HISTORY = make_history(**{
+        "united-states": [(timestamp(2024, 6, 2), "USD", 30.5), (timestamp(2023, 9, 20), "USD", 28.25)],
+        "france": [(timestamp(2024, 2, 11), "EUR", 22.0), (timestamp(2024, 5, 5), "EUR", 24.5), (timestamp(2022, 1, 1), "EUR", 19.0)],
+        "south-korea": [(timestamp(2024, 4, 9), "KRW", 45000.0)],
+    })
+
+    @pytest.mark.parametrize("local_country", ["united-states", "france", "japan"])
+    def test_same_as_legacy(self, local_country):
+        legacy = PriceHistory.from_document(self.HISTORY, local_country=local_country, currency_rate=currency_rate)
+        packed = PriceHistory.from_packed(pack_history_price(self.HISTORY), local_country=local_country, currency_rate=currency_rate)
+        for width, span in HISTORY_BUCKETS:
+            assert packed.downsample(width, span, now=NOW) == legacy.downsample(width, span, now=NOW)
+
+    def test_mixed_currencies(self):
+        with pytest.raises(ValueError):
+            pack_history_price(make_history(france=[(timestamp(2024, 1, 1), "EUR", 1.0), (timestamp(2024, 2, 1), "USD", 1.0)]))
@@ -0,0 +1,84 @@
+import pytest
+
+from chalicelib.src.tools.database import InMemoryMongoDB, request_scope
+
+PROJECTION = {"_id": 1, "name": 1}
+
+
+@pytest.fixture
+def db():
+    return InMemoryMongoDB(collections={
+        "wines": [
+            {"_id": "w1", "name": "Wine 1"},
+            {"_id": "w2", "name": "Wine 2"},
+        ],
+    })
+
+
+def query_count(scope, operation, collection="wines"):
+    return scope.timings.get((operation, collection), [0])[0]
+
+
+class TestRequestScope:
+
+    def test_point_read_hit(self, db):
+        with request_scope(route="/wines/{id}") as scope:
+            first = db.get_document(collection="wines", query={"_id": "w1"}, projection=PROJECTION)
+            second = db.get_document(collection="wines", query={"_id": "w1"}, projection=PROJECTION)
+        assert first == second == {"_id": "w1", "name": "Wine 1"}
+        # hit은 query 지표가 아닌 identity_hits로만 기록
+        assert query_count(scope, "get_document") == 1
+        assert scope.identity_hits == {"wines": 1}
+
+    def test_hit_returns_copy(self, db):
+        with request_scope() as scope:
+            db.get_document(collection="wines", query={"_id": "w1"}, projection=PROJECTION)["name"] = "changed"
+            assert db.get_document(collection="wines", query={"_id": "w1"}, projection=PROJECTION)["name"] == "Wine 1"
+        assert scope.identity_hits == {"wines": 1}
+
+    def test_projection_and_filter_are_separate(self, db):
+        with request_scope() as scope:
+            db.get_document(collection="wines", query={"_id": "w1"}, projection=PROJECTION)
+            db.get_document(collection="wines", query={"_id": "w1"}, projection={"_id": 1})
+            db.get_document(collection="wines", query={"_id": "w1", "name": "Wine 1"}, projection=PROJECTION)
+        assert query_count(scope, "get_document") == 3
+        assert scope.identity_hits == {}
+
+    def test_missing_document_is_cached(self, db):
+        with request_scope() as scope:
+            assert db.get_document(collection="wines", query={"_id": "w9"}, projection=PROJECTION) == {}
+            assert db.get_document(collection="wines", query={"_id": "w9"}, projection=PROJECTION) == {}
+        assert query_count(scope, "get_document") == 1
+
+    def test_get_documents_by_ids(self, db):
+        with request_scope() as scope:
+            db.get_document(collection="wines", query={"_id": "w1"}, projection=PROJECTION)
+            docs = db.get_documents_by_ids(collection="wines", ids=["w1", "w2", "w1"], projection=PROJECTION)
+            db.get_documents_by_ids(collection="wines", ids=["w2", "w1"], projection=PROJECTION)
+        assert [doc["_id"] for doc in docs] == ["w1", "w2", "w1"]
+        assert query_count(scope, "get_document") == 1
+        # 두 번째 호출은 모두 hit이므로 DB를 조회하지 않음
+        assert query_count(scope, "get_documents_by_ids") == 1
+        assert scope.identity_hits == {"wines": 3}
+
+    def test_invalidate_on_write(self, db):
+        with request_scope() as scope:
+            db.get_document(collection="wines", query={"_id": "w1"}, projection=PROJECTION)
+            db.update_document(collection="wines", query={"_id": "w1"}, update_query={"$set": {"name": "Renamed"}})
+            doc = db.get_document(collection="wines", query={"_id": "w1"}, projection=PROJECTION)
+        assert doc == {"_id": "w1", "name": "Renamed"}
+        assert query_count(scope, "get_document") == 2
+        assert scope.identity_hits == {}
+
+    def test_write_keeps_other_collections(self, db):
+        with request_scope() as scope:
+            db.get_document(collection="wines", query={"_id": "w1"}, projection=PROJECTION)
+            db.create_document(collection="counters", document={"_id": "wine:w1:like", "count": 1})
+            db.get_document(collection="wines", query={"_id": "w1"}, projection=PROJECTION)
+        assert query_count(scope, "get_document") == 1
+        assert scope.identity_hits == {"wines": 1}
+
+    def test_no_scope(self, db):
+        db.get_document(collection="wines", query={"_id": "w1"}, projection=PROJECTION)
+        db.update_document(collection="wines", query={"_id": "w1"}, update_query={"$set": {"name": "Renamed"}})
+        assert db.get_document(collection="wines", query={"_id": "w1"}, projection=PROJECTION)["name"] == "Renamed"
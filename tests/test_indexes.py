@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from chalicelib.src.tools.authorizer import Authorizer
+from chalicelib.src.tools.database import InMemoryMongoDB, mongodb_obj
+from chalicelib.src.tools.database._memory import InMemoryCollection
+from chalicelib.src.tools.database.indexes import (QUERY_SHAPES,
+                                                   check_query_shapes,
+                                                   ensure_indexes)
+from chalicelib.src.v1_3.wines.projector import WineDetailProjector
+from chalicelib.src.v1_3.wines.vintage import vintage_index
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def query_fields(query):
+    return tuple(sorted(key for key in query if not key.startswith("$")))
+
+
+def shape_fields(shape):
+    if "query" in shape:
+        return query_fields(shape["query"])
+    return query_fields(shape["pipeline"][0]["$match"])
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = InMemoryMongoDB.from_fixtures(FIXTURES)
+    ensure_indexes(db)
+    monkeypatch.setattr(mongodb_obj, "_instance", db)
+    return db
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """
+        memory backend에 들어온 query의 (collection, field) 목록
+    """
+    recorded = set()
+
+    def record(method, get_query):
+        def wrapper(self, *args, **kwargs):
+            query = get_query(*args, **kwargs) or {}
+            recorded.add((self.name, query_fields(query)))
+            return method(self, *args, **kwargs)
+        return wrapper
+
+    for name in ["find", "find_one", "count_documents"]:
+        method = getattr(InMemoryCollection, name)
+        monkeypatch.setattr(InMemoryCollection, name, record(method, lambda filter=None, *a, **k: filter))
+    monkeypatch.setattr(InMemoryCollection, "aggregate", record(
+        InMemoryCollection.aggregate,
+        lambda pipeline, *a, **k: pipeline[0].get("$match") if pipeline else None
+    ))
+    return recorded
+
+
+class TestQueryShapes:
+
+    def test_covered_by_indexes(self, db):
+        assert check_query_shapes(db) == []
+
+    def test_uncovered_without_indexes(self):
+        violations = check_query_shapes(InMemoryMongoDB())
+        assert {violation["name"] for violation in violations} >= {
+            "Authorizer.find_refresh_token",
+            "WineService._fetch_redirect_slug(slug)",
+            "get_view_document(slug)",
+        }
+
+    def test_unique_names(self):
+        names = [shape["name"] for shape in QUERY_SHAPES]
+        assert len(names) == len(set(names))
+
+    def test_declared_queries_match_callers(self, db, queries):
+        # QUERY_SHAPES에 직접 적은 조건이 실제 호출하는 query와 같은지 확인 (_id 조건이 있는 조회는 항상 index를 사용하므로 제외)
+        db.create_document(collection="critic_reviews", document={
+            "_id": "review-1", "wine": {"_id": "chateau-margaux-2015"}, "critic": {"_id": "critic-1"}, "status": 1
+        })
+        projector = WineDetailProjector()
+        projector.handle_change("wines", "chateau-margaux-2015", db.get_document(
+            collection="wines", query={"_id": "chateau-margaux-2015"}, projection=None
+        ))
+        projector.handle_change("critics", "critic-1", {"_id": "critic-1", "status": 1})
+        projector.handle_change("countries", "france", {"_id": "france", "name": "France"})
+        vintage_index._entries.clear()
+        vintage_index.get("unknown-slug")
+        Authorizer.find_refresh_token("token")
+
+        declared = {(shape["collection"].value, shape_fields(shape)) for shape in QUERY_SHAPES}
+        issued = {
+            (collection, fields) for collection, fields in queries
+            if fields and "_id" not in fields
+        }
+        assert issued - declared == set()
@@ -0,0 +1,177 @@
+import os
+
+import pytest
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from chalicelib.src.tools.database import InMemoryMongoDB
+from chalicelib.src.v1_3.wines.constant import WINE_DETAIL_PROJECTION
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@pytest.fixture
+def db():
+    return InMemoryMongoDB.from_fixtures(FIXTURES)._read_db
+
+
+class TestFixtures:
+
+    def test_load_directory(self, db):
+        assert [doc["_id"] for doc in db["wines"].find({}, {"_id": 1})] == [
+            "chateau-margaux-2015", "chateau-margaux-2016", "cloudy-bay-sauvignon-blanc-2022"
+        ]
+        # Extended JSON
+        assert isinstance(db["interactions"].find_one({})["_id"], ObjectId)
+        assert db["wines"].find_one({"_id": "chateau-margaux-2015"})["created_at"].year == 2024
+
+
+class TestPipeline:
+
+    def test_match(self, db):
+        docs = db["wines"].aggregate([
+            {"$match": {"status": {"$gte": 1}, "types._id": {"$in": ["red"]}}},
+        ])
+        assert [doc["_id"] for doc in docs] == ["chateau-margaux-2015", "chateau-margaux-2016"]
+
+    def test_match_operators(self, db):
+        wines = db["wines"]
+        assert wines.count_documents({"slug": "chateau-margaux", "is_default": True}) == 1
+        assert wines.count_documents({"region": {"$exists": False}}) == 1
+        assert wines.count_documents({"$or": [{"score": {"$gt": 4.6}}, {"status": -3}]}) == 2
+        assert wines.count_documents({"vintages._id": "chateau-margaux-2016"}) == 2
+        assert wines.count_documents({"_id": {"$ne": "chateau-margaux-2015"}, "status": 1}) == 1
+
+    def test_sort_limit(self, db):
+        docs = db["wines"].aggregate([
+            {"$sort": {"score": -1, "_id": 1}},
+            {"$limit": 2},
+            {"$project": {"_id": 1}},
+        ])
+        assert list(docs) == [{"_id": "chateau-margaux-2016"}, {"_id": "chateau-margaux-2015"}]
+
+    def test_find_sort_skip_limit(self, db):
+        cursor = db["wines"].find({"status": 1}, {"vintage": 1}).sort([("vintage", -1)]).skip(1).limit(1)
+        assert list(cursor) == [{"_id": "chateau-margaux-2015", "vintage": "2015"}]
+
+    def test_lookup_local_field(self, db):
+        docs = db["wines"].aggregate([
+            {"$match": {"_id": "chateau-margaux-2015"}},
+            {"$lookup": {
+                "from": "countries",
+                "localField": "country._id",
+                "foreignField": "_id",
+                "pipeline": [{"$project": {"_id": 1, "ko.name": 1}}],
+                "as": "country",
+            }},
+        ])
+        assert list(docs)[0]["country"] == [{"_id": "france", "ko": {"name": "프랑스"}}]
+
+    def test_lookup_array(self, db):
+        doc = list(db["wines"].aggregate([
+            {"$match": {"_id": "chateau-margaux-2016"}},
+            {"$lookup": {
+                "from": "wines",
+                "localField": "vintages._id",
+                "foreignField": "_id",
+                "pipeline": [{"$sort": {"vintage": 1}}, {"$project": {"_id": 1}}],
+                "as": "vintages",
+            }},
+        ]))[0]
+        assert doc["vintages"] == [{"_id": "chateau-margaux-2015"}, {"_id": "chateau-margaux-2016"}]
+
+    def test_facet_pagination(self, db):
+        from chalicelib.src.tools.database import MongoDB
+
+        result = list(db["interactions"].aggregate([
+            {"$match": {"item_type": "wine"}},
+            {"$sort": {"_id": -1}},
+            {"$facet": MongoDB.make_pagination_facet_query(page=1, size=2)},
+        ]))
+        assert len(result) == 1
+        assert [doc["user"] for doc in result[0]["items"]] == ["user-2", "user-1"]
+        assert result[0]["total"] == [{"count": 3}]
+
+    def test_facet_empty(self, db):
+        result = list(db["interactions"].aggregate([
+            {"$match": {"item_type": "region"}},
+            {"$facet": {"items": [{"$limit": 10}], "total": [{"$count": "count"}]}},
+        ]))
+        assert result == [{"items": [], "total": []}]
+
+    def test_cond_remove(self, db):
+        wines = db["wines"]
+        wines.update_one({"_id": "chateau-margaux-2015"}, {"$set": {
+            "global_history_price": {"united-states": {"items": []}},
+            "global_history_price_packed": {"united-states": {"timestamp": [], "value": []}},
+        }})
+        wines.update_one({"_id": "chateau-margaux-2016"}, {"$set": {
+            "global_history_price": {"united-states": {"items": []}},
+        }})
+
+        packed = wines.find_one({"_id": "chateau-margaux-2015"}, WINE_DETAIL_PROJECTION)
+        assert "global_history_price" not in packed
+        assert packed["global_history_price_packed"] == {"united-states": {"timestamp": [], "value": []}}
+
+        legacy = list(wines.aggregate([
+            {"$match": {"_id": "chateau-margaux-2016"}},
+            {"$project": WINE_DETAIL_PROJECTION},
+        ]))[0]
+        assert legacy["global_history_price"] == {"united-states": {"items": []}}
+        assert "global_history_price_packed" not in legacy
+
+    def test_set_remove(self, db):
+        docs = db["wines"].aggregate([
+            {"$match": {"_id": "chateau-margaux-2015"}},
+            {"$set": {"score": {"$cond": [{"$eq": ["$is_default", True]}, "$$REMOVE", "$score"]}}},
+            {"$project": {"score": 1, "nested": {"kept": "$vintage", "removed": "$$REMOVE"}}},
+        ])
+        assert list(docs) == [{"_id": "chateau-margaux-2015", "nested": {"kept": "2015"}}]
+
+
+class TestUpdate:
+
+    def test_operators(self, db):
+        counters = db["counters"]
+        counters.update_one({"_id": "wine:a:like"}, {"$inc": {"count": 1}}, upsert=True)
+        counters.update_one({"_id": "wine:a:like"}, {"$inc": {"count": 2}, "$setOnInsert": {"created": True}}, upsert=True)
+        counters.update_one({"_id": "wine:a:like"}, {"$push": {"log": {"$each": [1, 2]}}, "$unset": {"missing": ""}})
+        assert counters.find_one({"_id": "wine:a:like"}) == {"_id": "wine:a:like", "count": 3, "log": [1, 2]}
+
+    def test_bulk_write(self, db):
+        counters = db["counters"]
+        result = counters.bulk_write([
+            UpdateOne({"_id": "wine:a:like"}, {"$inc": {"count": 1}}, upsert=True),
+            UpdateOne({"_id": "wine:a:like"}, {"$inc": {"count": -1}}, upsert=True),
+            UpdateOne({"_id": "user:u:wine:like"}, {"$inc": {"count": 1}}, upsert=True),
+        ])
+        assert result.upserted_count == 2
+        assert {doc["_id"]: doc["count"] for doc in counters.find({})} == {"wine:a:like": 0, "user:u:wine:like": 1}
+
+    @pytest.mark.parametrize("before, value, after", [
+        (1, 1, 0),
+        (-1, 1, 1),
+        (0, -1, -1),
+        (None, 1, 1),
+    ])
+    def test_pipeline_toggle(self, db, before, value, after):
+        # WineService.update_reaction의 toggle update
+        interactions = db["interactions"]
+        query = {"user": "user-3", "item": "chateau-margaux-2015", "item_type": "wine"}
+        if before is not None:
+            interactions.insert_one({**query, "like": before})
+        update = [{"$set": {"like": {"$cond": {"if": {"$ne": ["$like", value]}, "then": value, "else": 0}}}}]
+
+        previous = interactions.find_one_and_update(query, update, projection={"_id": 0, "like": 1}, upsert=True)
+        assert previous == (None if before is None else {"like": before})
+        assert interactions.find_one(query)["like"] == after
+
+    def test_pipeline_unset(self, db):
+        wines = db["wines"]
+        wines.update_one(
+            {"_id": "chateau-margaux-2015"},
+            [{"$set": {"alcohol": "$$REMOVE", "score": {"$add": ["$score", 0.1]}}}, {"$unset": "vintages"}]
+        )
+        doc = wines.find_one({"_id": "chateau-margaux-2015"})
+        assert "alcohol" not in doc and "vintages" not in doc
+        assert doc["score"] == pytest.approx(4.7)
@@ -0,0 +1,82 @@
+import pytest
+
+from chalicelib.src.tools.processor import PriceProcessor, PriceReference
+
+CURRENCIES = [
+    {"code": "USD", "symbol": "$", "to": 1, "from": 1},
+    {"code": "EUR", "symbol": "€", "to": 1.08, "from": 0.925},
+    {"code": "KRW", "symbol": "₩", "to": 0.00074, "from": 1350.0},
+    {"code": "RUB", "symbol": "руб.", "to": 0.011, "from": 90.0},
+]
+COUNTRIES = [
+    {"_id": "united-states", "name": "United States", "alpha_2": "US", "alpha_3": "USA", "currency_code": "USD"},
+    {"_id": "france", "name": "France", "alpha_2": "FR", "alpha_3": "FRA", "currency_code": "EUR"},
+    {"_id": "south-korea", "name": "South Korea", "alpha_2": "KR", "alpha_3": "KOR", "currency_code": "KRW"},
+    {"_id": "russia", "name": "Russia", "alpha_2": "RU", "alpha_3": "RUS", "currency_code": "RUB"},
+]
+
+
+def make_offer(value=25.0, currency="EUR", bottle_count=1, market=None):
+    return {
+        "value": value,
+        "currency": currency,
+        "original_price": {"value": value, "currency": currency, "bottle_count": bottle_count, "volume": 750},
+        "market": market or {"name": "market", "url": "https://market.example", "is_auction": False},
+    }
+
+
+# pydantic의 lax 변환으로 MarketPrice가 되거나 되지 않는 값
+OFFERS = [
+    make_offer(),
+    make_offer(bottle_count=1.0),
+    make_offer(bottle_count="1"),
+    make_offer(bottle_count=6),
+    make_offer(bottle_count=2.5),
+    make_offer(bottle_count=0),
+    make_offer(bottle_count=None),
+    make_offer(bottle_count="x"),
+    make_offer(market={"name": "market", "url": "https://market.example", "is_auction": 1}),
+    make_offer(market={"name": "market", "url": "https://market.example", "is_auction": "true"}),
+    make_offer(market={"name": "market", "url": "https://market.example", "is_auction": "maybe"}),
+    make_offer(market={"name": "market", "href": "http://market.example", "isAuction": True}),
+    make_offer(market={"name": "market", "url": "ftp://market.example", "is_auction": False}),
+    make_offer(market={"name": 3, "url": "https://market.example", "is_auction": False}),
+    make_offer(market={"url": "https://market.example", "is_auction": False}),
+    make_offer(value=0),
+    make_offer(value="25"),
+    make_offer(currency="JPY"),
+    make_offer(currency="RUB"),
+    {"value": 25.0, "currency": "EUR", "original_price": None, "market": {"name": "market", "url": "https://market.example", "is_auction": False}},
+]
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    monkeypatch.setattr(PriceProcessor, "_reference", PriceReference(currencies=CURRENCIES, countries=COUNTRIES))
+    monkeypatch.setattr(PriceProcessor, "_refresh_at", float("inf"))
+    return PriceProcessor()
+
+
+class TestPriceStrings:
+
+    @pytest.mark.parametrize("location", ["US", "FR", "KR", "RU", "ZZ", None])
+    @pytest.mark.parametrize("offer", OFFERS)
+    def test_single_offer_matches_market_price(self, processor, location, offer):
+        price = {"france": [offer]}
+        expected = processor.to_string(processor.select_local_prices(location=location, price=price))
+        assert processor.make_price_strings(location=location, prices=[price]) == [expected]
+
+    @pytest.mark.parametrize("location", ["US", "FR", "KR", "RU"])
+    def test_batch_matches_market_price(self, processor, location):
+        prices = [
+            None,
+            {},
+            {"france": OFFERS, "united-states": [make_offer(value=30.0, currency="USD")]},
+            {"south-korea": [make_offer(value=52000, currency="KRW"), make_offer(value=48000, currency="KRW", bottle_count=1.0)]},
+            {"nowhere": [make_offer()]},
+        ]
+        expected = [processor.to_string(processor.select_local_prices(location=location, price=price)) for price in prices]
+        assert processor.make_price_strings(location=location, prices=prices) == expected
+
+    def test_long_currency_symbol_is_rejected(self, processor):
+        assert processor.make_price_strings(location="RU", prices=[{"france": [make_offer()]}]) == [""]
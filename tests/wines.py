@@ -25,11 +25,10 @@ class TestWine:
         """
             GET /v1.3/wines/{id}
         """
-        items = self._fetch_wines_from_db()
-        logger.info(f"Total items: {len(items)}")
-        
+        total = 0
         with Client(app) as client:            
-            for item in items:
+            for item in self._fetch_wines_from_db():
+                total += 1
                 for language in ["ko", "en", "ja"]:
                     API_HEADER["Accept-Language"] = language
                     endpoint = f"{API_PREFIX}/wines/{item['_id']}"
@@ -39,6 +38,7 @@ class TestWine:
                         pass
                     else:
                         logger.error(f"\n GET {endpoint}: {response.status_code} {response.json_body}")
+        logger.info(f"Total items: {total}")
             
     def _fetch_wines_from_db(self):
         query = {
@@ -47,10 +47,11 @@ class TestWine:
             # }
         }
         project_query = {"_id": 1}
-        return mongodb_obj.get_documents(
+        return mongodb_obj.iter_documents(
             query=query,
             projection=project_query,
             collection=self.collection,
+            batch_size=100,
         )
         
     @staticmethod